@@ -2,6 +2,7 @@
 from rest_framework import serializers
 from .models import Curriculum, GradeLevel, Department
 from apps.school.models import School
+from apps.core.fieldsets import SparseFieldsetSerializerMixin
 
 
 class SchoolMiniSerializer(serializers.ModelSerializer):
@@ -51,7 +52,7 @@ class CurriculumCreateUpdateSerializer(serializers.ModelSerializer):
         return data
 
 
-class GradeLevelSerializer(serializers.ModelSerializer):
+class GradeLevelSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     school = SchoolMiniSerializer(read_only=True)
     curriculum = CurriculumSerializer(read_only=True)
 
@@ -67,7 +68,7 @@ class GradeLevelCreateUpdateSerializer(serializers.ModelSerializer):
         fields = ['id', 'curriculum', 'name', 'short_name', 'order', 'code', 'education_level', 'pathway']
 
 
-class DepartmentSerializer(serializers.ModelSerializer):
+class DepartmentSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     school = SchoolMiniSerializer(read_only=True)
     curriculum = CurriculumSerializer(read_only=True)
 
@@ -16,6 +16,7 @@ from .serializers import (
     DepartmentSerializer, DepartmentCreateUpdateSerializer,
 )
 from apps.school.models import School
+from apps.core.fieldsets import SparseFieldsetMixin
 
 class CurriculumTemplateViewSet(viewsets.ReadOnlyModelViewSet):
     """
@@ -191,7 +192,7 @@ class CopyCurriculumTemplateAPIView(APIView):
         }, status=201 if created else 200)
 
 
-class GradeLevelViewSet(viewsets.ModelViewSet):
+class GradeLevelViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
 
     def get_serializer_class(self):
@@ -236,7 +237,7 @@ class GradeLevelViewSet(viewsets.ModelViewSet):
         return Response({"detail": f"Deleted {deleted[0]} grade levels"}, status=204)
 
 
-class DepartmentViewSet(viewsets.ModelViewSet):
+class DepartmentViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
 
     def get_serializer_class(self):
@@ -1,6 +1,6 @@
 # admissions/admin.py
 from django.contrib import admin
-from .models import Application, ApplicationDocument, AdmissionFeePayment
+from .models import Application, ApplicationDocument, AdmissionFeePayment, AdmissionNumberSequence, DocumentBlob, AdmissionFunnelCounter, SubmissionJob, OutboundEmail
 
 @admin.register(Application)
 class ApplicationAdmin(admin.ModelAdmin):
@@ -20,4 +20,9 @@ class ApplicationAdmin(admin.ModelAdmin):
     readonly_fields = ('id', 'created_by')  # only include fields that actually exist
 
 admin.site.register(ApplicationDocument)
-admin.site.register(AdmissionFeePayment)
\ No newline at end of file
+admin.site.register(AdmissionFeePayment)
+admin.site.register(AdmissionNumberSequence)
+admin.site.register(DocumentBlob)
+admin.site.register(AdmissionFunnelCounter)
+admin.site.register(SubmissionJob)
+admin.site.register(OutboundEmail)
\ No newline at end of file
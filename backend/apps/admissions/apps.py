@@ -3,3 +3,6 @@ from django.apps import AppConfig
 class AdmissionsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.admissions'  # ✅ full module path
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,38 @@
+# apps/admissions/imports.py
+from rest_framework import serializers
+
+from apps.core.imports import GradeLevelNameField, ImportTarget
+from .models import Application, AdmissionFunnelCounter
+from .serializers import ApplicationCreateUpdateSerializer
+
+DATE_FORMATS = ['iso-8601', '%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y']
+
+
+class ApplicationImportSerializer(ApplicationCreateUpdateSerializer):
+    """Same rules as the API, minus what a spreadsheet can't carry."""
+    class_applied = GradeLevelNameField(required=False)
+    date_of_birth = serializers.DateField(input_formats=DATE_FORMATS, required=False, allow_null=True)
+    documents = None
+    photo = None
+
+    class Meta(ApplicationCreateUpdateSerializer.Meta):
+        fields = [
+            f for f in ApplicationCreateUpdateSerializer.Meta.fields
+            if f not in ('id', 'school', 'documents', 'photo')
+        ]
+
+
+class ApplicationImport(ImportTarget):
+    model = Application
+    serializer_class = ApplicationImportSerializer
+    class_field = 'class_applied'
+
+    def build(self, validated_data):
+        application = Application(school=self.school, created_by=self.user, **validated_data)
+        # What Application.save() would have done
+        if application.status == Application.Status.SUBMITTED and not application.submitted_at:
+            application.submitted_at = application.created_at
+        return application
+
+    def after_create(self, instances):
+        AdmissionFunnelCounter.apply_changes([(None, app.funnel_state()) for app in instances])
@@ -1,29 +1,209 @@
 # apps/admissions/management/commands/backfill_document_checksums.py
 import hashlib
-from django.core.management.base import BaseCommand
-from apps.admissions.models import ApplicationDocument
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Q
+
+from apps.admissions.models import ApplicationDocument, DocumentBlob
+
+SHA256_PATTERN = r'^[0-9a-f]{64}$'
+CHUNK_SIZE = 1024 * 1024
+
+
+def hash_stored_file(name):
+    """Runs in a worker process. Returns (name, sha256, error)."""
+    try:
+        hasher = hashlib.sha256()
+        with default_storage.open(name, 'rb') as fh:
+            for chunk in iter(lambda: fh.read(CHUNK_SIZE), b''):
+                hasher.update(chunk)
+        return name, hasher.hexdigest(), None
+    except FileNotFoundError:
+        return name, None, "missing"
+    except OSError as e:
+        return name, None, str(e)
 
 
 class Command(BaseCommand):
-    help = "Backfill checksums for application documents"
+    help = (
+        "Backfill SHA-256 checksums (and content blobs) for application documents "
+        "using a process pool, or re-hash stored files with --verify."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--verify", action="store_true",
+                            help="Re-hash stored files and report mismatches or missing files")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument("--batch-size", type=int, default=500, help="Rows hashed and written per batch")
+        parser.add_argument(
+            "--checkpoint",
+            default=os.path.join(tempfile.gettempdir(), "document_checksums.checkpoint.json"),
+            help="File recording progress so an interrupted run can resume",
+        )
+        parser.add_argument("--restart", action="store_true", help="Ignore any saved checkpoint")
 
     def handle(self, *args, **options):
-        updated = 0
+        self.checkpoint_path = options["checkpoint"]
+        mode = "verify" if options["verify"] else "backfill"
+        position = None if options["restart"] else self.load_checkpoint(mode)
+        if position is not None:
+            self.stdout.write(f"Resuming {mode} after {position!r}")
+
+        # Forked workers must not inherit open DB sockets
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=options["workers"], initializer=django.setup) as pool:
+            if options["verify"]:
+                self.verify(pool, position, options["batch_size"])
+            else:
+                self.backfill(pool, position, options["batch_size"])
+
+    # ── backfill ──────────────────────────────────────────────────────────
+
+    def backfill(self, pool, last_pk, batch_size):
+        pending = (
+            ApplicationDocument.objects
+            .filter(~Q(checksum__regex=SHA256_PATTERN) | Q(blob__isnull=True))
+            .exclude(file='')
+            .order_by('pk')
+        )
+        updated = missing = duplicates = 0
+
+        while True:
+            page = pending
+            if last_pk is not None:
+                page = page.filter(pk__gt=last_pk)
+            rows = list(page.values_list('pk', 'application_id', 'file')[:batch_size])
+            if not rows:
+                break
+
+            digests = {}
+            for name, sha256, error in pool.map(hash_stored_file, {row[2] for row in rows}):
+                if error:
+                    self.stderr.write(f"  {name}: {error}")
+                    missing += 1
+                else:
+                    digests[name] = sha256
+
+            batch_updated, batch_duplicates = self.write_batch(rows, digests)
+            updated += batch_updated
+            duplicates += batch_duplicates
 
-        qs = ApplicationDocument.objects.filter(checksum__isnull=True)
+            last_pk = rows[-1][0]
+            self.save_checkpoint("backfill", last_pk)
+            self.stdout.write(f"… {updated} documents checksummed (through id {last_pk})")
 
-        for doc in qs.iterator():
-            if not doc.file:
+        self.clear_checkpoint("backfill")
+        self.stdout.write(self.style.SUCCESS(
+            f"Backfilled {updated} documents ({missing} unreadable, {duplicates} duplicate uploads skipped)"
+        ))
+
+    def write_batch(self, rows, digests):
+        hashed = [(pk, app_id, digests[name], name) for pk, app_id, name in rows if name in digests]
+        if not hashed:
+            return 0, 0
+
+        # (application, checksum) is unique: a second copy of the same file on
+        # one application can't take the checksum, so leave it for review.
+        taken = set(
+            ApplicationDocument.objects
+            .filter(application_id__in={h[1] for h in hashed}, checksum__in={h[2] for h in hashed})
+            .exclude(pk__in=[h[0] for h in hashed])
+            .values_list('application_id', 'checksum')
+        )
+        documents = []
+        for pk, app_id, sha256, name in hashed:
+            if (app_id, sha256) in taken:
+                self.stderr.write(f"  document {pk}: duplicate of another document on application {app_id}")
                 continue
+            taken.add((app_id, sha256))
+            documents.append(ApplicationDocument(pk=pk, checksum=sha256, blob_id=sha256))
 
-            hasher = hashlib.sha256()
-            for chunk in doc.file.chunks():
-                hasher.update(chunk)
+        DocumentBlob.objects.bulk_create(
+            [DocumentBlob(sha256=sha256, file=name) for _, _, sha256, name in hashed],
+            ignore_conflicts=True,
+        )
+        ApplicationDocument.objects.bulk_update(documents, ['checksum', 'blob'])
+        return len(documents), len(hashed) - len(documents)
 
-            doc.checksum = hasher.hexdigest()
-            doc.save(update_fields=["checksum"])
-            updated += 1
+    # ── verify ────────────────────────────────────────────────────────────
 
-        self.stdout.write(
-            self.style.SUCCESS(f"Backfilled {updated} documents")
+    def verify(self, pool, last_name, batch_size):
+        # Walk distinct stored files so shared blobs are hashed once. Pages
+        # are cut on the file name alone, so every checksum recorded for a
+        # file lands in the same page.
+        recorded = (
+            ApplicationDocument.objects
+            .filter(checksum__regex=SHA256_PATTERN)
+            .exclude(file='')
         )
+        stored = recorded.values_list('file', flat=True).order_by('file').distinct()
+        checked = mismatched = missing = 0
+
+        while True:
+            page = stored if last_name is None else stored.filter(file__gt=last_name)
+            names = list(page[:batch_size])
+            if not names:
+                break
+
+            expected = {name: set() for name in names}
+            for name, checksum in recorded.filter(file__in=names).values_list('file', 'checksum').distinct():
+                expected[name].add(checksum)
+
+            for name, sha256, error in pool.map(hash_stored_file, expected):
+                checked += 1
+                if error:
+                    missing += 1
+                    self.stdout.write(self.style.ERROR(f"MISSING   {name} ({error})"))
+                elif expected[name] != {sha256}:
+                    mismatched += 1
+                    self.stdout.write(self.style.ERROR(
+                        f"MISMATCH  {name}: recorded {', '.join(sorted(expected[name]))}, actual {sha256}"
+                    ))
+
+            last_name = names[-1]
+            self.save_checkpoint("verify", last_name)
+
+        self.clear_checkpoint("verify")
+        summary = f"Verified {checked} files: {mismatched} mismatched, {missing} missing"
+        if mismatched or missing:
+            raise CommandError(summary)
+        self.stdout.write(self.style.SUCCESS(summary))
+
+    # ── checkpoints ───────────────────────────────────────────────────────
+
+    def load_checkpoint(self, mode):
+        try:
+            with open(self.checkpoint_path) as fh:
+                return json.load(fh).get(mode)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def save_checkpoint(self, mode, position):
+        state = {}
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path) as fh:
+                state = json.load(fh)
+        state[mode] = position
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w") as fh:
+            json.dump(state, fh)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def clear_checkpoint(self, mode):
+        try:
+            with open(self.checkpoint_path) as fh:
+                state = json.load(fh)
+        except (FileNotFoundError, ValueError):
+            state = {}
+        state.pop(mode, None)
+        if any(position is not None for position in state.values()):
+            self.save_checkpoint(mode, None)
+        elif os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
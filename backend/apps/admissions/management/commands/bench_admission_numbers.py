@@ -0,0 +1,110 @@
+# apps/admissions/management/commands/bench_admission_numbers.py
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from apps.admissions.models import AdmissionNumberSequence, allocate_admission_numbers
+from apps.school.models import School
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer the admission number allocator with parallel enrollments across "
+        "several throwaway schools, then check every school got a gap-free, "
+        "duplicate-free run of numbers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--schools", type=int, default=20)
+        parser.add_argument("--workers", type=int, default=32, help="Parallel DB connections")
+        parser.add_argument("--enrollments", type=int, default=5000, help="Total allocations to perform")
+        parser.add_argument("--batch", type=int, default=1, help="Numbers per allocation (bulk enroll block size)")
+        parser.add_argument(
+            "--hold-ms", type=float, default=0,
+            help="Simulated enrollment work done while the sequence row is locked",
+        )
+        parser.add_argument("--keep", action="store_true", help="Keep the benchmark schools afterwards")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            self.stdout.write(self.style.WARNING(
+                f"Running on {connection.vendor}; numbers are only meaningful on PostgreSQL."
+            ))
+
+        run_id = uuid.uuid4().hex[:8]
+        schools = [
+            School.objects.create(name=f"bench-admissions-{run_id}-{i}", admission_seq_padding=6)
+            for i in range(options["schools"])
+        ]
+        batch = options["batch"]
+        hold = options["hold_ms"] / 1000
+        jobs = [schools[i % len(schools)] for i in range(options["enrollments"])]
+
+        def enroll(school):
+            started = time.perf_counter()
+            with transaction.atomic():
+                numbers = allocate_admission_numbers(school, batch)
+                if hold:
+                    time.sleep(hold)
+            return school.pk, numbers, time.perf_counter() - started
+
+        def worker(worker_jobs):
+            # One connection per worker for its whole run, like a web process
+            try:
+                return [enroll(school) for school in worker_jobs]
+            finally:
+                connection.close()
+
+        workers = options["workers"]
+        self.stdout.write(
+            f"Allocating {len(jobs)} x {batch} numbers over {len(schools)} schools "
+            f"with {workers} workers..."
+        )
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = [
+                result
+                for chunk in pool.map(worker, [jobs[i::workers] for i in range(workers)])
+                for result in chunk
+            ]
+        elapsed = time.perf_counter() - started
+
+        try:
+            self.verify(schools, results, batch)
+        finally:
+            if not options["keep"]:
+                School.objects.filter(pk__in=[s.pk for s in schools]).delete()
+
+        latencies = sorted(r[2] * 1000 for r in results)
+        total = len(jobs) * batch
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} numbers in {elapsed:.2f}s ({total / elapsed:,.0f}/s, "
+            f"{len(jobs) / elapsed:,.0f} allocations/s)"
+        ))
+        self.stdout.write(
+            f"latency ms: p50={statistics.median(latencies):.2f} "
+            f"p95={latencies[int(len(latencies) * 0.95) - 1]:.2f} max={latencies[-1]:.2f}"
+        )
+
+    def verify(self, schools, results, batch):
+        issued = {school.pk: [] for school in schools}
+        for school_id, numbers, _ in results:
+            issued[school_id].extend(numbers)
+
+        sequences = dict(
+            AdmissionNumberSequence.objects.filter(school__in=schools).values_list("school_id", "last_value")
+        )
+        for school in schools:
+            numbers = issued[school.pk]
+            seqs = sorted(int(n.rsplit("-", 1)[1]) for n in numbers)
+            if len(set(numbers)) != len(numbers):
+                raise CommandError(f"{school.name}: duplicate admission numbers issued")
+            if seqs != list(range(1, len(seqs) + 1)):
+                raise CommandError(f"{school.name}: gaps in issued admission numbers")
+            if sequences.get(school.pk, 0) != len(seqs):
+                raise CommandError(f"{school.name}: sequence row out of step with issued numbers")
+        self.stdout.write(self.style.SUCCESS("Verified: every school has a gap-free, unique run"))
@@ -0,0 +1,28 @@
+# apps/admissions/management/commands/process_submissions.py
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.admissions.pipeline import drain
+
+
+class Command(BaseCommand):
+    help = (
+        "Work the accept-fast submission queue: hash, dedupe and attach staged "
+        "uploads. Run as many copies as needed; jobs are claimed with SKIP LOCKED."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Drain the queue and exit")
+        parser.add_argument("--poll", type=float, default=2.0, help="Seconds to sleep when idle")
+
+    def handle(self, *args, **options):
+        while True:
+            processed = drain()
+            if processed:
+                self.stdout.write(f"Processed {processed} submission(s)")
+            if options["once"]:
+                break
+            close_old_connections()
+            time.sleep(options["poll"])
@@ -0,0 +1,82 @@
+# apps/admissions/management/commands/rebuild_admission_funnel.py
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count
+from django.db.models.functions import ExtractYear
+
+from apps.admissions.models import Application, AdmissionFunnelCounter
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the admissions funnel counters from the applications table "
+        "and report any buckets that had drifted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--school", help="Only rebuild this school (UUID)")
+        parser.add_argument("--dry-run", action="store_true", help="Report drift without writing")
+
+    def handle(self, *args, **options):
+        applications = Application.objects.all()
+        counters = AdmissionFunnelCounter.objects.all()
+        if options["school"]:
+            applications = applications.filter(school_id=options["school"])
+            counters = counters.filter(school_id=options["school"])
+
+        with transaction.atomic():
+            if connection.vendor == "postgresql":
+                # Hold off application writes so the recount and the swap agree
+                table = connection.ops.quote_name(Application._meta.db_table)
+                with connection.cursor() as cursor:
+                    cursor.execute(f"LOCK TABLE {table} IN SHARE MODE")
+
+            expected = self.recount(applications)
+            current = {
+                (c.school_id, c.intake_year, c.dimension, c.value): c.count
+                for c in counters
+            }
+
+            drifted = {
+                bucket for bucket in expected.keys() | current.keys()
+                if expected.get(bucket, 0) != current.get(bucket, 0)
+            }
+            for school_id, year, dimension, value in sorted(drifted, key=str):
+                bucket = (school_id, year, dimension, value)
+                self.stdout.write(
+                    f"  {school_id} {year} {dimension}={value or '∅'}: "
+                    f"{current.get(bucket, 0)} -> {expected.get(bucket, 0)}"
+                )
+
+            if not options["dry_run"]:
+                counters.delete()
+                AdmissionFunnelCounter.objects.bulk_create(
+                    [
+                        AdmissionFunnelCounter(
+                            school_id=school_id, intake_year=year, dimension=dimension, value=value, count=count
+                        )
+                        for (school_id, year, dimension, value), count in expected.items()
+                    ],
+                    batch_size=1000,
+                )
+
+        verb = "would be corrected" if options["dry_run"] else "corrected"
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(expected)} funnel buckets recounted, {len(drifted)} {verb}"
+        ))
+
+    def recount(self, applications):
+        """One GROUP BY per dimension over the applications table."""
+        applications = applications.annotate(year=ExtractYear('created_at')).order_by()
+        expected = {}
+        for dimension, field in [
+            (AdmissionFunnelCounter.Dimension.STATUS, 'status'),
+            (AdmissionFunnelCounter.Dimension.CLASS_APPLIED, 'class_applied_id'),
+            (AdmissionFunnelCounter.Dimension.PLACEMENT_TYPE, 'placement_type'),
+            (AdmissionFunnelCounter.Dimension.REGION, 'region'),
+        ]:
+            rows = applications.values_list('school_id', 'year', field).annotate(n=Count('pk'))
+            for school_id, year, value, n in rows:
+                key = (school_id, year, str(dimension), "" if value is None else str(value))
+                expected[key] = n
+        return expected
@@ -0,0 +1,31 @@
+# apps/admissions/management/commands/send_admission_emails.py
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.admissions.outbox import BATCH_SIZE, Outbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver queued admissions emails (resume links, acknowledgements, "
+        "interview invitations, offers) in batches over one SMTP connection. "
+        "Run as many copies as needed; batches are claimed with SKIP LOCKED."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Drain the outbox and exit")
+        parser.add_argument("--batch", type=int, default=BATCH_SIZE, help="Emails claimed per batch")
+        parser.add_argument("--poll", type=float, default=5.0, help="Seconds to sleep when idle")
+
+    def handle(self, *args, **options):
+        outbox = Outbox(batch_size=options["batch"])
+        while True:
+            sent, failed = outbox.drain()
+            if sent or failed:
+                self.stdout.write(f"Sent {sent} email(s), {failed} failed or deferred")
+            if options["once"]:
+                break
+            close_old_connections()
+            time.sleep(options["poll"])
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:33
+
+import re
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+SEQ_PATTERN = re.compile(r'(?:^|-)(\d{4})-(\d+)$')
+
+
+def seed_sequences(apps, schema_editor):
+    """Start each (school, year) counter after the highest number already issued."""
+    Application = apps.get_model('admissions', 'Application')
+    Student = apps.get_model('students', 'Student')
+    AdmissionNumberSequence = apps.get_model('admissions', 'AdmissionNumberSequence')
+
+    highest = {}
+    for model in (Application, Student):
+        rows = model.objects.exclude(admission_number__isnull=True).values_list('school_id', 'admission_number')
+        for school_id, number in rows.iterator():
+            match = SEQ_PATTERN.search(number or '')
+            if not match:
+                continue
+            key = (school_id, int(match.group(1)))
+            highest[key] = max(highest.get(key, 0), int(match.group(2)))
+
+    AdmissionNumberSequence.objects.bulk_create([
+        AdmissionNumberSequence(school_id=school_id, year=year, last_value=last_value)
+        for (school_id, year), last_value in highest.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0005_gradelevel_education_level_gradelevel_pathway'),
+        ('admissions', '0015_alter_application_status'),
+        ('school', '0006_alter_school_academic_year_end_month_and_more'),
+        ('students', '0004_alter_student_admission_number'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdmissionNumberSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveIntegerField()),
+                ('last_value', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='application',
+            name='admission_number',
+            field=models.CharField(blank=True, max_length=50, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='application',
+            constraint=models.UniqueConstraint(condition=models.Q(('admission_number__isnull', False)), fields=('school', 'admission_number'), name='application_unique_admission_number_per_school'),
+        ),
+        migrations.AddField(
+            model_name='admissionnumbersequence',
+            name='school',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='admission_sequences', to='school.school'),
+        ),
+        migrations.AddConstraint(
+            model_name='admissionnumbersequence',
+            constraint=models.UniqueConstraint(fields=('school', 'year'), name='admission_sequence_unique_school_year'),
+        ),
+        migrations.RunPython(seed_sequences, migrations.RunPython.noop),
+    ]
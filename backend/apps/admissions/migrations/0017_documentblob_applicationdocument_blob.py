@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:36
+
+import apps.admissions.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def link_existing_documents(apps, schema_editor):
+    """
+    Register one blob per distinct checksum already on file, pointing at the
+    first stored copy, so new uploads dedupe against historical documents.
+    """
+    ApplicationDocument = apps.get_model('admissions', 'ApplicationDocument')
+    DocumentBlob = apps.get_model('admissions', 'DocumentBlob')
+
+    first_files = {}
+    # Legacy rows carry placeholder checksums ('temp'); only real digests count.
+    rows = (
+        ApplicationDocument.objects.filter(checksum__regex=r'^[0-9a-f]{64}$')
+        .order_by('uploaded_at')
+        .values_list('checksum', 'file')
+    )
+    for checksum, name in rows.iterator():
+        if name:
+            first_files.setdefault(checksum, name)
+
+    DocumentBlob.objects.bulk_create(
+        [DocumentBlob(sha256=checksum, file=name) for checksum, name in first_files.items()],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+    ApplicationDocument.objects.filter(checksum__in=DocumentBlob.objects.values('sha256')).update(
+        blob_id=models.F('checksum')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admissions', '0016_admissionnumbersequence_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentBlob',
+            fields=[
+                ('sha256', models.CharField(editable=False, max_length=64, primary_key=True, serialize=False)),
+                ('file', models.FileField(max_length=255, upload_to=apps.admissions.models.blob_upload_to)),
+                ('size', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='applicationdocument',
+            name='file',
+            field=models.FileField(max_length=255, upload_to='admission_documents/'),
+        ),
+        migrations.AddField(
+            model_name='applicationdocument',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='documents', to='admissions.documentblob'),
+        ),
+        migrations.RunPython(link_existing_documents, migrations.RunPython.noop),
+    ]
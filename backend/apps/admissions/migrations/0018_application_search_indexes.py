@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:39
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admissions', '0017_documentblob_applicationdocument_blob'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['school', '-submitted_at', '-id'], name='application_school_submitted'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('first_name'), name='gin_trgm_ops'), name='application_first_name_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('last_name'), name='gin_trgm_ops'), name='application_last_name_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('admission_number'), name='gin_trgm_ops'), name='application_adm_no_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('primary_guardian_name'), name='gin_trgm_ops'), name='application_guardian_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('primary_guardian_phone'), name='gin_trgm_ops'), name='application_guardian_ph_trgm'),
+        ),
+    ]
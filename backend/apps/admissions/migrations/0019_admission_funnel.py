@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:45
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Coalesce, ExtractYear
+
+
+def backfill_created_at(apps, schema_editor):
+    # Best available evidence of when existing applications came in
+    Application = apps.get_model('admissions', 'Application')
+    Application.objects.filter(updated_at__isnull=False).update(
+        created_at=Coalesce('submitted_at', 'updated_at')
+    )
+
+
+def seed_funnel(apps, schema_editor):
+    Application = apps.get_model('admissions', 'Application')
+    AdmissionFunnelCounter = apps.get_model('admissions', 'AdmissionFunnelCounter')
+
+    applications = Application.objects.annotate(year=ExtractYear('created_at')).order_by()
+    counters = []
+    for dimension, field in [
+        ('status', 'status'),
+        ('class_applied', 'class_applied_id'),
+        ('placement_type', 'placement_type'),
+        ('region', 'region'),
+    ]:
+        for school_id, year, value, n in applications.values_list('school_id', 'year', field).annotate(n=Count('pk')):
+            counters.append(AdmissionFunnelCounter(
+                school_id=school_id, intake_year=year, dimension=dimension,
+                value="" if value is None else str(value), count=n,
+            ))
+    AdmissionFunnelCounter.objects.bulk_create(counters, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admissions', '0018_application_search_indexes'),
+        ('school', '0006_alter_school_academic_year_end_month_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='application',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.CreateModel(
+            name='AdmissionFunnelCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('intake_year', models.PositiveIntegerField()),
+                ('dimension', models.CharField(choices=[('status', 'Status'), ('class_applied', 'Class Applied'), ('placement_type', 'Placement Type'), ('region', 'Region')], max_length=20)),
+                ('value', models.CharField(blank=True, max_length=100)),
+                ('count', models.IntegerField(default=0)),
+                ('school', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='admission_funnel', to='school.school')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('school', 'intake_year', 'dimension', 'value'), name='admission_funnel_unique_bucket')],
+            },
+        ),
+        migrations.RunPython(backfill_created_at, migrations.RunPython.noop),
+        migrations.RunPython(seed_funnel, migrations.RunPython.noop),
+    ]
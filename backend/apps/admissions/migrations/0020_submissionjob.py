@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:47
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admissions', '0019_admission_funnel'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubmissionJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('state', models.CharField(choices=[('QUEUED', 'Queued'), ('PROCESSING', 'Processing'), ('DONE', 'Done'), ('FAILED', 'Failed')], default='QUEUED', max_length=20)),
+                ('staged_files', models.JSONField(blank=True, default=list)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('application', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='submission_jobs', to='admissions.application')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['state', 'available_at'], name='submission_job_queue')],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:57
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admissions', '0020_submissionjob'),
+        ('school', '0006_alter_school_academic_year_end_month_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboundEmail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('RESUME_DRAFT', 'Resume Draft Link'), ('APPLICATION_RECEIVED', 'Application Received'), ('INTERVIEW_INVITATION', 'Interview Invitation'), ('OFFER', 'Offer Letter')], max_length=30)),
+                ('to_email', models.EmailField(max_length=254)),
+                ('context', models.JSONField(blank=True, default=dict)),
+                ('state', models.CharField(choices=[('QUEUED', 'Queued'), ('SENDING', 'Sending'), ('SENT', 'Sent'), ('FAILED', 'Failed')], default='QUEUED', max_length=20)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('application', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='emails', to='admissions.application')),
+                ('school', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='outbound_emails', to='school.school')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['state', 'available_at'], name='outbound_email_queue')],
+            },
+        ),
+    ]
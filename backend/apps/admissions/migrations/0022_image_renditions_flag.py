@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admissions', '0021_outboundemail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='application',
+            name='photo_rendered',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+    ]
@@ -1,12 +1,16 @@
 # apps/admissions/models.py
+import os
 import uuid
-from django.db import models
+from django.db import models, connection, transaction
 from django.conf import settings
 from django.utils import timezone
 from django.core.exceptions import ValidationError
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db.models.functions import Upper
 import hashlib
 from apps.academics.models import GradeLevel
-from apps.students.models import Student
+from apps.students.guardians import resolve_guardians
+from apps.students.models import Student, StudentGuardian
 from apps.school.models import School
 
 
@@ -30,7 +34,7 @@ class Application(models.Model):
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     school = models.ForeignKey(School, on_delete=models.CASCADE, related_name='admission_applications')
-    admission_number = models.CharField(max_length=50, unique=True, null=True, blank=True)
+    admission_number = models.CharField(max_length=50, null=True, blank=True)
 
     # Personal
     first_name = models.CharField(max_length=50)
@@ -109,6 +113,7 @@ class Application(models.Model):
 
     # Documents / Media
     photo = models.ImageField(upload_to='admission_photos/', null=True, blank=True)
+    photo_rendered = models.BooleanField(default=False, editable=False)  # thumb/medium built (core.images)
 
     # Misc
     religion = models.CharField(max_length=50, blank=True)
@@ -132,51 +137,111 @@ class Application(models.Model):
         blank=True,
         related_name='created_applications'
     )
+    created_at = models.DateTimeField(default=timezone.now, editable=False)  # decides the intake
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Columns the admissions funnel counts on (see AdmissionFunnelCounter)
+    FUNNEL_FIELDS = ('school_id', 'created_at', 'status', 'class_applied_id', 'placement_type', 'region')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what this row counted as, so save() can move it between buckets
+        if not instance.get_deferred_fields().intersection(cls.FUNNEL_FIELDS):
+            instance._funnel_state = instance.funnel_state()
+        return instance
+
+    @property
+    def intake_year(self):
+        return timezone.localtime(self.created_at).year
+
+    def funnel_state(self):
+        return (self.school_id, self.intake_year, self.status,
+                self.class_applied_id, self.placement_type, self.region)
+
     def save(self, *args, **kwargs):
         
         if self.status == self.Status.SUBMITTED and not self.submitted_at:
             self.submitted_at = timezone.now()
 
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            if self._state.adding:
+                previous = None
+            elif hasattr(self, '_funnel_state'):
+                previous = self._funnel_state
+            else:
+                row = Application.objects.filter(pk=self.pk).values_list(*self.FUNNEL_FIELDS).first()
+                previous = Application(**dict(zip(self.FUNNEL_FIELDS, row))).funnel_state() if row else None
+
+            super().save(*args, **kwargs)
+
+            current = self.funnel_state()
+            AdmissionFunnelCounter.apply_changes([(previous, current)])
+            self._funnel_state = current
 
+    @transaction.atomic
     def enroll_as_student(self, created_by_user):
-        if not self.admission_number:
-             self.admission_number = generate_unique_admission_number(self.school)
         if self.status not in [self.Status.ACCEPTED, self.Status.ENROLLED]:
             raise ValidationError("Only ACCEPTED or ENROLLED applications can be enrolled")
 
         if self.student:
             raise ValidationError("Already enrolled")
 
+        # Allocated inside the enrollment transaction so a failed enrollment
+        # hands the number back instead of leaving a gap.
+        if not self.admission_number:
+            self.admission_number = generate_unique_admission_number(self.school)
+
+        student = self.build_student(created_by_user)
+        student.save()
+
+        # Reuse the school's existing record of this parent (matched by phone)
+        guardian = resolve_guardians(self.school, [self]).get(self.id)
+        if guardian is not None:
+            StudentGuardian.objects.get_or_create(
+                student=student, guardian=guardian,
+                defaults={'is_primary': True, 'has_pickup_permission': True},
+            )
+
+        self.student = student
+        self.status = self.Status.ENROLLED
+        self.save()
+
+        return student
+
+    def build_student(self, created_by_user):
+        """
+        Unsaved Student mirroring this application. Shared by single and bulk
+        enrollment so both copy exactly the same fields.
+        """
         # Determine if primary/elementary level (no exam fields needed)
         is_primary_level = (
             self.class_applied and
             self.class_applied.education_level in ['PRE_PRIMARY', 'ELEMENTARY']
         )
 
-        student = Student.objects.create(
+        return Student(
             school=self.school,
             first_name=self.first_name,
             middle_name=self.middle_name,
             last_name=self.last_name,
-            gender=self.gender,
+            gender=(self.gender or "").upper(),
             date_of_birth=self.date_of_birth,
             nationality=self.nationality,
-            region=self.region,                  # generalized
-            district=self.district,
+            county=self.region,                  # generalized
+            sub_county=self.district,
             religion=self.religion,
             current_class=self.class_applied,
             admission_date=timezone.now().date(),
             admission_number=self.admission_number,
             created_by=created_by_user,
-            learner_id=self.learner_id,
+            upi_number=self.learner_id or None,
             photo=self.photo,
+            photo_rendered=self.photo_rendered,  # same file, same renditions
 
             # Only copy exam fields if NOT primary level
-            entry_exam_id=self.entry_exam_id if not is_primary_level else "",
-            entry_exam_year=self.entry_exam_year if not is_primary_level else None,
+            kcpe_index=self.entry_exam_id if not is_primary_level else "",
+            kcpe_year=self.entry_exam_year if not is_primary_level else None,
 
             # Health & emergency
             blood_group=self.blood_group,
@@ -188,23 +253,61 @@ class Application(models.Model):
             emergency_relation=self.emergency_relationship or self.primary_guardian_relationship,
         )
 
-        self.student = student
-        self.status = self.Status.ENROLLED
-        self.save()
-
-        return student
-
     def __str__(self):
         return f"{self.first_name} {self.last_name} - {self.admission_number or 'Draft'}"
 
     class Meta:
         ordering = ['-submitted_at', 'last_name']
+        indexes = [
+            # Keyset pagination for the dashboard list: (-submitted_at, -id) per school
+            models.Index(fields=['school', '-submitted_at', '-id'], name='application_school_submitted'),
+            # pg_trgm indexes serving icontains/istartswith search (UPPER(col) LIKE ...)
+            GinIndex(OpClass(Upper('first_name'), name='gin_trgm_ops'), name='application_first_name_trgm'),
+            GinIndex(OpClass(Upper('last_name'), name='gin_trgm_ops'), name='application_last_name_trgm'),
+            GinIndex(OpClass(Upper('admission_number'), name='gin_trgm_ops'), name='application_adm_no_trgm'),
+            GinIndex(OpClass(Upper('primary_guardian_name'), name='gin_trgm_ops'), name='application_guardian_trgm'),
+            GinIndex(OpClass(Upper('primary_guardian_phone'), name='gin_trgm_ops'), name='application_guardian_ph_trgm'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['school', 'admission_number'],
+                condition=models.Q(admission_number__isnull=False),
+                name="application_unique_admission_number_per_school"
+            ),
+        ]
+
+
 
+def blob_upload_to(instance, filename):
+    # Content-addressed layout: admission_documents/sha256/ab/cd/abcd….pdf
+    ext = os.path.splitext(filename)[1].lower()
+    return f"admission_documents/sha256/{instance.sha256[:2]}/{instance.sha256[2:4]}/{instance.sha256}{ext}"
+
+
+class DocumentBlob(models.Model):
+    """
+    Stored file content keyed by its SHA-256. Identical uploads (e.g. the same
+    birth certificate on two siblings' applications) share one blob on disk.
+    """
+    sha256 = models.CharField(max_length=64, primary_key=True, editable=False)
+    file = models.FileField(upload_to=blob_upload_to, max_length=255)
+    size = models.PositiveBigIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.sha256
 
 
 class ApplicationDocument(models.Model):
     application = models.ForeignKey(Application, on_delete=models.CASCADE, related_name='documents')
-    file = models.FileField(upload_to='admission_documents/')
+    blob = models.ForeignKey(
+        DocumentBlob,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='documents'
+    )
+    file = models.FileField(upload_to='admission_documents/', max_length=255)
     description = models.CharField(max_length=255, blank=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
@@ -235,4 +338,247 @@ class AdmissionFeePayment(models.Model):
     receipt_number = models.CharField(max_length=50, blank=True)
 
     def __str__(self):
-        return f"Payment {self.receipt_number or ''} - {self.amount}"
\ No newline at end of file
+        return f"Payment {self.receipt_number or ''} - {self.amount}"
+
+
+# ── Admission number allocation ─────────────────────────────────────────────
+
+class AdmissionNumberSequence(models.Model):
+    """
+    Per-school, per-year counter backing admission number allocation.
+
+    One row per (school, year). Allocation bumps `last_value` with a single
+    upsert, so concurrent enrollments for the same school queue on that row
+    lock instead of racing on MAX() scans or retrying on IntegrityError.
+    """
+    school = models.ForeignKey(School, on_delete=models.CASCADE, related_name='admission_sequences')
+    year = models.PositiveIntegerField()
+    last_value = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['school', 'year'],
+                name="admission_sequence_unique_school_year"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.school} {self.year}: {self.last_value}"
+
+    @classmethod
+    def reserve(cls, school, year, count=1):
+        """
+        Reserve `count` consecutive values and return the first one.
+
+        Must run inside the caller's transaction: the row stays locked until
+        commit, and a rollback releases the block, which keeps numbers gap-free.
+        """
+        if count < 1:
+            raise ValueError("count must be at least 1")
+
+        table = connection.ops.quote_name(cls._meta.db_table)
+        school_id = cls._meta.get_field('school').get_db_prep_value(school.pk, connection)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} (school_id, year, last_value) VALUES (%s, %s, %s) "
+                f"ON CONFLICT (school_id, year) "
+                f"DO UPDATE SET last_value = {table}.last_value + EXCLUDED.last_value "
+                f"RETURNING last_value",
+                [school_id, year, count],
+            )
+            last_value = cursor.fetchone()[0]
+        return last_value - count + 1
+
+
+def format_admission_number(school, year, seq):
+    """Render a sequence value using the school's admission number settings."""
+    number = f"{year}-{seq:0{school.admission_seq_padding}d}"
+    if school.admission_number_format == 'PREFIX_YEAR_SEQ' and school.admission_prefix:
+        return f"{school.admission_prefix.rstrip('-')}-{number}"
+    return number
+
+
+def allocate_admission_numbers(school, count, year=None):
+    """
+    Allocate a block of `count` consecutive admission numbers for `school`.
+    Call inside transaction.atomic() so an aborted enrollment frees the block.
+    """
+    if school.admission_number_format == 'CUSTOM':
+        raise ValidationError(
+            "This school uses manually entered admission numbers; "
+            "set admission_number before enrolling."
+        )
+    year = year or timezone.localdate().year
+    first = AdmissionNumberSequence.reserve(school, year, count)
+    return [format_admission_number(school, year, seq) for seq in range(first, first + count)]
+
+
+def generate_unique_admission_number(school, year=None):
+    return allocate_admission_numbers(school, 1, year=year)[0]
+
+
+# ── Admissions funnel ───────────────────────────────────────────────────────
+
+class AdmissionFunnelCounter(models.Model):
+    """
+    Application counts per school and intake, broken down by status, class
+    applied for, placement type and region.
+
+    Kept in step with Application inside the same transaction as each write
+    (see Application.save and signals.py), so the dashboard funnel is a read
+    of a few dozen rows instead of a scan of the applications table.
+    `rebuild_admission_funnel` recomputes it from scratch if it ever drifts.
+    """
+    class Dimension(models.TextChoices):
+        STATUS = "status", "Status"
+        CLASS_APPLIED = "class_applied", "Class Applied"
+        PLACEMENT_TYPE = "placement_type", "Placement Type"
+        REGION = "region", "Region"
+
+    school = models.ForeignKey(School, on_delete=models.CASCADE, related_name='admission_funnel')
+    intake_year = models.PositiveIntegerField()
+    dimension = models.CharField(max_length=20, choices=Dimension.choices)
+    value = models.CharField(max_length=100, blank=True)  # '' for unset class / region
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['school', 'intake_year', 'dimension', 'value'],
+                name="admission_funnel_unique_bucket"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.school} {self.intake_year} {self.dimension}={self.value}: {self.count}"
+
+    @classmethod
+    def buckets(cls, state):
+        """(school_id, intake_year, dimension, value) keys an Application.funnel_state() counts in."""
+        school_id, year, *values = state
+        return [
+            (school_id, year, dimension, "" if value is None else str(value))
+            for dimension, value in zip(cls.Dimension.values, values)
+        ]
+
+    @classmethod
+    def apply_changes(cls, changes):
+        """
+        Apply (old_state, new_state) pairs from Application.funnel_state();
+        None on the old side is a create, None on the new side a delete.
+        Must run inside the transaction that wrote the applications.
+        """
+        deltas = {}
+        for old, new in changes:
+            for bucket in cls.buckets(old) if old else ():
+                deltas[bucket] = deltas.get(bucket, 0) - 1
+            for bucket in cls.buckets(new) if new else ():
+                deltas[bucket] = deltas.get(bucket, 0) + 1
+
+        # One statement, rows sorted, so concurrent writers take the bucket row
+        # locks in a single order whatever mix of +/- they carry. A decrement
+        # only touches an existing bucket: a school being deleted may already
+        # have lost its counters, and they mustn't come back.
+        deltas = sorted((bucket, delta) for bucket, delta in deltas.items() if delta)
+        if not deltas:
+            return
+        table = connection.ops.quote_name(cls._meta.db_table)
+        school_field = cls._meta.get_field('school')
+        school_type = school_field.target_field.rel_db_type(connection)
+        rows = ", ".join(
+            [f"(%s::{school_type}, %s::integer, %s::varchar, %s::varchar, %s::integer, %s::integer)"] * len(deltas)
+        )
+        params = []
+        for position, ((school_id, year, dimension, value), delta) in enumerate(deltas):
+            params += [school_field.get_db_prep_value(school_id, connection), year, dimension, value, delta, position]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} (school_id, intake_year, dimension, value, count) "
+                f"SELECT d.school_id, d.intake_year, d.dimension, d.value, d.count "
+                f"FROM (VALUES {rows}) AS d (school_id, intake_year, dimension, value, count, position) "
+                f"WHERE d.count > 0 OR EXISTS ("
+                f"    SELECT 1 FROM {table} c WHERE c.school_id = d.school_id AND c.intake_year = d.intake_year "
+                f"    AND c.dimension = d.dimension AND c.value = d.value"
+                f") ORDER BY d.position "
+                f"ON CONFLICT (school_id, intake_year, dimension, value) "
+                f"DO UPDATE SET count = {table}.count + EXCLUDED.count",
+                params,
+            )
+
+
+# ── Accept-fast public submissions ──────────────────────────────────────────
+
+class SubmissionJob(models.Model):
+    """
+    Deferred work for a public submission accepted with `Prefer: respond-async`:
+    the uploads are staged as-is and hashed, deduplicated, thumbnailed and
+    acknowledged by a worker (see pipeline.py). The table is the queue.
+    """
+    class State(models.TextChoices):
+        QUEUED = "QUEUED", "Queued"
+        PROCESSING = "PROCESSING", "Processing"
+        DONE = "DONE", "Done"
+        FAILED = "FAILED", "Failed"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    application = models.ForeignKey(Application, on_delete=models.CASCADE, related_name='submission_jobs')
+    state = models.CharField(max_length=20, choices=State.choices, default=State.QUEUED)
+    staged_files = models.JSONField(default=list, blank=True)  # [{"path", "name", "sha256"}]
+    attempts = models.PositiveSmallIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)  # pushed back between retries
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['state', 'available_at'], name='submission_job_queue'),
+        ]
+
+    def __str__(self):
+        return f"Submission {self.id} ({self.state})"
+
+
+# ── Outbound email ──────────────────────────────────────────────────────────
+
+class OutboundEmail(models.Model):
+    """
+    Outbox row for an admissions email. Requests only insert rows; delivery,
+    batching and retries are handled by apps/admissions/outbox.py.
+    """
+    class Kind(models.TextChoices):
+        RESUME_DRAFT = "RESUME_DRAFT", "Resume Draft Link"
+        APPLICATION_RECEIVED = "APPLICATION_RECEIVED", "Application Received"
+        INTERVIEW_INVITATION = "INTERVIEW_INVITATION", "Interview Invitation"
+        OFFER = "OFFER", "Offer Letter"
+
+    class State(models.TextChoices):
+        QUEUED = "QUEUED", "Queued"
+        SENDING = "SENDING", "Sending"
+        SENT = "SENT", "Sent"
+        FAILED = "FAILED", "Failed"
+
+    school = models.ForeignKey(School, on_delete=models.CASCADE, related_name='outbound_emails')
+    application = models.ForeignKey(
+        Application, on_delete=models.SET_NULL, null=True, blank=True, related_name='emails'
+    )
+    kind = models.CharField(max_length=30, choices=Kind.choices)
+    to_email = models.EmailField()
+    context = models.JSONField(default=dict, blank=True)  # template variables, captured when queued
+    state = models.CharField(max_length=20, choices=State.choices, default=State.QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['state', 'available_at'], name='outbound_email_queue'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} to {self.to_email} ({self.state})"
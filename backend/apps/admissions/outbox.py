@@ -0,0 +1,252 @@
+# apps/admissions/outbox.py
+"""
+Admissions email outbox.
+
+API code calls queue_email()/queue_emails(), which only insert OutboundEmail
+rows. A worker claims them in batches (SKIP LOCKED), renders each kind's
+template from a compiled-once cache, sends the whole batch over one SMTP
+connection kept open across batches, and reschedules failures with
+exponential backoff. Run `manage.py send_admission_emails`, or leave
+ADMISSIONS_EMAIL_WORKER = "thread" to deliver from the web process.
+"""
+import logging
+import re
+import smtplib
+from datetime import timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import F, Min, Q
+from django.template.loader import get_template
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+from apps.core.workers import QueueWorker
+from .models import Application, OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 100
+MAX_ATTEMPTS = 6
+RETRY_BASE = timedelta(seconds=30)   # 30s, 1m, 2m, 4m, 8m
+STALE_AFTER = timedelta(minutes=15)  # SENDING this long means the worker died
+
+TEMPLATES = {
+    OutboundEmail.Kind.RESUME_DRAFT: "admissions/emails/resume_draft.html",
+    OutboundEmail.Kind.APPLICATION_RECEIVED: "admissions/emails/application_received.html",
+    OutboundEmail.Kind.INTERVIEW_INVITATION: "admissions/emails/interview_invitation.html",
+    OutboundEmail.Kind.OFFER: "admissions/emails/offer.html",
+}
+
+SUBJECTS = {
+    OutboundEmail.Kind.RESUME_DRAFT: "Continue your application to {school_name}",
+    OutboundEmail.Kind.APPLICATION_RECEIVED: "Application received – {school_name}",
+    OutboundEmail.Kind.INTERVIEW_INVITATION: "Interview invitation – {school_name}",
+    OutboundEmail.Kind.OFFER: "Offer of admission – {school_name}",
+}
+
+# Status an application moves into → the email that announces it
+STATUS_EMAILS = {
+    Application.Status.DRAFT: OutboundEmail.Kind.RESUME_DRAFT,
+    Application.Status.SUBMITTED: OutboundEmail.Kind.APPLICATION_RECEIVED,
+    Application.Status.TEST_SCHEDULED: OutboundEmail.Kind.INTERVIEW_INVITATION,
+    Application.Status.OFFERED: OutboundEmail.Kind.OFFER,
+}
+
+# One sender thread: one SMTP connection, reused across batches
+worker = QueueWorker(
+    'admissions-email', drain=lambda: Outbox().drain(), next_due=lambda: next_due_at(),
+    mode_setting='ADMISSIONS_EMAIL_WORKER',
+)
+
+
+# ── Queueing ────────────────────────────────────────────────────────────────
+
+def email_context(application):
+    """Template variables, captured at queue time so delivery needs no joins."""
+    school = application.school
+    domain = (school.email or "").rpartition("@")[2]
+    frontend = getattr(settings, 'FRONTEND_URL', '').rstrip('/')
+    return {
+        "school_name": school.name,
+        "school_domain": domain or None,
+        "applicant_name": f"{application.first_name} {application.last_name}".strip(),
+        "guardian_name": application.primary_guardian_name or "Parent/Guardian",
+        "reference": str(application.id),
+        "class_applied": application.class_applied.name if application.class_applied_id else "",
+        "resume_url": f"{frontend}/apply/{school.slug}?draft={application.id}",
+        "expiry_days": getattr(settings, 'ADMISSIONS_DRAFT_EXPIRY_DAYS', 30),
+        "interview_date": str(application.interview_date or ""),
+        "interview_time": str(application.interview_time or "")[:5],
+        "interview_venue": application.interview_venue or "",
+        "interview_contact_person": application.interview_contact_person or "",
+        "interview_instructions": application.interview_instructions or "",
+    }
+
+
+def build_email(kind, application):
+    if not application.primary_guardian_email:
+        return None
+    return OutboundEmail(
+        school_id=application.school_id,
+        application=application,
+        kind=kind,
+        to_email=application.primary_guardian_email,
+        context=email_context(application),
+    )
+
+
+def queue_email(kind, application):
+    email = build_email(kind, application)
+    if email is None:
+        return None
+    email.save()
+    transaction.on_commit(kick_worker)
+    return email
+
+
+def queue_emails(kind, applications):
+    """Queue one email per application in a single insert; returns how many."""
+    emails = [e for e in (build_email(kind, app) for app in applications) if e]
+    OutboundEmail.objects.bulk_create(emails, batch_size=1000)
+    if emails:
+        transaction.on_commit(kick_worker)
+    return len(emails)
+
+
+def queue_status_email(application, previous_status=None):
+    """Queue the email for the status `application` just moved into, if it has one."""
+    if application.status == previous_status:
+        return None
+    kind = STATUS_EMAILS.get(application.status)
+    return queue_email(kind, application) if kind else None
+
+
+def kick_worker():
+    worker.kick()
+
+
+def next_due_at():
+    """When the next email now waiting (a retry in backoff, or a stuck claim) is due."""
+    waiting = OutboundEmail.objects.filter(state=OutboundEmail.State.QUEUED).aggregate(at=Min('available_at'))['at']
+    stuck = OutboundEmail.objects.filter(state=OutboundEmail.State.SENDING).aggregate(at=Min('claimed_at'))['at']
+    times = [at for at in (waiting, stuck and stuck + STALE_AFTER) if at is not None]
+    return min(times) if times else None
+
+
+# ── Delivery ────────────────────────────────────────────────────────────────
+
+@lru_cache(maxsize=None)
+def compiled_template(kind):
+    # Compiled once per process, whatever the loader configuration
+    return get_template(TEMPLATES[kind])
+
+
+HEAD_RE = re.compile(r"<head.*?</head>", re.S | re.I)
+LINK_RE = re.compile(r'<a\s[^>]*href="([^"]+)"[^>]*>(.*?)</a>', re.S | re.I)
+BLANK_LINES_RE = re.compile(r"\n\s*\n+")
+
+
+def html_to_text(html):
+    """Plain-text alternative: no <head>/CSS, links spelled out."""
+    text = LINK_RE.sub(r"\2: \1", HEAD_RE.sub("", html))
+    text = strip_tags(text)
+    lines = (line.strip() for line in text.splitlines())
+    return BLANK_LINES_RE.sub("\n\n", "\n".join(lines)).strip()
+
+
+def render(email):
+    html = compiled_template(email.kind).render(email.context)
+    subject = SUBJECTS[email.kind].format(**email.context)
+    return subject, html_to_text(html), html
+
+
+class Outbox:
+    def __init__(self, batch_size=BATCH_SIZE):
+        self.batch_size = batch_size
+        self.connection = None
+
+    def claim(self):
+        now = timezone.now()
+        with transaction.atomic():
+            ids = list(
+                OutboundEmail.objects
+                .select_for_update(skip_locked=True)
+                .filter(
+                    Q(state=OutboundEmail.State.QUEUED, available_at__lte=now)
+                    | Q(state=OutboundEmail.State.SENDING, claimed_at__lt=now - STALE_AFTER)
+                )
+                .order_by('available_at')
+                .values_list('id', flat=True)[:self.batch_size]
+            )
+            OutboundEmail.objects.filter(id__in=ids).update(
+                state=OutboundEmail.State.SENDING, claimed_at=now, attempts=F('attempts') + 1
+            )
+        return list(OutboundEmail.objects.filter(id__in=ids).order_by('id'))
+
+    def drain(self):
+        """Send until nothing is due; returns (sent, failed) counts."""
+        sent = failed = 0
+        try:
+            while True:
+                batch = self.claim()
+                if not batch:
+                    break
+                batch_sent, batch_failed = self.send_batch(batch)
+                sent += batch_sent
+                failed += batch_failed
+        finally:
+            self.close()
+        return sent, failed
+
+    def open(self):
+        if self.connection is None:
+            self.connection = get_connection(fail_silently=False)
+            self.connection.open()
+        return self.connection
+
+    def close(self):
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except Exception:
+                pass
+            self.connection = None
+
+    def send_batch(self, batch):
+        now = timezone.now()
+        sent = failed = 0
+        for email in batch:
+            try:
+                subject, text, html = render(email)
+                message = EmailMultiAlternatives(
+                    subject, text, None, [email.to_email], connection=self.open()
+                )
+                message.attach_alternative(html, "text/html")
+                message.send()
+            except Exception as e:
+                failed += 1
+                self.reschedule(email, e, now)
+                if isinstance(e, (smtplib.SMTPServerDisconnected, OSError)):
+                    self.close()  # reconnect for the rest of the batch
+            else:
+                sent += 1
+                email.state = OutboundEmail.State.SENT
+                email.sent_at = timezone.now()
+                email.last_error = ""
+
+        OutboundEmail.objects.bulk_update(batch, ['state', 'sent_at', 'available_at', 'last_error'])
+        return sent, failed
+
+    def reschedule(self, email, error, now):
+        email.last_error = f"{type(error).__name__}: {error}"
+        permanent = isinstance(error, smtplib.SMTPRecipientsRefused)
+        if permanent or email.attempts >= MAX_ATTEMPTS:
+            email.state = OutboundEmail.State.FAILED
+        else:
+            email.state = OutboundEmail.State.QUEUED
+            email.available_at = now + RETRY_BASE * 2 ** (email.attempts - 1)
+        logger.warning("Email %s to %s failed (attempt %s): %s",
+                       email.pk, email.to_email, email.attempts, email.last_error)
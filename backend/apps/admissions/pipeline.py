@@ -0,0 +1,146 @@
+# apps/admissions/pipeline.py
+"""
+Accept-fast processing for public submissions.
+
+The request thread only saves the application, stages the raw uploads and
+queues a SubmissionJob; hashing and dedup happen in a worker, the photo is
+thumbnailed by the rendition pool in apps.core.images and the guardian's
+acknowledgement goes through the email outbox (apps.admissions.outbox). The queue is the database table, so no broker is needed:
+run `manage.py process_submissions`, or leave
+ADMISSIONS_SUBMISSION_WORKER = "thread" to drain it from the web process.
+"""
+import logging
+import os
+from datetime import timedelta
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Min, Q
+from django.utils import timezone
+
+from apps.core.workers import QueueWorker
+from .models import Application, SubmissionJob
+from .uploads import attach_documents
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+STALE_AFTER = timedelta(minutes=10)  # PROCESSING this long means the worker died
+
+worker = QueueWorker(
+    'admissions-submissions', drain=lambda: drain(), next_due=lambda: next_runnable_at(),
+    mode_setting='ADMISSIONS_SUBMISSION_WORKER', threads=2, threads_setting='ADMISSIONS_SUBMISSION_THREADS',
+)
+
+
+# ── Request side ────────────────────────────────────────────────────────────
+
+def enqueue_submission(application, files):
+    """
+    Stage `files` untouched and queue the rest of the ingestion. Call inside
+    the transaction that saved `application`; the worker starts on commit.
+    """
+    job = SubmissionJob(application=application)
+    for index, file in enumerate(files):
+        name = os.path.basename(file.name)
+        path = default_storage.save(f"admission_staging/{job.id}/{index}-{name}", file)
+        job.staged_files.append({
+            "path": path,
+            "name": name,
+            "sha256": getattr(file, 'sha256', None),  # free if the upload handler hashed it
+        })
+    job.save()
+    transaction.on_commit(kick_worker)
+    return job
+
+
+def kick_worker():
+    worker.kick()
+
+
+def next_runnable_at():
+    """When the next job now waiting (a retry in backoff, or a stuck claim) can be run."""
+    waiting = SubmissionJob.objects.filter(state=SubmissionJob.State.QUEUED).aggregate(at=Min('available_at'))['at']
+    stuck = SubmissionJob.objects.filter(state=SubmissionJob.State.PROCESSING).aggregate(at=Min('started_at'))['at']
+    times = [at for at in (waiting, stuck and stuck + STALE_AFTER) if at is not None]
+    return min(times) if times else None
+
+
+# ── Worker side ─────────────────────────────────────────────────────────────
+
+def claim_job():
+    """Take the oldest runnable job; SKIP LOCKED lets any number of workers share the queue."""
+    now = timezone.now()
+    with transaction.atomic():
+        job = (
+            SubmissionJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(
+                Q(state=SubmissionJob.State.QUEUED, available_at__lte=now)
+                | Q(state=SubmissionJob.State.PROCESSING, started_at__lt=now - STALE_AFTER)
+            )
+            .order_by('available_at')
+            .first()
+        )
+        if job is None:
+            return None
+        job.state = SubmissionJob.State.PROCESSING
+        job.attempts += 1
+        job.started_at = now
+        job.save(update_fields=['state', 'attempts', 'started_at'])
+    return job
+
+
+def drain(limit=None):
+    """Process jobs until the queue is empty (or `limit` jobs); returns how many ran."""
+    processed = 0
+    while limit is None or processed < limit:
+        job = claim_job()
+        if job is None:
+            break
+        run_job(job)
+        processed += 1
+    return processed
+
+
+def run_job(job):
+    try:
+        process_job(job)
+    except Exception as e:
+        logger.exception("Submission job %s failed", job.id)
+        job.last_error = f"{type(e).__name__}: {e}"
+        if job.attempts >= MAX_ATTEMPTS:
+            job.state = SubmissionJob.State.FAILED
+            job.finished_at = timezone.now()
+        else:
+            job.state = SubmissionJob.State.QUEUED
+            job.available_at = timezone.now() + timedelta(seconds=2 ** job.attempts)
+        job.save(update_fields=['state', 'last_error', 'available_at', 'finished_at'])
+    else:
+        job.state = SubmissionJob.State.DONE
+        job.finished_at = timezone.now()
+        job.save(update_fields=['state', 'last_error', 'finished_at'])
+
+
+def process_job(job):
+    """Every step is idempotent, so a retried or reclaimed job just picks up again."""
+    application = Application.objects.select_related('school').get(pk=job.application_id)
+
+    files = []
+    for staged in job.staged_files:
+        if not default_storage.exists(staged["path"]):
+            continue  # already ingested by an earlier attempt
+        file = File(default_storage.open(staged["path"], 'rb'), name=staged["name"])
+        if staged.get("sha256"):
+            file.sha256 = staged["sha256"]
+        files.append(file)
+    try:
+        attach_documents(application, files)
+    finally:
+        for file in files:
+            file.close()
+    for staged in job.staged_files:
+        default_storage.delete(staged["path"])
+
+    job.last_error = ""
@@ -1,10 +1,11 @@
 # admissions/serializers.py
-import hashlib
 from rest_framework import serializers
 from .models import Application, ApplicationDocument, AdmissionFeePayment
+from .uploads import attach_documents
 from apps.academics.serializers import GradeLevelSerializer
 from apps.school.models import School
 from apps.school.serializers import SchoolSerializer
+from apps.core.serializers import ImageRenditionField
 
 
 class ApplicationDocumentSerializer(serializers.ModelSerializer):
@@ -28,7 +29,7 @@ class ApplicationSerializer(serializers.ModelSerializer):
     class_applied = GradeLevelSerializer(read_only=True)
     documents = ApplicationDocumentSerializer(many=True, read_only=True)
     fee_payments = AdmissionFeePaymentSerializer(many=True, read_only=True)
-    photo = serializers.ImageField(read_only=True)
+    photo = ImageRenditionField(rendition='medium', read_only=True)
     school = SchoolSerializer(read_only=True)
 
     # Computed read-only fields
@@ -79,6 +80,7 @@ class ApplicationSerializer(serializers.ModelSerializer):
             'fee_payments',
             'student',
             'created_by',
+            'created_at',
             'updated_at',
             'interview_date',
             'interview_time',
@@ -177,32 +179,12 @@ class ApplicationCreateUpdateSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError(f"Required for submission: {', '.join(missing)}")
         return data
 
-    def compute_checksum(self, file): 
-        hasher = hashlib.sha256()
-        for chunk in file.chunks():
-            hasher.update(chunk)
-        return hasher.hexdigest()
-
     def create(self, validated_data):
         documents_files = validated_data.pop('documents', [])
         application = Application.objects.create(**validated_data)
-
-        for file in documents_files:
-            # Change this line
-            checksum = self.compute_checksum(file) 
-
-            ApplicationDocument.objects.get_or_create(
-                application=application,
-                checksum=checksum,
-                defaults={
-                    "file": file,
-                    "description": file.name
-                }
-            )
+        attach_documents(application, documents_files)
         return application
 
-
-
     def update(self, instance, validated_data):
         documents_files = validated_data.pop('documents', [])
 
@@ -210,28 +192,40 @@ class ApplicationCreateUpdateSerializer(serializers.ModelSerializer):
             setattr(instance, attr, value)
 
         instance.save()
+        attach_documents(instance, documents_files)
+        return instance
 
-        for file in documents_files:
-            # Change this line
-            checksum = self.compute_checksum(file)
 
-            ApplicationDocument.objects.get_or_create(
-                application=instance,
-                checksum=checksum,
-                defaults={
-                    "file": file,
-                    "description": file.name
-                }
-            )
+class BulkEnrollSerializer(serializers.Serializer):
+    application_ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        allow_empty=False,
+        max_length=1000,
+    )
+
+
+class BulkOfferSerializer(serializers.Serializer):
+    # Applications that can still be made an offer; others are reported as skipped
+    OFFERABLE = [
+        Application.Status.SUBMITTED,
+        Application.Status.UNDER_REVIEW,
+        Application.Status.TEST_SCHEDULED,
+        Application.Status.INTERVIEW_COMPLETED,
+    ]
+
+    application_ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        allow_empty=False,
+        max_length=5000,
+    )
 
-        return instance
 
 # Optional: Minimal serializer for list view (faster)
 class ApplicationListSerializer(serializers.ModelSerializer):
     full_name = serializers.SerializerMethodField()
     status_display = serializers.CharField(source='get_status_display')
     class_applied = GradeLevelSerializer(read_only=True)
-    photo = serializers.ImageField(read_only=True)
+    photo = ImageRenditionField(read_only=True)
 
     class Meta:
         model = Application
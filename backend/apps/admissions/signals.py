@@ -0,0 +1,18 @@
+# apps/admissions/signals.py
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from apps.core.audit import register_audit
+from apps.core.images import register_renditions
+from .models import Application, AdmissionFunnelCounter
+
+register_renditions(Application, 'photo')
+register_audit(Application, exclude=('photo_rendered',))
+
+
+@receiver(post_delete, sender=Application)
+def remove_from_funnel(sender, instance, **kwargs):
+    # Sent inside the deletion's transaction, for queryset deletes too. The row
+    # counted where it was loaded, not where unsaved in-memory edits would put it
+    state = getattr(instance, '_funnel_state', None) or instance.funnel_state()
+    AdmissionFunnelCounter.apply_changes([(state, None)])
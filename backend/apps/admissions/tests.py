@@ -1,3 +1,107 @@
-from django.test import TestCase
+import smtplib
+import threading
+from datetime import timedelta
 
-# Create your tests here.
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from apps.school.models import School
+from .models import Application, OutboundEmail
+from .outbox import Outbox, queue_emails
+
+
+class FlakyBackend(EmailBackend):
+    """locmem backend whose first `failures` sends drop the connection."""
+    failures = 0
+
+    def send_messages(self, messages):
+        if FlakyBackend.failures:
+            FlakyBackend.failures -= 1
+            raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+        return super().send_messages(messages)
+
+
+def make_applications(school, count):
+    return [
+        Application.objects.create(
+            school=school, first_name=f"Learner{n}", last_name="Test",
+            primary_guardian_name=f"Guardian {n}", primary_guardian_email=f"guardian{n}@example.com",
+        )
+        for n in range(count)
+    ]
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    ADMISSIONS_EMAIL_WORKER='command',
+)
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.school = School.objects.create(name="Outbox Academy")
+
+    def test_batch_is_sent_and_marked(self):
+        applications = make_applications(self.school, 5)
+        self.assertEqual(queue_emails(OutboundEmail.Kind.OFFER, applications), 5)
+
+        self.assertEqual(Outbox(batch_size=2).drain(), (5, 0))
+
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), sorted(a.primary_guardian_email for a in applications))
+        self.assertTrue(all("Outbox Academy" in m.subject for m in mail.outbox))
+        self.assertTrue(all(m.alternatives for m in mail.outbox))  # HTML part alongside the text
+        self.assertFalse(OutboundEmail.objects.exclude(state=OutboundEmail.State.SENT).exists())
+
+    @override_settings(EMAIL_BACKEND='apps.admissions.tests.FlakyBackend')
+    def test_failed_send_is_retried_after_backoff(self):
+        FlakyBackend.failures = 1
+        queue_emails(OutboundEmail.Kind.OFFER, make_applications(self.school, 1))
+
+        self.assertEqual(Outbox().drain(), (0, 1))
+        email = OutboundEmail.objects.get()
+        self.assertEqual(email.state, OutboundEmail.State.QUEUED)
+        self.assertGreater(email.available_at, timezone.now())
+        self.assertIn("SMTPServerDisconnected", email.last_error)
+
+        # Not due yet: nothing is sent
+        self.assertEqual(Outbox().drain(), (0, 0))
+
+        OutboundEmail.objects.update(available_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(Outbox().drain(), (1, 0))
+        email.refresh_from_db()
+        self.assertEqual((email.state, email.attempts, email.last_error), (OutboundEmail.State.SENT, 2, ""))
+        self.assertEqual(len(mail.outbox), 1)
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    ADMISSIONS_EMAIL_WORKER='command',
+)
+class ConcurrentOutboxTests(TransactionTestCase):
+    def test_concurrent_drains_send_each_email_once(self):
+        school = School.objects.create(name="Outbox Academy")
+        queue_emails(OutboundEmail.Kind.OFFER, make_applications(school, 40))
+        mail.outbox = []
+
+        start = threading.Barrier(2)
+        results = []
+
+        def drain():
+            try:
+                start.wait()
+                results.append(Outbox(batch_size=5).drain())
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=drain) for _ in range(2)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(sum(sent for sent, _ in results), 40)
+        recipients = [m.to[0] for m in mail.outbox]
+        self.assertEqual(len(recipients), 40)
+        self.assertEqual(len(set(recipients)), 40)
+        self.assertEqual(OutboundEmail.objects.filter(state=OutboundEmail.State.SENT, attempts=1).count(), 40)
@@ -0,0 +1,137 @@
+# apps/admissions/uploads.py
+import hashlib
+
+from django.core.files.uploadhandler import MemoryFileUploadHandler, TemporaryFileUploadHandler
+from django.db import transaction
+
+from .models import ApplicationDocument, DocumentBlob
+
+
+class HashingUploadMixin:
+    """
+    Computes each upload's SHA-256 while the multipart body is being parsed,
+    so ingestion never re-reads a file just to hash it.
+    """
+
+    def new_file(self, *args, **kwargs):
+        self.hasher = hashlib.sha256()
+        return super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        passthrough = super().receive_data_chunk(raw_data, start)
+        if passthrough is None:  # this handler kept the chunk
+            self.hasher.update(raw_data)
+        return passthrough
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.sha256 = self.hasher.hexdigest()
+        return file
+
+
+class HashingMemoryFileUploadHandler(HashingUploadMixin, MemoryFileUploadHandler):
+    pass
+
+
+class HashingTemporaryFileUploadHandler(HashingUploadMixin, TemporaryFileUploadHandler):
+    pass
+
+
+class HashedUploadsMixin:
+    """
+    ViewSet mixin: parse multipart requests with the hashing upload handlers.
+    """
+
+    def initialize_request(self, request, *args, **kwargs):
+        request.upload_handlers = [
+            HashingMemoryFileUploadHandler(request),
+            HashingTemporaryFileUploadHandler(request),
+        ]
+        return super().initialize_request(request, *args, **kwargs)
+
+
+def file_sha256(file):
+    """Digest recorded by the hashing upload handlers, or computed on demand."""
+    digest = getattr(file, 'sha256', None)
+    if digest:
+        return digest
+    hasher = hashlib.sha256()
+    for chunk in file.chunks():
+        hasher.update(chunk)
+    file.seek(0)
+    file.sha256 = hasher.hexdigest()
+    return file.sha256
+
+
+def stored_sha256(storage, name):
+    hasher = hashlib.sha256()
+    with storage.open(name, 'rb') as stored:
+        for chunk in stored.chunks():
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def store_blob(file):
+    """
+    Return the DocumentBlob holding `file`'s content. Bytes are written to
+    storage only when no identical blob exists yet; temporary uploads are
+    moved into place rather than copied.
+
+    The blob row is claimed before the bytes are written, in the same
+    transaction: a concurrent upload of the same content waits on the row
+    and then reuses it, instead of writing a second, suffixed copy.
+    """
+    sha256 = file_sha256(file)
+    blob = DocumentBlob.objects.filter(sha256=sha256).first()
+    if blob:
+        return blob
+
+    with transaction.atomic():
+        blob = DocumentBlob(sha256=sha256, size=file.size)
+        name = blob.file.field.generate_filename(blob, file.name)
+        blob, created = DocumentBlob.objects.get_or_create(
+            sha256=sha256, defaults={"file": name, "size": file.size},
+        )
+        if not created:
+            return blob
+
+        storage = blob.file.storage
+        if storage.exists(name):
+            # Left behind by an aborted upload: reuse it only if it's complete
+            if stored_sha256(storage, name) == sha256:
+                return blob
+            storage.delete(name)
+        stored = storage.save(name, file, max_length=blob.file.field.max_length)
+        if stored != name:
+            blob.file.name = stored
+            blob.save(update_fields=['file'])
+    return blob
+
+
+def attach_documents(application, files):
+    """
+    Link uploaded files to `application`. Content the application already has
+    is dropped before anything is written to storage.
+    """
+    if not files:
+        return []
+
+    seen = set(application.documents.values_list('checksum', flat=True))
+    documents = []
+    for file in files:
+        sha256 = file_sha256(file)
+        if sha256 in seen:
+            continue
+        seen.add(sha256)
+
+        blob = store_blob(file)
+        documents.append(ApplicationDocument(
+            application=application,
+            blob=blob,
+            file=blob.file.name,
+            checksum=sha256,
+            description=file.name,
+        ))
+
+    return ApplicationDocument.objects.bulk_create(documents, ignore_conflicts=True)
@@ -30,6 +30,11 @@ public_urls = [
         'patch': 'update_draft',
     }), name='public-application-update'),
 
+    # Poll an accept-fast (Prefer: respond-async) submission
+    path('submissions/<uuid:pk>/', PublicApplicationSubmissionViewSet.as_view({
+        'get': 'submission_status',
+    }), name='public-submission-status'),
+
     # NEW: allow public users to GET their draft to resume editing
     path(
         'applications/<uuid:pk>/',
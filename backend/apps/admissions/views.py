@@ -1,45 +1,77 @@
 # admissions/views.py
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
-from .models import Application, ApplicationDocument, AdmissionFeePayment
+from django.db import transaction, IntegrityError
+from django.db.models import Exists, OuterRef, Sum
+from django.utils import timezone
+from django.urls import reverse
+from django.utils.http import parse_etags, quote_etag
+from .models import (
+    Application,
+    ApplicationDocument,
+    AdmissionFeePayment,
+    AdmissionFunnelCounter,
+    OutboundEmail,
+    SubmissionJob,
+    allocate_admission_numbers,
+)
 from .serializers import (
     ApplicationSerializer,
     ApplicationCreateUpdateSerializer,
     ApplicationDocumentSerializer,
     AdmissionFeePaymentSerializer,
-    ApplicationListSerializer
+    ApplicationListSerializer,
+    BulkEnrollSerializer,
+    BulkOfferSerializer,
 )
+from .uploads import HashedUploadsMixin
+from .pipeline import enqueue_submission
+from .outbox import queue_email, queue_emails, queue_status_email
 from apps.students.models import Student
+from apps.students.guardians import link_primary_guardians, resolve_guardians
+from apps.students.search import index_students
 from apps.school.models import School
+from apps.core.audit import record_saves
+from apps.core.filters import TrigramSearchFilter
+from apps.core.pagination import KeysetPagination
+
+
+class ApplicationCursorPagination(KeysetPagination):
+    order_field = 'submitted_at'
 
 
-class ApplicationViewSet(viewsets.ModelViewSet):
+class ApplicationViewSet(HashedUploadsMixin, viewsets.ModelViewSet):
     """
     Main ViewSet for school staff/admins - full CRUD + enrollment
     """
     queryset = Application.objects.prefetch_related('documents', 'fee_payments').select_related('class_applied', 'school')
+    # List rows only need the class (and what GradeLevelSerializer nests), not documents/payments
+    list_queryset = Application.objects.select_related(
+        'class_applied__school', 'class_applied__curriculum__school'
+    )
     serializer_class = ApplicationSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, TrigramSearchFilter]
     filterset_fields = ['status', 'school', 'class_applied', 'gender', 'nationality']
     search_fields = ['first_name', 'last_name', 'admission_number', 'primary_guardian_name', 'primary_guardian_phone']
-    ordering_fields = ['submitted_at', 'admission_number', 'status', 'created_at']
-    ordering = ['-submitted_at']
+    # Fixed keyset order (-submitted_at, -id); ?cursor= walks it in constant time
+    pagination_class = ApplicationCursorPagination
 
     def get_queryset(self):
         if not self.request.user.is_authenticated:
             return Application.objects.none()
 
         user = self.request.user
+        queryset = self.list_queryset if self.action == 'list' else self.queryset
 
         # Superusers see all (bypass filters)
         if user.is_superuser:
             print(f"[DEBUG] Superuser {user.email} accessing all applications")
-            return self.queryset
+            return queryset
 
     # Prefer X-School-ID header (sent by frontend for current school)
         school_id_str = self.request.headers.get('X-School-ID')
@@ -47,11 +79,14 @@ class ApplicationViewSet(viewsets.ModelViewSet):
             try:
                 from uuid import UUID
                 school_id = UUID(school_id_str)
-                print(f"[DEBUG] Using X-School-ID: {school_id} for user {user.email}")
-                return self.queryset.filter(school_id=school_id)
             except ValueError:
                 print(f"[DEBUG] Invalid X-School-ID: {school_id_str}")
-                pass
+            else:
+                # The header only narrows the user's own schools, never widens them
+                if not user.schools.filter(id=school_id).exists():
+                    raise PermissionDenied("You are not associated with this school.")
+                print(f"[DEBUG] Using X-School-ID: {school_id} for user {user.email}")
+                return queryset.filter(school_id=school_id)
 
     # Fallback: user's linked school(s) - but only if no header
         school = getattr(user, "school", None)
@@ -65,14 +100,14 @@ class ApplicationViewSet(viewsets.ModelViewSet):
                 
                 if schools:
                     print(f"[DEBUG] Fallback to user schools: {[s.id for s in schools]}")
-                    return self.queryset.filter(school__in=schools)
+                    return queryset.filter(school__in=schools)
 
         if not school:
             print(f"[DEBUG] User {user.email} has no linked school")
             return Application.objects.none()
 
         print(f"[DEBUG] Using user.school: {school.id}")
-        return self.queryset.filter(school=school)
+        return queryset.filter(school=school)
     
     def get_serializer_class(self):
         if self.action in ['list']:
@@ -87,6 +122,14 @@ class ApplicationViewSet(viewsets.ModelViewSet):
         if application.status == Application.Status.ENROLLED:
             application.enroll_as_student(self.request.user)
 
+    def perform_update(self, serializer):
+        previous_status = serializer.instance.status
+        with transaction.atomic():
+            application = serializer.save()
+            # Interview invitations and offers go out through the outbox after commit
+            if application.status in (Application.Status.TEST_SCHEDULED, Application.Status.OFFERED):
+                queue_status_email(application, previous_status)
+
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -148,8 +191,220 @@ class ApplicationViewSet(viewsets.ModelViewSet):
             return Response({"detail": f"Enrollment failed: {str(e)}"}, 
                             status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @action(detail=False, methods=['post'], url_path='bulk-enroll')
+    def bulk_enroll(self, request):
+        """
+        Enroll a whole intake cohort in one transaction.
+        Body: {"application_ids": [...]}. Ineligible applications are reported
+        per item and skipped; they don't block the rest of the batch.
+        """
+        serializer = BulkEnrollSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        requested = list(dict.fromkeys(serializer.validated_data['application_ids']))
+
+        results = {}
+        try:
+            with transaction.atomic():
+                applications = {
+                    app.id: app
+                    for app in self.get_queryset()
+                    .prefetch_related(None)
+                    .select_for_update(of=('self',))
+                    .filter(id__in=requested)
+                }
+
+                # One aggregate query instead of fee_payments.exists() per application
+                paid = {
+                    row['application_id']
+                    for row in AdmissionFeePayment.objects
+                    .filter(application_id__in=applications.keys())
+                    .values('application_id')
+                    .annotate(total=Sum('amount'))
+                    if row['total'] and row['total'] > 0
+                }
+
+                by_school = {}
+                for app_id in requested:
+                    app = applications.get(app_id)
+                    error = self._bulk_enroll_error(app, paid)
+                    if error:
+                        results[app_id] = {"id": str(app_id), "result": "error", **error}
+                    else:
+                        by_school.setdefault(app.school_id, []).append(app)
+
+                eligible = []
+                for apps in by_school.values():
+                    unnumbered = [app for app in apps if not app.admission_number]
+                    if unnumbered:
+                        numbers = allocate_admission_numbers(apps[0].school, len(unnumbered))
+                        for app, number in zip(unnumbered, numbers):
+                            app.admission_number = number
+                    eligible.extend(apps)
+
+                # Primary guardians matched by phone (or created) per school; a new
+                # student simply joins its guardian's household
+                guardians = {}
+                for apps in by_school.values():
+                    guardians.update(resolve_guardians(apps[0].school, apps))
+                students = [app.build_student(request.user) for app in eligible]
+                for app, student in zip(eligible, students):
+                    if app.id in guardians:
+                        student.household_id = guardians[app.id].household_id
+                Student.objects.bulk_create(students, batch_size=500)
+                link_primary_guardians(
+                    (student, guardians[app.id]) for app, student in zip(eligible, students) if app.id in guardians
+                )
+                index_students([student.id for student in students])
+
+                now = timezone.now()
+                for app, student in zip(eligible, students):
+                    app.student = student
+                    app.status = Application.Status.ENROLLED
+                    app.updated_at = now
+                    results[app.id] = {
+                        "id": str(app.id),
+                        "result": "enrolled",
+                        "student_id": str(student.id),
+                        "admission_number": student.admission_number,
+                        "student_name": student.full_name,
+                    }
+                Application.objects.bulk_update(
+                    eligible, ['student', 'status', 'admission_number', 'updated_at'], batch_size=500
+                )
+                # Nor do bulk_create/bulk_update reach the audit log's signals
+                record_saves(students, created=True)
+                record_saves(eligible, update_fields=['student', 'status', 'admission_number'])
+                # bulk_update skips Application.save(), so move the funnel counts here
+                AdmissionFunnelCounter.apply_changes(
+                    [(app._funnel_state, app.funnel_state()) for app in eligible]
+                )
+                for app in eligible:
+                    app._funnel_state = app.funnel_state()
+        except IntegrityError as e:
+            return Response({"detail": f"Bulk enrollment failed, nothing was enrolled: {str(e)}"},
+                            status=status.HTTP_409_CONFLICT)
+
+        report = [results[app_id] for app_id in requested]
+        enrolled = sum(1 for item in report if item["result"] == "enrolled")
+        return Response({
+            "requested": len(report),
+            "enrolled": enrolled,
+            "failed": len(report) - enrolled,
+            "results": report,
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'], url_path='funnel')
+    def funnel(self, request):
+        """
+        Admissions funnel for one intake (default: current year) from the
+        maintained counters: totals per status, class applied, placement type
+        and region, plus how many accepted, paid applications await enrolment.
+        ?intake_year=YYYY picks another intake.
+        """
+        user = request.user
+        school_id = request.headers.get('X-School-ID')
+        if school_id:
+            try:
+                from uuid import UUID
+                school_ids = [UUID(school_id)]
+            except ValueError:
+                return Response({"detail": "Invalid X-School-ID"}, status=status.HTTP_400_BAD_REQUEST)
+            if not user.is_superuser and not user.schools.filter(id__in=school_ids).exists():
+                return Response({"detail": "You are not associated with this school."},
+                                status=status.HTTP_403_FORBIDDEN)
+        else:
+            school_ids = list(user.schools.values_list('id', flat=True))
+
+        try:
+            intake_year = int(request.query_params.get('intake_year') or timezone.localdate().year)
+        except ValueError:
+            return Response({"detail": "intake_year must be a year"}, status=status.HTTP_400_BAD_REQUEST)
+
+        funnel = {dimension: {} for dimension in AdmissionFunnelCounter.Dimension.values}
+        rows = (
+            AdmissionFunnelCounter.objects
+            .filter(school_id__in=school_ids, intake_year=intake_year)
+            .values_list('dimension', 'value')
+            .annotate(total=Sum('count'))
+            .order_by()
+        )
+        for dimension, value, total in rows:
+            if total:
+                funnel[dimension][value] = total
+
+        # Accepted, paid and not yet enrolled, whatever the intake: one count, not a page scan
+        ready_to_enroll = (
+            Application.objects
+            .filter(school_id__in=school_ids, status=Application.Status.ACCEPTED, student__isnull=True)
+            .filter(Exists(AdmissionFeePayment.objects.filter(application=OuterRef('pk'))))
+            .count()
+        )
+
+        return Response({
+            "intake_year": intake_year,
+            "total": sum(funnel[AdmissionFunnelCounter.Dimension.STATUS].values()),
+            "ready_to_enroll": ready_to_enroll,
+            **funnel,
+        })
 
-class PublicApplicationSubmissionViewSet(viewsets.GenericViewSet):
+    @action(detail=False, methods=['post'], url_path='send-offers')
+    def send_offers(self, request):
+        """
+        Mark a batch of applications OFFERED and queue their offer letters.
+        Body: {"application_ids": [...]}. Answers 202 straight away: the letters
+        are rendered and sent by the email outbox, not in this request.
+        """
+        serializer = BulkOfferSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        requested = list(dict.fromkeys(serializer.validated_data['application_ids']))
+
+        with transaction.atomic():
+            applications = list(
+                self.get_queryset()
+                .prefetch_related(None)
+                .select_related('school', 'class_applied')
+                .select_for_update(of=('self',))
+                .filter(id__in=requested, status__in=BulkOfferSerializer.OFFERABLE)
+            )
+            now = timezone.now()
+            for app in applications:
+                app.status = Application.Status.OFFERED
+                app.updated_at = now
+            Application.objects.filter(id__in=[app.id for app in applications]).update(
+                status=Application.Status.OFFERED, updated_at=now
+            )
+            # update() skips Application.save(), so move the funnel counts here
+            AdmissionFunnelCounter.apply_changes(
+                [(app._funnel_state, app.funnel_state()) for app in applications]
+            )
+            queued = queue_emails(OutboundEmail.Kind.OFFER, applications)
+
+        offered = {app.id for app in applications}
+        return Response({
+            "requested": len(requested),
+            "offered": len(offered),
+            "emails_queued": queued,
+            "skipped": [str(app_id) for app_id in requested if app_id not in offered],
+        }, status=status.HTTP_202_ACCEPTED)
+
+    @staticmethod
+    def _bulk_enroll_error(application, paid):
+        if application is None:
+            return {"detail": "Application not found."}
+        if application.status not in [Application.Status.ACCEPTED, Application.Status.ENROLLED]:
+            return {"detail": f"Only ACCEPTED or ENROLLED can be enrolled (status is {application.status})."}
+        if application.student_id:
+            return {"detail": "Already enrolled.", "student_id": str(application.student_id)}
+        if application.id not in paid:
+            return {"detail": "Admission fee payment required before enrollment."}
+        if not application.date_of_birth:
+            return {"detail": "Date of birth is required to create the student record."}
+        if not application.admission_number and application.school.admission_number_format == 'CUSTOM':
+            return {"detail": "This school uses manual admission numbers; set one before enrolling."}
+        return None
+
+
+class PublicApplicationSubmissionViewSet(HashedUploadsMixin, viewsets.GenericViewSet):
     """
     Public endpoint for parents/students to submit applications.
     """
@@ -176,6 +431,19 @@ class PublicApplicationSubmissionViewSet(viewsets.GenericViewSet):
         #    Default to DRAFT if somehow missing
         status_value = serializer.validated_data.get('status', Application.Status.DRAFT)
 
+        # Accept-fast mode: stage the uploads and hand the rest to the worker
+        if 'respond-async' in request.headers.get('Prefer', ''):
+            documents = serializer.validated_data.pop('documents', [])
+            with transaction.atomic():
+                application = serializer.save(school=school, status=status_value, created_by=None)
+                job = enqueue_submission(application, documents)
+                queue_status_email(application)
+            receipt = self._receipt(request, job, application)
+            return Response(receipt, status=status.HTTP_202_ACCEPTED, headers={
+                'Location': receipt['submission']['status_url'],
+                'Preference-Applied': 'respond-async',
+            })
+
         # 4. Save with the real status
         application = serializer.save(
             school=school,
@@ -183,41 +451,165 @@ class PublicApplicationSubmissionViewSet(viewsets.GenericViewSet):
             created_by=None
         )
 
+        # Resume link for a draft, acknowledgement for a submission
+        queue_status_email(application)
+
         # Optional: log what was saved (for debugging)
         print(f"Public submission saved with status: {application.status}")
 
         return Response(ApplicationSerializer(application).data, status=status.HTTP_201_CREATED)
     
-    @action(detail=True, methods=['patch'], url_path='update')
-    def update_draft(self, request, pk=None):
-        # Public update for drafts only
+    @staticmethod
+    def _receipt(request, job, application):
+        return {
+            "id": str(application.id),
+            "status": application.status,
+            "submission": {
+                "id": str(job.id),
+                "state": job.state,
+                "documents_received": len(job.staged_files),
+                "status_url": request.build_absolute_uri(
+                    reverse('public-submission-status', args=[job.id])
+                ),
+            },
+        }
+
+    def submission_status(self, request, pk=None):
+        """Poll an accept-fast submission: QUEUED → PROCESSING → DONE / FAILED."""
         try:
-            # Only allow updating DRAFT status applications
-            application = Application.objects.get(id=pk, status=Application.Status.DRAFT)
-        except Application.DoesNotExist:
-            return Response({"detail": "Draft not found or not editable"}, status=404)
+            job = SubmissionJob.objects.get(id=pk)
+        except SubmissionJob.DoesNotExist:
+            return Response({"detail": "Submission not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        data = {
+            "id": str(job.id),
+            "application": str(job.application_id),
+            "state": job.state,
+            "attempts": job.attempts,
+            "created_at": job.created_at,
+            "finished_at": job.finished_at,
+        }
+        if job.state == SubmissionJob.State.DONE:
+            data["documents"] = job.application.documents.count()
+        if job.state == SubmissionJob.State.FAILED:
+            data["detail"] = "We could not process the uploaded documents. Please contact the school."
+        return Response(data)
+
+    # ── Conditional requests (autosave) ──────────────────────────────────
+    # The draft's ETag is derived from updated_at: autosaves send If-Match
+    # so a stale tab can't overwrite newer edits, and reloads send
+    # If-None-Match to get a 304 instead of the full nested payload.
+
+    @staticmethod
+    def _etag(updated_at):
+        return quote_etag(f"{int(updated_at.timestamp() * 1_000_000):x}")
+
+    @staticmethod
+    def _etag_matches(header, etag):
+        if not header:
+            return False
+        etags = parse_etags(header)
+        # Compare weakly: proxies may have added W/ to our strong tag
+        return '*' in etags or etag.removeprefix('W/') in [e.removeprefix('W/') for e in etags]
+
+    @staticmethod
+    def _changed_fields(instance, validated_data):
+        changed = []
+        for name, value in validated_data.items():
+            if name == 'documents':
+                continue
+            field = instance._meta.get_field(name)
+            if field.is_relation:
+                value = value.pk if value is not None else None
+            if getattr(instance, field.attname) != value:
+                changed.append(name)
+        return changed
 
-        serializer = self.get_serializer(application, data=request.data, partial=True)
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
+    @action(detail=True, methods=['patch'], url_path='update')
+    def update_draft(self, request, pk=None):
+        """
+        Public update for drafts only.
+        Honours If-Match (412 on a stale ETag); ?return=minimal (or
+        Prefer: return=minimal) answers with just the fields that changed.
+        """
+        serializer = None
+        with transaction.atomic():
+            try:
+                # Only allow updating DRAFT status applications
+                application = (
+                    Application.objects.select_for_update()
+                    .get(id=pk, status=Application.Status.DRAFT)
+                )
+            except Application.DoesNotExist:
+                return Response({"detail": "Draft not found or not editable"}, status=404)
+
+            if_match = request.headers.get('If-Match')
+            if if_match and not self._etag_matches(if_match, self._etag(application.updated_at)):
+                return Response(
+                    {"detail": "This draft was changed elsewhere. Reload it before saving again.",
+                     "updated_at": application.updated_at},
+                    status=status.HTTP_412_PRECONDITION_FAILED,
+                    headers={'ETag': self._etag(application.updated_at)},
+                )
+
+            serializer = self.get_serializer(application, data=request.data, partial=True)
+            serializer.is_valid(raise_exception=True)
+            changed = self._changed_fields(application, serializer.validated_data)
+            # An autosave that changes nothing doesn't write (or move the ETag)
+            if changed or serializer.validated_data.get('documents'):
+                serializer.save()
+
+            if application.status == Application.Status.SUBMITTED:
+                queue_status_email(application, Application.Status.DRAFT)
+            elif 'primary_guardian_email' in changed:
+                # New address for the resume link
+                queue_email(OutboundEmail.Kind.RESUME_DRAFT, application)
 
         print(f"Public update - ID: {pk}, Status: {application.status}")
-        return Response(ApplicationSerializer(application).data)
+        headers = {'ETag': self._etag(application.updated_at)}
+
+        minimal = (
+            request.query_params.get('return') == 'minimal'
+            or 'return=minimal' in request.headers.get('Prefer', '')
+        )
+        if minimal:
+            data = {
+                "id": str(application.id),
+                "status": application.status,
+                "updated_at": application.updated_at,
+            }
+            for name in changed:
+                data[name] = serializer.fields[name].to_representation(getattr(application, name))
+            headers['Preference-Applied'] = 'return=minimal'
+            return Response(data, headers=headers)
+
+        return Response(ApplicationSerializer(application).data, headers=headers)
     
     def retrieve(self, request, pk=None):
         """
         Allow public retrieval of a DRAFT application so the user can continue editing.
+        Answers 304 when If-None-Match still matches the draft's ETag.
         """
-        try:
-            # ONLY allow viewing if it is still a draft. 
-            # This prevents people from snooping on submitted/accepted applications.
-            application = Application.objects.get(id=pk, status=Application.Status.DRAFT)
-            serializer = ApplicationSerializer(application)
-            return Response(serializer.data)
-        except Application.DoesNotExist:
+        # ONLY allow viewing if it is still a draft. 
+        # This prevents people from snooping on submitted/accepted applications.
+        drafts = Application.objects.filter(id=pk, status=Application.Status.DRAFT)
+        updated_at = drafts.values_list('updated_at', flat=True).first()
+        if updated_at is None:
             return Response({"detail": "Draft not found"}, status=status.HTTP_404_NOT_FOUND)
 
-# Optional: Separate ViewSets for documents/payments if needed later
+        etag = self._etag(updated_at)
+        if self._etag_matches(request.headers.get('If-None-Match'), etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        application = drafts.select_related('class_applied', 'school').prefetch_related(
+            'documents', 'fee_payments', 'school__modules'
+        ).first()
+        if application is None:
+            return Response({"detail": "Draft not found"}, status=status.HTTP_404_NOT_FOUND)
+        serializer = ApplicationSerializer(application)
+        return Response(serializer.data, headers={'ETag': self._etag(application.updated_at)})
+
+
 class ApplicationDocumentViewSet(viewsets.ModelViewSet):
     queryset = ApplicationDocument.objects.all()
     serializer_class = ApplicationDocumentSerializer
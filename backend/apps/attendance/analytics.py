@@ -0,0 +1,143 @@
+# apps/attendance/analytics.py
+"""
+Term attendance analytics from the attendance bitmaps.
+
+A term report is one query over the learners' bitmap rows for the years
+the term touches: Postgres cuts each row down to the term's days and
+popcounts it (bit_count), and sends back only two bit strings per learner,
+the days absent and the days attended. In Python those become ints whose
+bit 0 is the last day of the term, and the current absence streak (absent
+days since the learner was last in school, skipping days they weren't
+marked, such as weekends) is a few int operations rather than a walk over
+days.
+
+A whole-school report returns totals per grade and only the learners who
+need following up (chronically absent, or on an absence streak); a class
+report lists every learner.
+"""
+from collections import defaultdict
+
+from django.db import connection
+
+from apps.academics.models import GradeLevel
+from apps.students.models import Student
+
+CHRONIC_ABSENCE = 0.10  # absent on at least this share of the days marked
+STREAK_ALERT = 3        # consecutive school days absent, up to today
+
+TERM_SQL = """
+    SELECT b.student_id::text, s.current_class_id,
+           %(end)s - LEAST(%(end)s, make_date(b.year, 12, 31)),
+           bit_count(w.present), bit_count(w.absent), bit_count(w.late),
+           w.absent::text, (w.present | w.late)::text
+    FROM attendance_attendancebitmap b
+    JOIN students_student s ON s.id = b.student_id
+    CROSS JOIN LATERAL (
+        SELECT substring(b.present FROM r.first FOR r.length) AS present,
+               substring(b.absent FROM r.first FOR r.length) AS absent,
+               substring(b.late FROM r.first FOR r.length) AS late
+        FROM (SELECT GREATEST(%(start)s - make_date(b.year, 1, 1), 0) + 1 AS first,
+                     LEAST(%(end)s, make_date(b.year, 12, 31)) - GREATEST(%(start)s, make_date(b.year, 1, 1)) + 1 AS length) r
+    ) w
+    WHERE b.school_id = %(school_id)s AND b.year BETWEEN %(first_year)s AND %(last_year)s
+"""
+
+
+def absence_streak(absent, attended):
+    """School days absent since the learner was last in (bit 0 = the last day)."""
+    since = (attended & -attended).bit_length() - 1 if attended else absent.bit_length()
+    return (absent & ((1 << since) - 1)).bit_count()
+
+
+def term_report(school, start, end, grade_level=None, stream=''):
+    """
+    Presence, absence and lateness between `start` and `end` (inclusive)
+    for `school`, or for one grade level (and stream).
+    """
+    sql, params = TERM_SQL, {
+        'school_id': school.id, 'start': start, 'end': end,
+        'first_year': start.year, 'last_year': end.year,
+    }
+    if grade_level is not None:
+        sql += " AND s.current_class_id = %(grade_level_id)s"
+        params['grade_level_id'] = grade_level.id
+    if stream:
+        sql += " AND s.stream = %(stream)s"
+        params['stream'] = stream
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    # student_id → [grade, present, absent, late, absent days, attended days];
+    # a term crossing new year has two rows per learner
+    learners = {}
+    for student_id, grade_id, shift, present, absent, late, absent_days, attended_days in rows:
+        learner = learners.get(student_id)
+        if learner is None:
+            learner = learners[student_id] = [grade_id, 0, 0, 0, 0, 0]
+        learner[1] += present
+        learner[2] += absent
+        learner[3] += late
+        learner[4] |= int(absent_days or '0', 2) << shift
+        learner[5] |= int(attended_days or '0', 2) << shift
+
+    school_days = 0
+    grades = defaultdict(lambda: [0, 0, 0, 0])  # learners, days marked, days absent, chronically absent
+    flagged = {}
+    for student_id, (grade_id, present, absent, late, absent_days, attended_days) in learners.items():
+        days = present + absent + late
+        if not days:
+            continue
+        school_days |= absent_days | attended_days
+        chronic = absent >= CHRONIC_ABSENCE * days
+        totals = grades[grade_id]
+        totals[0] += 1
+        totals[1] += days
+        totals[2] += absent
+        totals[3] += chronic
+        streak = absence_streak(absent_days, attended_days) if absent else 0
+        if grade_level is not None or chronic or streak >= STREAK_ALERT:
+            flagged[student_id] = {
+                'student': student_id,
+                'days': days,
+                'present': present,
+                'absent': absent,
+                'late': late,
+                'rate': round((days - absent) / days, 4),
+                'absence_streak': streak,
+                'chronically_absent': chronic,
+            }
+
+    names = {
+        str(student_id): (admission_number, f"{first_name} {last_name}")
+        for student_id, admission_number, first_name, last_name in Student.objects
+        .filter(id__in=list(flagged)).values_list('id', 'admission_number', 'first_name', 'last_name')
+    }
+    for student_id, row in flagged.items():
+        row['admission_number'], row['name'] = names[student_id]
+    grade_names = dict(GradeLevel.objects.filter(id__in=[g for g in grades if g]).values_list('id', 'name'))
+
+    marked = sum(totals[1] for totals in grades.values())
+    absent = sum(totals[2] for totals in grades.values())
+    return {
+        'start': start,
+        'end': end,
+        'school_days': school_days.bit_count(),
+        'learners': sum(totals[0] for totals in grades.values()),
+        'rate': round((marked - absent) / marked, 4) if marked else None,
+        'chronically_absent': sum(totals[3] for totals in grades.values()),
+        'grades': sorted(
+            (
+                {
+                    'grade_level': grade_id,
+                    'name': grade_names.get(grade_id, 'No class'),
+                    'learners': learners_in,
+                    'rate': round((days - absences) / days, 4),
+                    'chronically_absent': chronic,
+                }
+                for grade_id, (learners_in, days, absences, chronic) in grades.items()
+            ),
+            key=lambda grade: grade['name'],
+        ),
+        'rows': sorted(flagged.values(), key=lambda row: (row['name'], row['admission_number'])),
+    }
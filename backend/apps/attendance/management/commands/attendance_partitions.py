@@ -0,0 +1,64 @@
+# apps/attendance/management/commands/attendance_partitions.py
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from apps.attendance.partitions import (
+    DEFAULT, archive_name, create_partition, detach_partition, is_partitioned, partition_name, partitions,
+    plan_maintenance,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Create attendance's monthly partitions ahead of time and detach (or drop) old ones. "
+        "Shows the plan unless --apply is given. Run it monthly, e.g. from cron. Detached "
+        "months stay in the learners' attendance bitmaps, but rebuild_attendance_bitmaps "
+        "only sees the months still attached."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ahead", type=int, default=3, help="Months to create past the current one (default 3)")
+        parser.add_argument("--retain", type=int, help="Detach months that ended more than this many months ago")
+        parser.add_argument("--drop", action="store_true", help="Drop detached months instead of keeping them as archive tables")
+        parser.add_argument("--apply", action="store_true", help="Make the changes (default: only show them)")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Attendance partitions need PostgreSQL.")
+        if options["retain"] is not None and options["retain"] < 1:
+            raise CommandError("--retain must be at least 1 month.")
+
+        with connection.cursor() as cursor:
+            if not is_partitioned(cursor):
+                raise CommandError("attendance_attendance isn't partitioned; run the attendance migrations first.")
+            create, detach = plan_maintenance(cursor, timezone.localdate(), options["ahead"], options["retain"])
+            existing = partitions(cursor)
+            cursor.execute(f"SELECT count(*) FROM {DEFAULT}")
+            stray = cursor.fetchone()[0]
+
+            self.stdout.write(
+                f"{len(existing)} monthly partition(s)"
+                + (f", {existing[0][1]:%Y-%m} to {existing[-1][1]:%Y-%m}" if existing else "")
+            )
+            if stray:
+                self.stdout.write(self.style.WARNING(f"{stray} row(s) in {DEFAULT} (dates with no month partition)"))
+            for month in create:
+                self.stdout.write(f"  create {partition_name(month)}")
+            for name, start in detach:
+                self.stdout.write(f"  {'drop' if options['drop'] else 'detach'} {name}"
+                                  + ("" if options["drop"] else f" → {archive_name(start)}"))
+            if not create and not detach:
+                self.stdout.write(self.style.SUCCESS("Partitions are up to date"))
+                return
+            if not options["apply"]:
+                self.stdout.write("Preview only; run again with --apply to make these changes.")
+                return
+
+            for month in create:
+                moved = create_partition(cursor, month)
+                if moved:
+                    self.stdout.write(f"  moved {moved} row(s) from {DEFAULT} into {partition_name(month)}")
+            for name, start in detach:
+                detach_partition(cursor, name, start, drop=options["drop"])
+        self.stdout.write(self.style.SUCCESS(f"Created {len(create)}, {'dropped' if options['drop'] else 'detached'} {len(detach)}"))
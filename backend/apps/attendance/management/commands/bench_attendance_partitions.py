@@ -0,0 +1,149 @@
+# apps/attendance/management/commands/bench_attendance_partitions.py
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.attendance.partitions import PARENT, add_months, month_start
+
+PLAIN = "bench_attendance_plain"
+PARTED = "bench_attendance_parted"
+
+# (label, SQL); {table} is filled in, parameters are drawn per run
+QUERIES = [
+    ("school, last 7 days", "SELECT id, student_id, status FROM {table} "
+     "WHERE school_id = %(school)s AND date > %(last)s - 7 ORDER BY date DESC"),
+    ("list endpoint, newest 50", "SELECT * FROM {table} ORDER BY date DESC LIMIT 50"),
+    ("one day, every school", "SELECT status, count(*) FROM {table} WHERE date = %(day)s GROUP BY status"),
+    ("absences, last 30 days", "SELECT school_id, count(*) FROM {table} "
+     "WHERE date > %(last)s - 30 AND status = 'ABSENT' GROUP BY school_id"),
+    ("learner, last 30 days", "SELECT date, status FROM {table} "
+     "WHERE student_id = %(student)s AND date > %(last)s - 30 ORDER BY date DESC"),
+    ("last month, per learner", "SELECT student_id, count(*) FILTER (WHERE status = 'ABSENT') FROM {table} "
+     "WHERE date >= %(month)s AND date < %(month)s + interval '1 month' GROUP BY student_id"),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare recent-window attendance queries on a plain table and a monthly "
+        "partitioned one, both filled with the same synthetic multi-million-row data "
+        "and carrying the same indexes. Uses throwaway bench_attendance_* tables."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--learners", type=int, default=20000)
+        parser.add_argument("--days", type=int, default=400, help="School days of history (weekdays back from today)")
+        parser.add_argument("--schools", type=int, default=20)
+        parser.add_argument("--repeat", type=int, default=30, help="Runs per query")
+        parser.add_argument("--keep", action="store_true", help="Keep the benchmark tables afterwards")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            self.stdout.write(self.style.WARNING("Partitioning needs PostgreSQL; nothing to compare."))
+            return
+        with connection.cursor() as cursor:
+            try:
+                self.build(cursor, options)
+                self.compare(cursor, options["repeat"])
+            finally:
+                if not options["keep"]:
+                    cursor.execute(f"DROP TABLE IF EXISTS {PLAIN}, {PARTED}, bench_attendance_learners")
+
+    def build(self, cursor, options):
+        last = timezone.localdate()
+        first = last - timedelta(days=options["days"] * 7 // 5 + 7)
+        cursor.execute(f"DROP TABLE IF EXISTS {PLAIN}, {PARTED}, bench_attendance_learners")
+        cursor.execute(
+            "CREATE TABLE bench_attendance_learners AS "
+            "SELECT gen_random_uuid() AS id, s.id AS school_id "
+            "FROM generate_series(1, %s) n "
+            "JOIN (SELECT row_number() OVER () - 1 AS k, gen_random_uuid() AS id FROM generate_series(1, %s)) s "
+            "ON s.k = n %% %s",
+            [options["learners"], options["schools"], options["schools"]],
+        )
+        cursor.execute(f"CREATE TABLE {PLAIN} (LIKE {PARENT} INCLUDING DEFAULTS)")
+        cursor.execute(f"CREATE TABLE {PARTED} (LIKE {PARENT} INCLUDING DEFAULTS) PARTITION BY RANGE (date)")
+        cursor.execute(f"CREATE TABLE {PARTED}_default PARTITION OF {PARTED} DEFAULT")
+        month = month_start(first)
+        while month <= last:
+            cursor.execute(
+                f"CREATE TABLE {PARTED}_p{month:%Y_%m} PARTITION OF {PARTED} FOR VALUES FROM (%s) TO (%s)",
+                [month, add_months(month, 1)],
+            )
+            month = add_months(month, 1)
+
+        started = time.perf_counter()
+        cursor.execute(
+            f"INSERT INTO {PLAIN} (id, student_id, school_id, date, status, recorded_at) "
+            "SELECT gen_random_uuid(), l.id, l.school_id, d::date, "
+            "       (ARRAY['PRESENT', 'PRESENT', 'PRESENT', 'PRESENT', 'PRESENT', 'PRESENT', "
+            "              'PRESENT', 'PRESENT', 'ABSENT', 'LATE'])[1 + floor(random() * 10)::int], now() "
+            "FROM generate_series(%s::date, %s::date, '1 day') d CROSS JOIN bench_attendance_learners l "
+            "WHERE extract(isodow FROM d) < 6",
+            [first, last],
+        )
+        rows = cursor.rowcount
+        cursor.execute(f"INSERT INTO {PARTED} SELECT * FROM {PLAIN}")
+        for table, key in ((PLAIN, "id"), (PARTED, "id, date")):
+            cursor.execute(f"ALTER TABLE {table} ADD PRIMARY KEY ({key})")
+            cursor.execute(f"ALTER TABLE {table} ADD UNIQUE (student_id, date)")
+            cursor.execute(f"CREATE INDEX ON {table} (school_id, date)")
+            cursor.execute(f"CREATE INDEX ON {table} (date DESC)")
+            cursor.execute(f"ANALYZE {table}")
+        self.stdout.write(
+            f"{rows:,} rows ({options['learners']:,} learners, {first} to {last}) "
+            f"loaded into both tables in {time.perf_counter() - started:.1f}s"
+        )
+        cursor.execute(
+            "SELECT pg_size_pretty(pg_total_relation_size(%s)), "
+            "(SELECT pg_size_pretty(sum(pg_total_relation_size(inhrelid))) FROM pg_inherits WHERE inhparent = %s::regclass)",
+            [PLAIN, PARTED],
+        )
+        self.stdout.write("size: plain %s, partitioned %s" % cursor.fetchone())
+
+    def compare(self, cursor, repeat):
+        cursor.execute("SELECT max(date) FROM bench_attendance_plain")
+        last = cursor.fetchone()[0]
+        cursor.execute("SELECT id, school_id FROM bench_attendance_learners")
+        learners = cursor.fetchall()
+        days = [last - timedelta(days=n) for n in range(14) if (last - timedelta(days=n)).isoweekday() < 6]
+        runs = []
+        for _ in range(repeat):
+            student, school = random.choice(learners)
+            runs.append({
+                'last': last, 'student': student, 'school': school, 'day': random.choice(days),
+                'month': add_months(month_start(last), -1),
+            })
+
+        # Alternate the tables run by run so neither gets a warmer cache
+        self.stdout.write(f"{'query':<28}{'plain ms':>12}{'partitioned ms':>16}{'speed-up':>10}")
+        for label, sql in QUERIES:
+            timings = {PLAIN: [], PARTED: []}
+            for params in [runs[0], *runs]:
+                for table in (PLAIN, PARTED):
+                    started = time.perf_counter()
+                    cursor.execute(sql.format(table=table), params)
+                    cursor.fetchall()
+                    timings[table].append((time.perf_counter() - started) * 1000)
+            plain, parted = (statistics.median(timings[table][1:]) for table in (PLAIN, PARTED))
+            self.stdout.write(f"{label:<28}{plain:>12.2f}{parted:>16.2f}{plain / parted:>9.1f}x")
+
+        # Retiring the oldest full month: DELETE against DETACH (both rolled back)
+        cursor.execute(f"SELECT min(date) FROM {PLAIN}")
+        oldest = add_months(month_start(cursor.fetchone()[0]), 1)
+        timings = []
+        for statement, params in (
+            (f"DELETE FROM {PLAIN} WHERE date >= %s AND date < %s", [oldest, add_months(oldest, 1)]),
+            (f"ALTER TABLE {PARTED} DETACH PARTITION {PARTED}_p{oldest:%Y_%m}", []),
+        ):
+            with transaction.atomic():
+                started = time.perf_counter()
+                cursor.execute(statement, params)
+                timings.append((time.perf_counter() - started) * 1000)
+                transaction.set_rollback(True)
+        self.stdout.write(f"{'retire oldest month':<28}{timings[0]:>12.2f}{timings[1]:>16.2f}{timings[0] / timings[1]:>9.1f}x")
@@ -0,0 +1,23 @@
+# apps/attendance/management/commands/rebuild_attendance_bitmaps.py
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.attendance.models import AttendanceBitmap
+from apps.school.models import School
+
+
+class Command(BaseCommand):
+    help = "Recompute learners' attendance bitmaps (one row per learner per year) from the attendance rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--school", help="School UUID (default: every school)")
+
+    def handle(self, *args, **options):
+        schools = School.objects.order_by('name')
+        if options["school"]:
+            schools = schools.filter(id=options["school"])
+            if not schools.exists():
+                raise CommandError("No such school")
+        for school in schools:
+            rows = AttendanceBitmap.rebuild(school.id)
+            self.stdout.write(f"{school.name}: {rows} bitmap(s)")
+        self.stdout.write(self.style.SUCCESS("Attendance bitmaps rebuilt"))
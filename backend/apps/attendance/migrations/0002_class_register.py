@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:47
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0001_initial'),
+        ('school', '0006_alter_school_academic_year_end_month_and_more'),
+        ('students', '0009_guardian_phone_e164'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendance',
+            name='recorded_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='attendance',
+            name='school',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='attendance', to='school.school'),
+        ),
+        migrations.AddField(
+            model_name='attendance',
+            name='student',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='attendance', to='students.student'),
+        ),
+        migrations.AlterField(
+            model_name='attendance',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['school', 'date'], name='attendance_school_date'),
+        ),
+        migrations.AddConstraint(
+            model_name='attendance',
+            constraint=models.UniqueConstraint(fields=('student', 'date'), name='attendance_once_per_student_day'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:50
+
+import apps.attendance.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copy of AttendanceBitmap's rebuild query as it stood for this migration
+REBUILD_SQL = """
+    INSERT INTO attendance_attendancebitmap (school_id, student_id, year, present, absent, late)
+    SELECT a.school_id, a.student_id, y.year,
+           COALESCE(bit_or(y.bit) FILTER (WHERE a.status = 'PRESENT'), 0::bit(366)),
+           COALESCE(bit_or(y.bit) FILTER (WHERE a.status = 'ABSENT'), 0::bit(366)),
+           COALESCE(bit_or(y.bit) FILTER (WHERE a.status = 'LATE'), 0::bit(366))
+    FROM attendance_attendance a
+    CROSS JOIN LATERAL (
+        SELECT EXTRACT(YEAR FROM a.date)::smallint AS year,
+               B'1'::bit(366) >> (a.date - make_date(EXTRACT(YEAR FROM a.date)::int, 1, 1)) AS bit
+    ) y
+    WHERE a.school_id = %(school_id)s AND a.student_id IS NOT NULL
+    GROUP BY a.school_id, a.student_id, y.year
+"""
+
+
+def build_bitmaps(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Attendance = apps.get_model('attendance', 'Attendance')
+    school_ids = Attendance.objects.exclude(student=None).values_list('school_id', flat=True).distinct()
+    with schema_editor.connection.cursor() as cursor:
+        for school_id in school_ids:
+            cursor.execute(REBUILD_SQL, {'school_id': school_id})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0002_class_register'),
+        ('school', '0006_alter_school_academic_year_end_month_and_more'),
+        ('students', '0009_guardian_phone_e164'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceBitmap',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('present', apps.attendance.models.DayBitsField(default=0)),
+                ('absent', apps.attendance.models.DayBitsField(default=0)),
+                ('late', apps.attendance.models.DayBitsField(default=0)),
+                ('school', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_bitmaps', to='school.school')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_bitmaps', to='students.student')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['school', 'year'], name='attendance_bitmap_school_year')],
+                'constraints': [models.UniqueConstraint(fields=('student', 'year'), name='attendance_bitmap_once_per_year')],
+            },
+        ),
+        migrations.RunPython(build_bitmaps, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,102 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:55
+
+from datetime import date as Date
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Frozen copies of the partition helpers (apps/attendance/partitions.py) as they stood for this migration
+PARENT = 'attendance_attendance'
+DEFAULT = f'{PARENT}_default'
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def add_months(day, months):
+    months += day.year * 12 + day.month - 1
+    return Date(months // 12, months % 12 + 1, 1)
+
+
+def partition_name(start):
+    return f"{PARENT}_p{start.year}_{start.month:02d}"
+
+
+def convert_table(connection, partitioned, ahead=3):
+    """
+    Rebuild attendance_attendance as a partitioned table (or back to a plain
+    one), copying the rows across and recreating its constraints and
+    indexes under their existing names. Takes the table offline for the copy.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relkind = 'p' FROM pg_class WHERE oid = %s::regclass", [PARENT])
+        if cursor.fetchone()[0] == partitioned:
+            return
+        cursor.execute(
+            "SELECT conname, contype, pg_get_constraintdef(oid), conindid FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype IN ('p', 'u', 'f', 'c') ORDER BY contype DESC, conname",
+            [PARENT],
+        )
+        constraints = cursor.fetchall()
+        cursor.execute(
+            "SELECT pg_get_indexdef(indexrelid) FROM pg_index WHERE indrelid = %s::regclass "
+            "AND indexrelid <> ALL(%s::oid[])",
+            [PARENT, [index for *_, index in constraints if index]],
+        )
+        indexes = [row[0] for row in cursor.fetchall()]
+        cursor.execute(f"SELECT min(date), max(date) FROM {PARENT}")
+        first, last = cursor.fetchone()
+
+        new = f"{PARENT}_new"
+        if partitioned:
+            cursor.execute(f"CREATE TABLE {new} (LIKE {PARENT} INCLUDING DEFAULTS) PARTITION BY RANGE (date)")
+            cursor.execute(f"CREATE TABLE {DEFAULT} PARTITION OF {new} DEFAULT")
+            month = month_start(first or Date.today())
+            through = add_months(max(month_start(last or Date.today()), month_start(Date.today())), ahead)
+            while month <= through:
+                cursor.execute(
+                    f"CREATE TABLE {partition_name(month)} PARTITION OF {new} FOR VALUES FROM (%s) TO (%s)",
+                    [month, add_months(month, 1)],
+                )
+                month = add_months(month, 1)
+        else:
+            cursor.execute(f"CREATE TABLE {new} (LIKE {PARENT} INCLUDING DEFAULTS)")
+        cursor.execute(f"INSERT INTO {new} SELECT * FROM {PARENT}")
+        cursor.execute(f"DROP TABLE {PARENT}")
+        cursor.execute(f"ALTER TABLE {new} RENAME TO {PARENT}")
+
+        for name, kind, definition, _ in constraints:
+            if kind == 'p':
+                definition = "PRIMARY KEY (id, date)" if partitioned else "PRIMARY KEY (id)"
+            cursor.execute(f"ALTER TABLE {PARENT} ADD CONSTRAINT {name} {definition}")
+        for definition in indexes:
+            cursor.execute(definition)
+
+
+def partition_table(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        convert_table(schema_editor.connection, partitioned=True)
+
+
+def unpartition_table(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        convert_table(schema_editor.connection, partitioned=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0003_attendance_bitmaps'),
+        ('school', '0006_alter_school_academic_year_end_month_and_more'),
+        ('students', '0009_guardian_phone_e164'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_table, unpartition_table),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['-date'], name='attendance_date_desc'),
+        ),
+    ]
@@ -1,21 +1,215 @@
 # attendance/models.py
 import uuid
-from django.db import models
+from datetime import date as Date
+from django.db import connection, models, transaction
 from apps.accounts.models import User
 
+DAYS = 366  # bits per year row, one per day of the year
+
+
+class DayBitsField(models.Field):
+    """
+    bit(366) column read and written as a Python int whose bit n is day n
+    of the year (bit string position n + 1), so set operations are & | ~.
+    """
+    def db_type(self, connection):
+        return f"bit({DAYS})"
+
+    def from_db_value(self, value, expression, connection):
+        return None if value is None else int(value[::-1], 2)
+
+    def get_prep_value(self, value):
+        return None if value is None else format(value, f"0{DAYS}b")[::-1]
+
+
 class Attendance(models.Model):
+    """
+    One mark per person per day. The table is partitioned by month on date
+    (see partitions.py), so filter on date wherever you can.
+    """
     class Status(models.TextChoices):
         PRESENT = "PRESENT"
         ABSENT = "ABSENT"
         LATE = "LATE"
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    # Staff are marked by user; learners by student, from the class register
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    student = models.ForeignKey('students.Student', on_delete=models.CASCADE, null=True, blank=True, related_name="attendance")
     date = models.DateField()
-    # Phase-4-ready school FK
-    # school = models.ForeignKey('core.School', on_delete=models.CASCADE, null=True, blank=True)
+    school = models.ForeignKey('school.School', on_delete=models.CASCADE, null=True, blank=True, related_name="attendance")
     status = models.CharField(max_length=10, choices=Status.choices)
     recorded_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name="attendance_recorded")
-    
+    recorded_at = models.DateTimeField(auto_now=True)
+
     class Meta:
-        unique_together = ("user", "date")
\ No newline at end of file
+        unique_together = ("user", "date")
+        constraints = [
+            # Target of the register upsert (ON CONFLICT (student_id, date))
+            models.UniqueConstraint(fields=["student", "date"], name="attendance_once_per_student_day"),
+        ]
+        indexes = [
+            models.Index(fields=["school", "date"], name="attendance_school_date"),
+            # Newest-first listing reads the latest monthly partition and stops
+            models.Index(fields=["-date"], name="attendance_date_desc"),
+        ]
+
+    # Columns the attendance bitmaps are built from (see AttendanceBitmap)
+    BITMAP_FIELDS = ('school_id', 'student_id', 'date', 'status')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember which bitmap day this row set, so save() can move it
+        if not instance.get_deferred_fields().intersection(cls.BITMAP_FIELDS):
+            instance._bitmap_state = instance.bitmap_state()
+        return instance
+
+    def bitmap_state(self):
+        if self.student_id is None:
+            return None  # staff attendance isn't kept in bitmaps
+        return (self.school_id, self.student_id, self.date, self.status)
+
+    def save(self, *args, **kwargs):
+        if self.student_id and not self.school_id:
+            self.school_id = self.student.school_id
+
+        with transaction.atomic():
+            if self._state.adding:
+                previous = None
+            elif hasattr(self, '_bitmap_state'):
+                previous = self._bitmap_state
+            else:
+                row = Attendance.objects.filter(pk=self.pk).values_list(*self.BITMAP_FIELDS).first()
+                previous = Attendance(**dict(zip(self.BITMAP_FIELDS, row))).bitmap_state() if row else None
+
+            super().save(*args, **kwargs)
+
+            current = self.bitmap_state()
+            AttendanceBitmap.apply_changes([(previous, current)])
+            self._bitmap_state = current
+
+
+# ── Attendance bitmaps ──────────────────────────────────────────────────────
+
+class AttendanceBitmap(models.Model):
+    """
+    A learner's attendance for a calendar year as three bitsets, one bit
+    per day of the year: present, absent and late (a day in none of them
+    was not marked).
+
+    Kept in step with Attendance inside the same transaction as each write
+    (see Attendance.save, signals.py and the class register), so term
+    analytics read one small row per learner instead of a row per learner
+    per day; see analytics.py. `rebuild_attendance_bitmaps` recomputes them
+    from the attendance rows if they ever drift.
+    """
+    school = models.ForeignKey('school.School', on_delete=models.CASCADE, related_name='attendance_bitmaps')
+    student = models.ForeignKey('students.Student', on_delete=models.CASCADE, related_name='attendance_bitmaps')
+    year = models.PositiveSmallIntegerField()
+    present = DayBitsField(default=0)
+    absent = DayBitsField(default=0)
+    late = DayBitsField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'year'], name='attendance_bitmap_once_per_year'),
+        ]
+        indexes = [
+            models.Index(fields=['school', 'year'], name='attendance_bitmap_school_year'),
+        ]
+
+    def __str__(self):
+        return f"{self.student_id} {self.year}"
+
+    @staticmethod
+    def day_bit(day):
+        return 1 << (day - Date(day.year, 1, 1)).days
+
+    @classmethod
+    def apply_changes(cls, changes):
+        """
+        Apply (old_state, new_state) pairs from Attendance.bitmap_state();
+        None on the old side is a create, None on the new side a delete.
+        Must run inside the transaction that wrote the attendance rows.
+        """
+        status_masks = {Attendance.Status.PRESENT: 0, Attendance.Status.ABSENT: 1, Attendance.Status.LATE: 2}
+        clears, sets = {}, {}
+        for old, new in changes:
+            if old:
+                key, bit = (old[1], old[2].year), cls.day_bit(old[2])
+                clears[key] = clears.get(key, 0) | bit
+                for column in (1, 2, 3) if key in sets else ():
+                    sets[key][column] &= ~bit
+            if new:
+                school_id, student_id, day, status = new
+                bit = cls.day_bit(day)
+                masks = sets.setdefault((student_id, day.year), [school_id, 0, 0, 0])
+                masks[0] = school_id
+                for column in (1, 2, 3):
+                    masks[column] &= ~bit
+                masks[1 + status_masks[status]] |= bit
+
+        # Sorted so concurrent writers take the row locks in one order
+        clears = sorted((key, mask) for key, mask in clears.items())
+        sets = sorted(sets.items())
+        field = cls._meta.get_field('present')
+        with connection.cursor() as cursor:
+            if clears:
+                cursor.execute(CLEAR_SQL, [
+                    [student_id for (student_id, _), _ in clears],
+                    [year for (_, year), _ in clears],
+                    [field.get_prep_value(mask) for _, mask in clears],
+                ])
+            if sets:
+                cursor.execute(SET_SQL, [
+                    [masks[0] for _, masks in sets],
+                    [student_id for (student_id, _), _ in sets],
+                    [year for (_, year), _ in sets],
+                    *([field.get_prep_value(masks[column]) for _, masks in sets] for column in (1, 2, 3)),
+                ])
+
+    @classmethod
+    def rebuild(cls, school_id):
+        """Recompute a school's bitmaps from its attendance rows. Returns the number of rows."""
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("DELETE FROM attendance_attendancebitmap WHERE school_id = %s", [school_id])
+            cursor.execute(REBUILD_SQL, {'school_id': school_id})
+            return cursor.rowcount
+
+
+CLEAR_SQL = f"""
+    UPDATE attendance_attendancebitmap AS b
+    SET present = b.present & ~v.mask, absent = b.absent & ~v.mask, late = b.late & ~v.mask
+    FROM (SELECT student_id, year, mask::bit({DAYS}) AS mask
+          FROM unnest(%s::uuid[], %s::smallint[], %s::text[]) AS u(student_id, year, mask)) AS v
+    WHERE b.student_id = v.student_id AND b.year = v.year
+"""
+
+# A day set in one bitset is cleared from the other two: a mark replaces the old one
+SET_SQL = f"""
+    INSERT INTO attendance_attendancebitmap AS b (school_id, student_id, year, present, absent, late)
+    SELECT school_id, student_id, year, present::bit({DAYS}), absent::bit({DAYS}), late::bit({DAYS})
+    FROM unnest(%s::uuid[], %s::uuid[], %s::smallint[], %s::text[], %s::text[], %s::text[])
+         AS u(school_id, student_id, year, present, absent, late)
+    ON CONFLICT (student_id, year) DO UPDATE SET
+        school_id = EXCLUDED.school_id,
+        present = (b.present & ~(EXCLUDED.absent | EXCLUDED.late)) | EXCLUDED.present,
+        absent = (b.absent & ~(EXCLUDED.present | EXCLUDED.late)) | EXCLUDED.absent,
+        late = (b.late & ~(EXCLUDED.present | EXCLUDED.absent)) | EXCLUDED.late
+"""
+
+REBUILD_SQL = f"""
+    INSERT INTO attendance_attendancebitmap (school_id, student_id, year, present, absent, late)
+    SELECT a.school_id, a.student_id, y.year,
+           COALESCE(bit_or(y.bit) FILTER (WHERE a.status = 'PRESENT'), 0::bit({DAYS})),
+           COALESCE(bit_or(y.bit) FILTER (WHERE a.status = 'ABSENT'), 0::bit({DAYS})),
+           COALESCE(bit_or(y.bit) FILTER (WHERE a.status = 'LATE'), 0::bit({DAYS}))
+    FROM attendance_attendance a
+    CROSS JOIN LATERAL (
+        SELECT EXTRACT(YEAR FROM a.date)::smallint AS year,
+               B'1'::bit({DAYS}) >> (a.date - make_date(EXTRACT(YEAR FROM a.date)::int, 1, 1)) AS bit
+    ) y
+    WHERE a.school_id = %(school_id)s AND a.student_id IS NOT NULL
+    GROUP BY a.school_id, a.student_id, y.year
+"""
@@ -0,0 +1,126 @@
+# apps/attendance/partitions.py
+"""
+Monthly partitions of attendance_attendance.
+
+The table is partitioned by RANGE (date), one partition per calendar
+month (attendance_attendance_p2026_05 holds May 2026), with a DEFAULT
+partition catching anything outside them so a missed maintenance run never
+fails a write. Queries that filter on date (the register, a day's or a
+month's marks, the list endpoint's date filters) are pruned to the months
+they touch, and ORDER BY date DESC ... LIMIT reads the newest partition
+first and stops.
+
+Postgres wants the partition key in every unique index, so the primary
+key is (id, date); the (user, date) and (student, date) unique constraints
+already include it. Django still treats id as the primary key.
+
+Migration 0004 converted the table. `attendance_partitions` creates
+months ahead of time and detaches (or drops) old ones. A detached month is
+left as a plain table named attendance_archive_pYYYY_MM, without foreign
+keys, so the learners, users and schools it mentions can still be deleted.
+"""
+import re
+from datetime import date as Date
+
+from django.db import connection, transaction
+
+PARENT = 'attendance_attendance'
+DEFAULT = f'{PARENT}_default'
+BOUNDS = re.compile(r"FROM \('(\d{4}-\d{2}-\d{2})'\) TO \('(\d{4}-\d{2}-\d{2})'\)")
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def add_months(day, months):
+    months += day.year * 12 + day.month - 1
+    return Date(months // 12, months % 12 + 1, 1)
+
+
+def partition_name(start):
+    return f"{PARENT}_p{start.year}_{start.month:02d}"
+
+
+def archive_name(start):
+    return f"attendance_archive_p{start.year}_{start.month:02d}"
+
+
+def is_partitioned(cursor):
+    cursor.execute("SELECT relkind = 'p' FROM pg_class WHERE oid = %s::regclass", [PARENT])
+    return cursor.fetchone()[0]
+
+
+def partitions(cursor):
+    """[(name, first day, first day after)] of the monthly partitions, oldest first."""
+    cursor.execute(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = %s::regclass",
+        [PARENT],
+    )
+    found = []
+    for name, bound in cursor.fetchall():
+        match = BOUNDS.search(bound)
+        if match:
+            found.append((name, Date.fromisoformat(match[1]), Date.fromisoformat(match[2])))
+    return sorted(found, key=lambda partition: partition[1])
+
+
+# ── Maintenance ─────────────────────────────────────────────────────────────
+
+def create_partition(cursor, start):
+    """
+    Add the month starting `start`. Rows for it already sitting in the
+    default partition are moved into it first, since Postgres refuses to
+    attach over them. Returns how many were moved.
+    """
+    name, end = partition_name(start), add_months(start, 1)
+    cursor.execute(f"SELECT count(*) FROM {DEFAULT} WHERE date >= %s AND date < %s", [start, end])
+    stray = cursor.fetchone()[0]
+    with transaction.atomic():
+        if stray:
+            cursor.execute(f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS)")
+            cursor.execute(
+                f"WITH moved AS (DELETE FROM {DEFAULT} WHERE date >= %s AND date < %s RETURNING *) "
+                f"INSERT INTO {name} SELECT * FROM moved",
+                [start, end],
+            )
+            cursor.execute(f"ALTER TABLE {PARENT} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)", [start, end])
+        else:
+            cursor.execute(f"CREATE TABLE {name} PARTITION OF {PARENT} FOR VALUES FROM (%s) TO (%s)", [start, end])
+    return stray
+
+
+def detach_partition(cursor, name, start, drop=False):
+    """Take a month out of the table: kept as attendance_archive_pYYYY_MM, or dropped."""
+    with transaction.atomic():
+        cursor.execute(f"ALTER TABLE {PARENT} DETACH PARTITION {name}")
+        if drop:
+            cursor.execute(f"DROP TABLE {name}")
+        else:
+            # Its foreign keys would still point at students, users and schools,
+            # and block deleting them: Django's cascade only sees the parent table
+            cursor.execute(
+                "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'", [name]
+            )
+            for (constraint,) in cursor.fetchall():
+                cursor.execute(f"ALTER TABLE {name} DROP CONSTRAINT {connection.ops.quote_name(constraint)}")
+            cursor.execute(f"ALTER TABLE {name} RENAME TO {archive_name(start)}")
+
+
+def plan_maintenance(cursor, today, ahead=3, retain=None):
+    """
+    ([month starts to create], [(name, start) to detach]) to have partitions
+    from the current month through `ahead` months on, and none wholly older
+    than `retain` months (None: keep everything).
+    """
+    existing = partitions(cursor)
+    have = {start for _, start, _ in existing}
+    current = month_start(today)
+    create = [month for month in (add_months(current, n) for n in range(ahead + 1)) if month not in have]
+    detach = []
+    if retain is not None:
+        cutoff = add_months(current, -retain)
+        detach = [(name, start) for name, start, end in existing if end <= cutoff]
+    return create, detach
+
@@ -0,0 +1,95 @@
+# apps/attendance/register.py
+"""
+Class register: a whole class's marks for a day in one submission.
+
+The roster (the school's active learners in the grade, and stream if
+given) is loaded once, every mark is checked against it, and the marks are
+written with a single INSERT ... ON CONFLICT (student_id, date) DO UPDATE,
+so a correction is just the register submitted again. Marks that don't
+change anything are left out of the write, and the learners' attendance
+bitmaps are updated in the same transaction. The result is the diff: who
+was newly marked, whose mark changed, and who on the roster has no mark yet.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from apps.students.models import Student
+from .models import Attendance, AttendanceBitmap
+
+
+def roster(school, grade_level, stream=''):
+    """The class's active learners, in register order."""
+    students = Student.objects.filter(school=school, current_class=grade_level, status=Student.Status.ACTIVE)
+    if stream:
+        students = students.filter(stream=stream)
+    return students.order_by('last_name', 'first_name', 'admission_number')
+
+
+def register_marks(school, grade_level, date, stream=''):
+    """[{student, admission_number, name, status}] for the class on `date`; status None when unmarked."""
+    learners = list(roster(school, grade_level, stream).values_list('id', 'admission_number', 'first_name', 'last_name'))
+    marks = dict(
+        Attendance.objects
+        .filter(student_id__in=[learner[0] for learner in learners], date=date)
+        .values_list('student_id', 'status')
+    )
+    return [
+        {
+            'student': student_id,
+            'admission_number': admission_number,
+            'name': f"{first_name} {last_name}",
+            'status': marks.get(student_id),
+        }
+        for student_id, admission_number, first_name, last_name in learners
+    ]
+
+
+def submit_register(school, grade_level, date, marks, user=None, stream=''):
+    """
+    Record `marks` ({student_id: status}) for the class on `date`. Raises
+    ValueError if the date is in the future or a mark is for a learner not
+    on the roster. Returns the diff.
+    """
+    if date > timezone.localdate():
+        raise ValueError("Attendance can't be marked for a future date.")
+    roster_ids = list(roster(school, grade_level, stream).values_list('id', flat=True))
+    on_roster = set(roster_ids)
+    strangers = set(marks) - on_roster
+    if strangers:
+        raise ValueError(f"Not on this class's roster: {', '.join(sorted(map(str, strangers)))}")
+
+    with transaction.atomic():
+        previous = dict(
+            Attendance.objects
+            .filter(student_id__in=on_roster, date=date)
+            .values_list('student_id', 'status')
+        )
+        created = [student_id for student_id in marks if student_id not in previous]
+        changed = [
+            {'student': student_id, 'from': previous[student_id], 'to': status}
+            for student_id, status in marks.items()
+            if student_id in previous and previous[student_id] != status
+        ]
+        writes = [*created, *(change['student'] for change in changed)]
+        Attendance.objects.bulk_create(
+            [
+                Attendance(school=school, student_id=student_id, date=date, status=marks[student_id], recorded_by=user)
+                for student_id in writes
+            ],
+            update_conflicts=True,
+            unique_fields=['student', 'date'],
+            update_fields=['status', 'school', 'recorded_by', 'recorded_at'],
+        )
+        # bulk_create skips Attendance.save(), which keeps the bitmaps in step
+        AttendanceBitmap.apply_changes([(None, (school.id, student_id, date, marks[student_id])) for student_id in writes])
+
+    return {
+        'date': date,
+        'grade_level': grade_level.id,
+        'stream': stream,
+        'roster': len(roster_ids),
+        'created': created,
+        'changed': changed,
+        'unchanged': len(marks) - len(writes),
+        'unmarked': [student_id for student_id in roster_ids if student_id not in previous and student_id not in marks],
+    }
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from .models import Attendance
 from apps.accounts.serializers import UserSerializer
+from apps.academics.models import GradeLevel
+from apps.school.models import School
 
 # ----------------------------
 # ATTENDANCE SERIALIZERS
@@ -19,10 +21,13 @@ class AttendanceSerializer(serializers.ModelSerializer):
             'id',
             'user',
             'user_email',
+            'student',
+            'school',
             'date',
             'status',
             'recorded_by',
-            'recorded_by_email'
+            'recorded_by_email',
+            'recorded_at'
         ]
 
 
@@ -35,7 +40,76 @@ class AttendanceCreateUpdateSerializer(serializers.ModelSerializer):
         fields = [
             'id',
             'user',
+            'student',
+            'school',
             'date',
             'status',
             'recorded_by'
         ]
+
+
+# ----------------------------
+# CLASS REGISTER SERIALIZERS
+# ----------------------------
+
+class SchoolClassSerializer(serializers.Serializer):
+    """
+    A school the user belongs to, and optionally one of its grade levels (and stream)
+    """
+    school = serializers.PrimaryKeyRelatedField(queryset=School.objects.all())
+    grade_level = serializers.PrimaryKeyRelatedField(queryset=GradeLevel.objects.all(), required=False)
+    stream = serializers.CharField(max_length=50, required=False, default='', allow_blank=True)
+
+    def validate_school(self, value):
+        user = self.context['request'].user
+        if not user.is_superuser and not School.objects.filter(id=value.id, users=user).exists():
+            raise serializers.ValidationError("You do not have permission to view or mark attendance for this school.")
+        return value
+
+    def validate(self, attrs):
+        grade_level = attrs.get('grade_level')
+        if grade_level is not None and grade_level.school_id not in (None, attrs['school'].id):
+            raise serializers.ValidationError({'grade_level': "This grade level belongs to another school."})
+        return attrs
+
+
+class ClassRegisterSerializer(SchoolClassSerializer):
+    """
+    Which register: a school's grade level (and stream) on a date
+    """
+    grade_level = serializers.PrimaryKeyRelatedField(queryset=GradeLevel.objects.all())
+    date = serializers.DateField()
+
+
+class RegisterMarkSerializer(serializers.Serializer):
+    student = serializers.UUIDField()
+    status = serializers.ChoiceField(choices=Attendance.Status.choices)
+
+
+class RegisterSubmitSerializer(ClassRegisterSerializer):
+    """
+    SUBMIT: the class's marks for the date, one per learner
+    """
+    marks = RegisterMarkSerializer(many=True, allow_empty=False, max_length=2000)
+
+    def validate_marks(self, value):
+        students = [mark['student'] for mark in value]
+        if len(set(students)) != len(students):
+            raise serializers.ValidationError("Each learner can only be marked once per register.")
+        return value
+
+
+class TermReportSerializer(SchoolClassSerializer):
+    """
+    Term analytics: a school (or one class) between two dates
+    """
+    start = serializers.DateField()
+    end = serializers.DateField()
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if attrs['end'] < attrs['start']:
+            raise serializers.ValidationError({'end': "The end date is before the start date."})
+        if (attrs['end'] - attrs['start']).days >= 366:
+            raise serializers.ValidationError({'end': "A report can cover at most a year."})
+        return attrs
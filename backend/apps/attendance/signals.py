@@ -0,0 +1,13 @@
+# apps/attendance/signals.py
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import Attendance, AttendanceBitmap
+
+
+@receiver(post_delete, sender=Attendance)
+def remove_from_bitmap(sender, instance, **kwargs):
+    # Sent inside the deletion's transaction, for queryset deletes too
+    state = instance.bitmap_state()
+    if state:
+        AttendanceBitmap.apply_changes([(state, None)])
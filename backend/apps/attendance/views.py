@@ -1,14 +1,44 @@
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.permissions import IsAuthenticated
+from django_filters.rest_framework import DjangoFilterBackend
+from apps.core.pagination import KeysetPagination
 from .models import Attendance
-from .serializers import AttendanceSerializer, AttendanceCreateUpdateSerializer
+from .analytics import term_report
+from .register import register_marks, submit_register
+from .serializers import (
+    AttendanceSerializer,
+    AttendanceCreateUpdateSerializer,
+    ClassRegisterSerializer,
+    RegisterSubmitSerializer,
+    TermReportSerializer,
+)
 
 # ----------------------------
 # ATTENDANCE VIEWSET
 # ----------------------------
+
+class AttendanceCursorPagination(KeysetPagination):
+    order_field = 'date'
+
+
 class AttendanceViewSet(ModelViewSet):
     queryset = Attendance.objects.select_related('user', 'recorded_by').all().order_by('-date')
     permission_classes = [IsAuthenticated]
+    # Date filters let Postgres skip the months outside them (monthly partitions)
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = {
+        'date': ['exact', 'gte', 'lte'],
+        'school': ['exact'],
+        'student': ['exact'],
+        'user': ['exact'],
+        'status': ['exact'],
+    }
+    # Pages of (-date, -id); each ?cursor= bounds the date, so only the months
+    # from there back are read, newest first, until the page is full
+    pagination_class = AttendanceCursorPagination
 
     def get_serializer_class(self):
         """
@@ -17,3 +47,43 @@ class AttendanceViewSet(ModelViewSet):
         if self.action in ['create', 'update', 'partial_update']:
             return AttendanceCreateUpdateSerializer
         return AttendanceSerializer
+
+    @action(detail=False, methods=['get', 'post'])
+    def register(self, request):
+        """
+        GET ?school=&grade_level=&date=[&stream=]: the class roster with the
+        day's marks. POST the same plus "marks": [{"student", "status"}] to
+        mark (or correct) the whole class at once; returns what changed.
+        """
+        if request.method == 'GET':
+            query = ClassRegisterSerializer(data=request.query_params, context={'request': request})
+            query.is_valid(raise_exception=True)
+            data = query.validated_data
+            return Response(register_marks(data['school'], data['grade_level'], data['date'], data['stream']))
+
+        serializer = RegisterSubmitSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        try:
+            diff = submit_register(
+                data['school'], data['grade_level'], data['date'],
+                {mark['student']: mark['status'] for mark in data['marks']},
+                user=request.user, stream=data['stream'],
+            )
+        except ValueError as exc:
+            raise serializers.ValidationError(str(exc))
+        return Response(diff, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'], url_path='term-report')
+    def term_report(self, request):
+        """
+        GET ?school=&start=&end=[&grade_level=&stream=]: per-learner presence,
+        absence and lateness, absence streaks and chronic absence for the term.
+        """
+        query = TermReportSerializer(data=request.query_params, context={'request': request})
+        query.is_valid(raise_exception=True)
+        data = query.validated_data
+        return Response(term_report(
+            data['school'], data['start'], data['end'],
+            grade_level=data.get('grade_level'), stream=data['stream'],
+        ))
@@ -0,0 +1,333 @@
+# apps/core/audit.py
+"""
+Automatic audit log.
+
+register_audit(Model) records every create, update and delete of Model as
+an AuditLog row with a field-level diff ({"field": [old, new]} for updates,
+the filled-in fields for creates), the acting user and the school.
+
+Nothing is written on the request's own path. An instance remembers its
+field values when it is built (post_init, a dict copy), so the diff on
+save needs no query. The entry is handed over with transaction.on_commit,
+which drops it if the write is rolled back, savepoints included. Entries
+go into a process-wide buffer, and the buffer is written with bulk_create:
+- AUDIT_LOG_WRITER = "thread" (the default): by a background flusher, every
+  AUDIT_FLUSH_INTERVAL seconds or as soon as AUDIT_BATCH_SIZE entries wait;
+- AUDIT_LOG_WRITER = "request": by AuditMiddleware once the request is done.
+A write that fails keeps its entries and is retried, backing off while the
+database stays away; past AUDIT_BUFFER_LIMIT entries the oldest are dropped
+(and counted in the log). Anything left is flushed at exit, so management
+commands lose nothing.
+
+The acting user comes from AuditMiddleware (DRF hands the authenticated
+user back to the Django request) or acting_as() in background jobs.
+In-place changes to a JSON or array value aren't seen; reassign the value.
+`bench_audit_log` measures the overhead on saves.
+"""
+import atexit
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, time as Time, timedelta
+from decimal import Decimal
+from functools import partial
+from uuid import UUID
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models.fields.files import FieldFile
+from django.db.models.signals import post_delete, post_init, post_save
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+REDACTED = "***"
+FLUSH_BACKOFF_MAX = 60  # seconds between retries of a failing flush, at most
+PLAIN_TYPES = (str, int, float, bool, type(None), Decimal, date, datetime, Time, timedelta, UUID, list, dict)
+
+_buffer = []
+_buffer_lock = threading.Lock()
+_wakeup = threading.Event()
+_flusher = None
+_failures = 0  # flushes failed in a row; the flusher backs off while the database is away
+_suspended = threading.local()
+_request = contextvars.ContextVar('audit_request', default=None)
+_user = contextvars.ContextVar('audit_user', default=None)
+
+# model → (fields audited, fields whose values are redacted, school path)
+_registry = {}
+
+
+# ── Registration ────────────────────────────────────────────────────────────
+
+def register_audit(model, school='school', exclude=(), redact=()):
+    """
+    Audit every save and delete of `model`. `school` is the path to its
+    school ('category__school' for a fee item); `redact` fields are logged
+    as changed without their values (True: all of them).
+    """
+    fields = [
+        field for field in model._meta.concrete_fields
+        if field.name not in exclude and not field.primary_key
+        and not getattr(field, 'auto_now', False) and not getattr(field, 'auto_now_add', False)
+    ]
+    redacted = {field.attname for field in fields} if redact is True else {
+        model._meta.get_field(name).attname for name in redact
+    }
+    _registry[model] = ([(field.name, field.attname) for field in fields], redacted, school.split('__'))
+    uid = f"audit:{model._meta.label}"
+    post_init.connect(remember, sender=model, weak=False, dispatch_uid=uid)
+    post_save.connect(on_save, sender=model, weak=False, dispatch_uid=uid)
+    post_delete.connect(on_delete, sender=model, weak=False, dispatch_uid=uid)
+
+
+def remember(sender, instance, **kwargs):
+    instance._audit_values = instance.__dict__.copy()
+
+
+@contextmanager
+def suspended():
+    """Audit nothing in this thread (bulk maintenance, benchmarks)."""
+    previous = getattr(_suspended, 'on', False)
+    _suspended.on = True
+    try:
+        yield
+    finally:
+        _suspended.on = previous
+
+
+@contextmanager
+def acting_as(user):
+    """Attribute audited changes in this context to `user` (background jobs)."""
+    token = _user.set(user)
+    try:
+        yield
+    finally:
+        _user.reset(token)
+
+
+# ── Capture ─────────────────────────────────────────────────────────────────
+
+def compact(value):
+    if isinstance(value, FieldFile):
+        return value.name or None
+    if isinstance(value, (bytes, memoryview)):
+        return REDACTED
+    return value if isinstance(value, PLAIN_TYPES) else str(value)
+
+
+def acting_user_id():
+    user = _user.get()
+    if user is None:
+        request = _request.get()
+        user = getattr(request, 'user', None) if request is not None else None
+    return user.pk if user is not None and user.is_authenticated else None
+
+
+def on_save(sender, instance, created=False, update_fields=None, **kwargs):
+    if getattr(_suspended, 'on', False):
+        instance._audit_values = instance.__dict__.copy()
+        return
+    fields, redacted, _ = _registry[sender]
+    if update_fields:
+        fields = [(name, attname) for name, attname in fields if name in update_fields]
+    current = instance.__dict__
+    if created:
+        changes = {
+            name: REDACTED if attname in redacted else compact(current.get(attname))
+            for name, attname in fields
+            if current.get(attname) not in (None, '')
+        }
+        action = 'CREATE'
+    else:
+        before = instance._audit_values
+        changes = {}
+        for name, attname in fields:
+            # A field deferred when the instance was loaded has no old value to compare
+            new = current.get(attname)
+            old = before.get(attname, new)
+            if old != new:
+                changes[name] = REDACTED if attname in redacted else [compact(old), compact(new)]
+        if not changes:
+            return
+        action = 'UPDATE'
+    if update_fields:
+        instance._audit_values.update((attname, current.get(attname)) for _, attname in fields)
+    else:
+        instance._audit_values = current.copy()
+    capture(sender, instance, action, changes)
+
+
+def record_saves(instances, created=False, update_fields=None):
+    """Audit saves of loaded instances that bypassed the signals (bulk_create, bulk_update, update())."""
+    for instance in instances:
+        if type(instance) in _registry:
+            on_save(type(instance), instance, created=created, update_fields=update_fields)
+
+
+def on_delete(sender, instance, **kwargs):
+    if not getattr(_suspended, 'on', False):
+        capture(sender, instance, 'DELETE', {})
+
+
+def capture(model, instance, action, changes):
+    path = _registry[model][2]
+    # The school's id, or for a longer path the first hop's id, resolved at flush
+    first_hop = model._meta.get_field(path[0]).attname
+    entry = (
+        model, str(instance.pk), action, changes, acting_user_id(),
+        instance.__dict__.get(first_hop), timezone.now(),
+    )
+    transaction.on_commit(partial(enqueue, entry))
+
+
+def record(model, pk, changes, school_id, action='UPDATE'):
+    """
+    Audit a write made with update() on rows that were never loaded.
+    `changes` is {field name: (old, new)}; `school_id` is the id at the
+    first hop of the model's school path (the school itself for most).
+    """
+    if model not in _registry or getattr(_suspended, 'on', False):
+        return
+    fields, redacted, _ = _registry[model]
+    attnames = dict(fields)
+    changes = {
+        name: REDACTED if attnames.get(name) in redacted else [compact(old), compact(new)]
+        for name, (old, new) in changes.items()
+    }
+    entry = (model, str(pk), action, changes, acting_user_id(), school_id, timezone.now())
+    transaction.on_commit(partial(enqueue, entry))
+
+
+def enqueue(entry):
+    with _buffer_lock:
+        _buffer.append(entry)
+        full = len(_buffer) >= getattr(settings, 'AUDIT_BATCH_SIZE', 500)
+    if getattr(settings, 'AUDIT_LOG_WRITER', 'thread') == 'thread':
+        start_flusher()
+        if full:
+            _wakeup.set()
+
+
+# ── Writing ─────────────────────────────────────────────────────────────────
+
+def school_ids(entries):
+    """School id per entry, following paths like category__school with one query per model."""
+    schools = [None] * len(entries)
+    lookups = {}
+    for index, (model, _, _, _, _, hop_id, _) in enumerate(entries):
+        path = _registry[model][2]
+        if len(path) == 1:
+            schools[index] = hop_id
+        elif hop_id is not None:
+            lookups.setdefault(model, []).append((index, hop_id))
+    for model, pending in lookups.items():
+        path = _registry[model][2]
+        related = model._meta.get_field(path[0]).related_model
+        found = dict(
+            related.objects.filter(pk__in={hop_id for _, hop_id in pending})
+            .values_list('pk', '__'.join(path[1:]))
+        )
+        for index, hop_id in pending:
+            schools[index] = found.get(hop_id)
+    return schools
+
+
+def flush():
+    """
+    Write everything buffered so far; returns how many entries were written.
+    If the write fails the entries go back to the front of the buffer for
+    the next flush.
+    """
+    global _failures
+    from apps.accounts.models import User
+    from apps.school.models import School
+    from .models import AuditLog
+    with _buffer_lock:
+        entries = _buffer[:]
+        del _buffer[:]
+    if not entries:
+        return 0
+    try:
+        schools = school_ids(entries)
+        # Deleting a school (or user) cascades: don't point at rows that are gone
+        live_schools = set(School.objects.filter(id__in=set(schools) - {None}).values_list('id', flat=True))
+        live_users = set(User.objects.filter(id__in={entry[4] for entry in entries} - {None}).values_list('id', flat=True))
+        AuditLog.objects.bulk_create(
+            [
+                AuditLog(
+                    school_id=school_id if school_id in live_schools else None,
+                    user_id=user_id if user_id in live_users else None,
+                    action=action, table_name=model._meta.db_table, record_id=record_id,
+                    changes=changes, timestamp=timestamp,
+                )
+                for (model, record_id, action, changes, user_id, _, timestamp), school_id
+                in zip(entries, schools)
+            ],
+            batch_size=1000,
+        )
+    except Exception:
+        logger.exception("Could not write %d audit log entries; keeping them for the next flush", len(entries))
+        with _buffer_lock:
+            _buffer[:0] = entries
+            _failures += 1
+            # While the database stays away, memory is kept bounded at the cost of the oldest entries
+            dropped = _buffer[:max(len(_buffer) - getattr(settings, 'AUDIT_BUFFER_LIMIT', 100000), 0)]
+            del _buffer[:len(dropped)]
+        if dropped:
+            logger.error(
+                "Audit buffer full: dropped the %d oldest entries (%s to %s)",
+                len(dropped), dropped[0][6].isoformat(), dropped[-1][6].isoformat(),
+            )
+        return 0
+    _failures = 0
+    return len(entries)
+
+
+def start_flusher():
+    global _flusher
+    if _flusher is not None:
+        return
+    with _buffer_lock:
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_forever, name='audit-log', daemon=True)
+            _flusher.start()
+
+
+def _flush_forever():
+    while True:
+        interval = getattr(settings, 'AUDIT_FLUSH_INTERVAL', 1.0)
+        if _failures:
+            # A full buffer doesn't hurry a retry while writes are failing
+            time.sleep(min(interval * 2 ** _failures, FLUSH_BACKOFF_MAX))
+        else:
+            _wakeup.wait(interval)
+        _wakeup.clear()
+        try:
+            flush()
+        finally:
+            close_old_connections()
+
+
+@atexit.register
+def _flush_at_exit():
+    if _buffer:
+        flush()
+
+
+class AuditMiddleware:
+    """Makes the request's user available to audit capture; flushes per request in "request" mode."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _request.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            _request.reset(token)
+            if getattr(settings, 'AUDIT_LOG_WRITER', 'thread') == 'request':
+                flush()
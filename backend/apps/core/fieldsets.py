@@ -0,0 +1,127 @@
+# core/fieldsets.py
+"""
+Sparse fieldsets: ?fields=a,b,c keeps only those serializer fields and
+?exclude=x,y drops some. The queryset is narrowed to match with .only(), so
+columns nobody asked for (long TextFields especially) are never fetched.
+
+A field's columns are worked out from its `source`. Model properties can't be
+introspected; serializers list what they read in `sparse_sources`, e.g.
+{'full_name': ('first_name', 'middle_name', 'last_name')}. A field whose
+columns can't be worked out turns the column narrowing off (the payload is
+still trimmed), so a missing entry costs speed, never correctness.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+
+def parse_field_list(value):
+    return list(dict.fromkeys(name.strip() for name in (value or '').split(',') if name.strip()))
+
+
+class SparseFieldsetSerializerMixin:
+    """Drops fields outside the `sparse_fields` set the view put in the context."""
+    sparse_sources = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Only the top-level serializer (or a list's child) gets the view's
+        # context at init; nested serializers are left whole
+        keep = self.context.get('sparse_fields')
+        if keep is not None:
+            for name in list(self.fields):
+                if name not in keep:
+                    self.fields.pop(name)
+
+
+class UnknownColumns(Exception):
+    pass
+
+
+def serializer_columns(serializer, model, prefix=''):
+    """
+    (columns, related) needed to render `serializer`'s fields for `model`:
+    .only() paths and .select_related() paths. Raises UnknownColumns.
+    """
+    columns = {prefix + model._meta.pk.name}
+    related = set()
+    sources = getattr(serializer, 'sparse_sources', {})
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if name in sources:
+            columns.update(prefix + column for column in sources[name])
+            continue
+        if field.source == '*':
+            raise UnknownColumns(name)
+        attr, _, rest = field.source.partition('.')
+        try:
+            model_field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            if not hasattr(model, attr):
+                continue  # not on the model at all: DRF skips the field
+            raise UnknownColumns(name)  # a property we can't see into
+        if not model_field.concrete:
+            continue  # reverse relation: no column on this table
+        columns.add(prefix + attr)
+        if model_field.is_relation and (rest or isinstance(field, serializers.BaseSerializer)):
+            # Nested object: join it and narrow its columns too
+            related.add(prefix + attr)
+            if isinstance(field, serializers.BaseSerializer):
+                child = field.child if isinstance(field, serializers.ListSerializer) else field
+                nested_columns, nested_related = serializer_columns(
+                    child, model_field.related_model, f"{prefix}{attr}__"
+                )
+                columns.update(nested_columns)
+                related.update(nested_related)
+            else:
+                columns.add(f"{prefix}{attr}__{rest.replace('.', '__')}")
+    return columns, related
+
+
+class SparseFieldsetMixin:
+    """
+    ViewSet side of sparse fieldsets, for list and retrieve. The serializer
+    class must use SparseFieldsetSerializerMixin.
+    """
+    sparse_fieldset_actions = ('list', 'retrieve')
+
+    def get_sparse_fields(self):
+        if self.action not in self.sparse_fieldset_actions:
+            return None
+        if hasattr(self, '_sparse_fields'):
+            return self._sparse_fields
+
+        params = self.request.query_params
+        fields, exclude = parse_field_list(params.get('fields')), parse_field_list(params.get('exclude'))
+        keep = None
+        if fields or exclude:
+            available = list(self.get_serializer_class()().fields)
+            unknown = [name for name in fields + exclude if name not in available]
+            if unknown:
+                raise ValidationError({
+                    "fields": f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(available)}"
+                })
+            keep = set(fields or available) - set(exclude)
+        self._sparse_fields = keep
+        return keep
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        keep = self.get_sparse_fields()
+        if keep is not None:
+            context['sparse_fields'] = keep
+        return context
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action not in self.sparse_fieldset_actions:
+            return queryset
+        serializer = self.get_serializer_class()(context=self.get_serializer_context())
+        try:
+            columns, related = serializer_columns(serializer, queryset.model)
+        except UnknownColumns:
+            return queryset
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*columns)
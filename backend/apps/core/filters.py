@@ -0,0 +1,32 @@
+# core/filters.py
+import operator
+from functools import reduce
+
+from django.db.models import Q
+from rest_framework.filters import SearchFilter
+
+
+class TrigramSearchFilter(SearchFilter):
+    """
+    ?search= tuned for columns carrying pg_trgm GIN indexes on UPPER(column).
+
+    Terms of three or more characters use icontains, which the trigram index
+    answers directly. Shorter terms have no trigrams to look up, so they are
+    matched as prefixes instead, which the same index can still serve.
+    """
+    min_contains_length = 3
+
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request)
+        search_terms = self.get_search_terms(request)
+
+        if not search_fields or not search_terms:
+            return queryset
+
+        for term in search_terms:
+            lookup = 'icontains' if len(term) >= self.min_contains_length else 'istartswith'
+            queryset = queryset.filter(reduce(
+                operator.or_,
+                (Q(**{f'{field}__{lookup}': term}) for field in search_fields),
+            ))
+        return queryset
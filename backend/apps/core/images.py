@@ -0,0 +1,181 @@
+# apps/core/images.py
+"""
+Fixed-size JPEG renditions of uploaded images (student/applicant photos,
+school logos), stored next to the original under a predictable name:
+
+    student_photos/abc.png -> student_photos/abc.thumb.jpg
+                              student_photos/abc.medium.jpg
+
+Renditions are built off the request thread by a small pool as soon as an
+image field is saved (see register_renditions); `build_image_renditions`
+backfills existing uploads. Each model records whether its image's
+renditions exist in a `<field>_rendered` flag, so serving their URLs never
+asks storage; until then the original is served.
+"""
+import logging
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, pre_save
+from PIL import Image, ImageOps
+
+from .workers import BackgroundPool
+
+logger = logging.getLogger(__name__)
+
+RENDITIONS = {
+    'thumb': (160, 160),
+    'medium': (640, 640),
+}
+
+_pool = BackgroundPool('image-renditions', threads=2, threads_setting='IMAGE_RENDITION_WORKERS')
+_in_flight = set()
+_registered = []  # (model, image field, flag field) for every register_renditions call
+
+
+def rendition_name(name, rendition):
+    stem, _ = os.path.splitext(name)
+    return f"{stem}.{rendition}.jpg"
+
+
+def thumbnail_name(name):
+    return rendition_name(name, 'thumb')
+
+
+def flag_name(field_name):
+    return f"{field_name}_rendered"
+
+
+def flatten(image):
+    """RGB for JPEG; transparent areas (PNG/WebP logos) become white, not black."""
+    if image.mode == 'P' and 'transparency' in image.info:
+        image = image.convert('RGBA')
+    if image.mode in ('RGBA', 'LA'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def render_stored_image(name, storage=default_storage, renditions=RENDITIONS, force=False):
+    """
+    Build the missing renditions of the stored image `name`; returns the
+    names written. Decodes the original at most once, so safe to retry.
+    """
+    todo = {
+        rendition: size for rendition, size in renditions.items()
+        if force or not storage.exists(rendition_name(name, rendition))
+    }
+    if not todo:
+        return []
+
+    written = []
+    with storage.open(name, 'rb') as fh:
+        original = Image.open(fh)
+        # Let the JPEG decoder downscale while decoding when it can
+        original.draft('RGB', max(todo.values()))
+        original = flatten(ImageOps.exif_transpose(original))
+    # Largest first so each smaller rendition resamples fewer pixels
+    for rendition, size in sorted(todo.items(), key=lambda item: -item[1][0]):
+        image = original.copy()
+        image.thumbnail(size, Image.Resampling.LANCZOS)
+        original = image
+        buffer = BytesIO()
+        image.save(buffer, 'JPEG', quality=85, optimize=True, progressive=True)
+        target = rendition_name(name, rendition)
+        if storage.exists(target):
+            storage.delete(target)
+        written.append(storage.save(target, ContentFile(buffer.getvalue())))
+    return written
+
+
+def make_renditions(field_file, force=False):
+    if not field_file:
+        return []
+    return render_stored_image(field_file.name, field_file.storage, force=force)
+
+
+def make_thumbnail(field_file):
+    """Return the thumbnail's storage name, building it if needed."""
+    if not field_file:
+        return None
+    make_renditions(field_file)
+    return thumbnail_name(field_file.name)
+
+
+def renditions_ready(field_file):
+    return getattr(field_file.instance, flag_name(field_file.field.name), False)
+
+
+def rendition_url(field_file, rendition):
+    """URL of `rendition`, falling back to the original until it has been built."""
+    if not field_file:
+        return None
+    if rendition != 'original' and renditions_ready(field_file):
+        return field_file.storage.url(rendition_name(field_file.name, rendition))
+    return field_file.url
+
+
+def mark_rendered(names):
+    """Flag every registered row whose image is one of `names` as having its renditions."""
+    names = list(names)
+    for model, field_name, flag in _registered:
+        for start in range(0, len(names), 1000):
+            model.objects.filter(**{f"{field_name}__in": names[start:start + 1000]}).update(**{flag: True})
+
+
+# ── Upload-time pool ────────────────────────────────────────────────────────
+
+def schedule_renditions(field_file):
+    """Queue `field_file` for rendering in the background pool."""
+    name, storage = field_file.name, field_file.storage
+    with _pool.lock:
+        if name in _in_flight:
+            return
+        _in_flight.add(name)
+    _pool.submit(_render_in_pool, name, storage)
+
+
+def _render_in_pool(name, storage):
+    try:
+        render_stored_image(name, storage)
+        mark_rendered([name])
+    except Exception:
+        logger.exception("Could not build renditions for %s", name)
+    finally:
+        with _pool.lock:
+            _in_flight.discard(name)
+
+
+def register_renditions(model, field_name):
+    """
+    Build renditions whenever `model.<field_name>` is saved with a new image.
+    The model needs a BooleanField `<field_name>_rendered`.
+    """
+    flag = flag_name(field_name)
+    attname = model._meta.get_field(field_name).attname
+    _registered.append((model, field_name, flag))
+
+    def remember(sender, instance, **kwargs):
+        instance._rendition_source = instance.__dict__.get(attname)
+
+    def before_save(sender, instance, **kwargs):
+        field_file = getattr(instance, field_name)
+        if (field_file.name or None) != (getattr(instance, '_rendition_source', None) or None):
+            setattr(instance, flag, False)  # a new image: its renditions don't exist yet
+
+    def on_save(sender, instance, **kwargs):
+        field_file = getattr(instance, field_name)
+        instance._rendition_source = field_file.name
+        if not field_file or getattr(instance, flag):
+            return
+        transaction.on_commit(lambda: schedule_renditions(field_file))
+
+    uid = f"renditions:{model._meta.label}.{field_name}"
+    post_init.connect(remember, sender=model, weak=False, dispatch_uid=uid)
+    pre_save.connect(before_save, sender=model, weak=False, dispatch_uid=uid)
+    post_save.connect(on_save, sender=model, weak=False, dispatch_uid=uid)
@@ -0,0 +1,389 @@
+# apps/core/imports.py
+"""
+Streaming spreadsheet import engine.
+
+Rows are read one at a time from CSV or XLSX, validated in batches with the
+app's own write serializer (see ImportTarget), written with bulk_create and
+reported on per row. Memory stays bounded by the batch size, not the file:
+a 50k-row sheet is never held in memory at once.
+
+Targets live with their models (apps/admissions/imports.py,
+apps/students/imports.py) and are looked up through TARGETS.
+"""
+import csv
+import datetime
+import io
+import logging
+import os
+import tempfile
+from datetime import timedelta
+
+from django.core.files import File
+from django.db import IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework import serializers
+
+from apps.academics.models import GradeLevel
+from .audit import record_saves
+from .models import ImportJob
+from .workers import BackgroundPool
+
+logger = logging.getLogger(__name__)
+
+TARGETS = {
+    ImportJob.Kind.APPLICATIONS: 'apps.admissions.imports.ApplicationImport',
+    ImportJob.Kind.STUDENTS: 'apps.students.imports.StudentImport',
+}
+
+BATCH_SIZE = 500
+STALE_AFTER = timedelta(minutes=10)  # RUNNING without progress this long means the worker died
+CLASS_COLUMNS = ('class', 'grade', 'grade_level', 'class_name')
+
+_pool = BackgroundPool('imports')
+
+
+# ── Reading ─────────────────────────────────────────────────────────────────
+
+def normalize_header(value):
+    return str(value or '').strip().lower().replace(' ', '_').replace('-', '_')
+
+
+def normalize_cell(value):
+    """Spreadsheet cells → the strings a serializer expects."""
+    if value is None:
+        return ''
+    if isinstance(value, datetime.datetime):
+        return value.date().isoformat() if value.time() == datetime.time() else value.isoformat()
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))  # Excel stores 2019 and 0712345678 as floats
+    return str(value).strip()
+
+
+def iter_csv(fh):
+    text = io.TextIOWrapper(fh, encoding='utf-8-sig', newline='')
+    reader = csv.reader(text)
+    header = [normalize_header(h) for h in next(reader, [])]
+    yield header
+    for row in reader:
+        yield [cell.strip() for cell in row]
+
+
+def iter_xlsx(fh):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("XLSX imports need the openpyxl package; upload a CSV instead.")
+    # read_only streams rows from the sheet XML instead of building the workbook
+    workbook = load_workbook(fh, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        yield [normalize_header(h) for h in next(rows, ())]
+        for row in rows:
+            yield [normalize_cell(cell) for cell in row]
+    finally:
+        workbook.close()
+
+
+def iter_rows(fh, name):
+    """Yield the normalized header, then each row as a list of strings."""
+    ext = os.path.splitext(name)[1].lower()
+    if ext in ('.xlsx', '.xlsm'):
+        return iter_xlsx(fh)
+    if ext in ('.csv', '.txt'):
+        return iter_csv(fh)
+    raise ValueError(f"Unsupported file type '{ext}'; upload .csv or .xlsx")
+
+
+def estimate_rows(fh, name):
+    """Cheap row count for progress: XLSX sheet dimensions, CSV newline count."""
+    ext = os.path.splitext(name)[1].lower()
+    if ext in ('.xlsx', '.xlsm'):
+        try:
+            from openpyxl import load_workbook
+            workbook = load_workbook(fh, read_only=True)
+            max_row = workbook.active.max_row
+            workbook.close()
+            return max(max_row - 1, 0) if max_row else None
+        except Exception:
+            return None
+    lines = 0
+    for chunk in iter(lambda: fh.read(1024 * 1024), b''):
+        lines += chunk.count(b'\n')
+    return max(lines - 1, 0)
+
+
+# ── Targets ─────────────────────────────────────────────────────────────────
+
+class GradeLevelNameField(serializers.Field):
+    """
+    Resolves a class by name, short name or code against the grade level map
+    preloaded into the serializer context, so validation never queries per row.
+    """
+
+    def to_internal_value(self, data):
+        key = str(data).strip().casefold()
+        matches = self.context['grade_levels'].get(key, [])
+        if not matches:
+            raise serializers.ValidationError(f"Unknown class '{data}'.")
+        if len(matches) > 1:
+            raise serializers.ValidationError(
+                f"'{data}' matches {len(matches)} grade levels; use the full class name."
+            )
+        return matches[0]
+
+    def to_representation(self, value):
+        return value.name if value else None
+
+
+class ImportTarget:
+    """
+    What an import writes. Subclasses name the model, a serializer (usually the
+    app's create/update serializer with per-row query fields swapped out) and
+    the column that holds the class name.
+    """
+    model = None
+    serializer_class = None
+    class_field = None
+    batch_size = BATCH_SIZE
+
+    def __init__(self, school, user=None):
+        self.school = school
+        self.user = user
+        grade_levels = {}
+        for level in GradeLevel.objects.filter(school=school):
+            for key in {level.name, level.short_name, level.code} - {'', None}:
+                grade_levels.setdefault(key.strip().casefold(), []).append(level)
+        self.context = {'grade_levels': grade_levels, 'school': school}
+
+    def prepare(self, record):
+        """Raw row dict → serializer data; blank cells are left out so defaults apply."""
+        data = {key: value for key, value in record.items() if key and value != ''}
+        for alias in CLASS_COLUMNS:
+            if alias in data and self.class_field not in data:
+                data[self.class_field] = data.pop(alias)
+        return data
+
+    def check_batch(self, rows):
+        """
+        Set-based checks the serializer would otherwise do per row (unique
+        columns). `rows` is a list of (row_number, validated_data); return
+        {row_number: error message} for rows to reject.
+        """
+        return {}
+
+    def build(self, validated_data):
+        return self.model(school=self.school, **validated_data)
+
+    def after_create(self, instances):
+        """Hook for work save() would have done; runs in the batch's transaction."""
+
+
+def get_target(kind, school, user=None):
+    return import_string(TARGETS[kind])(school, user)
+
+
+# ── Running ─────────────────────────────────────────────────────────────────
+
+class Importer:
+    def __init__(self, target, dry_run=False, progress=None):
+        self.target = target
+        self.dry_run = dry_run
+        self.progress = progress or (lambda importer: None)
+        self.processed = self.created = self.failed = 0
+        # One instance for the whole file: DRF builds a serializer's fields per
+        # instance, which would otherwise dominate the per-row cost
+        self.serializer = target.serializer_class(context=target.context)
+
+    def run(self, rows, report):
+        """
+        Consume `rows` (header first) and write rejected rows to the text
+        stream `report` as CSV. Returns (processed, created, failed).
+        """
+        rows = iter(rows)
+        header = next(rows, None)
+        if not header:
+            raise ValueError("The file is empty.")
+
+        self.writer = csv.writer(report)
+        self.writer.writerow(['row', 'errors'] + header)
+
+        batch = []
+        for number, values in enumerate(rows, start=2):  # row 1 is the header
+            if not any(values):
+                continue
+            batch.append((number, values))
+            if len(batch) >= self.target.batch_size:
+                self.run_batch(header, batch)
+                batch = []
+        if batch:
+            self.run_batch(header, batch)
+        return self.processed, self.created, self.failed
+
+    def run_batch(self, header, batch):
+        valid, errors = [], {}
+        raw = dict(batch)
+        for number, values in batch:
+            try:
+                data = self.serializer.run_validation(self.target.prepare(dict(zip(header, values))))
+            except serializers.ValidationError as exc:
+                errors[number] = format_errors(exc.detail)
+            else:
+                valid.append((number, data))
+
+        errors.update(self.target.check_batch(valid))
+        valid = [(number, data) for number, data in valid if number not in errors]
+
+        if not self.dry_run and valid:
+            errors.update(self.write(valid))
+
+        for number in sorted(errors):
+            self.writer.writerow([number, errors[number]] + raw[number])
+        self.processed += len(batch)
+        self.failed += len(errors)
+        self.created += len(batch) - len(errors)
+        self.progress(self)
+
+    def write(self, valid):
+        instances = [self.target.build(data) for _, data in valid]
+        try:
+            with transaction.atomic():
+                self.target.model.objects.bulk_create(instances)
+                self.target.after_create(instances)
+                record_saves(instances, created=True)  # bulk_create sends no post_save
+            return {}
+        except IntegrityError:
+            pass
+
+        # Something in the batch collided (e.g. a concurrent insert); isolate it
+        errors = {}
+        for number, data in valid:
+            instance = self.target.build(data)
+            try:
+                with transaction.atomic():
+                    self.target.model.objects.bulk_create([instance])
+                    self.target.after_create([instance])
+                    record_saves([instance], created=True)
+            except IntegrityError as e:
+                errors[number] = f"Conflicts with an existing record: {e}".splitlines()[0]
+        return errors
+
+
+def format_errors(errors):
+    parts = []
+    for field, messages in errors.items():
+        messages = messages if isinstance(messages, list) else [messages]
+        text = '; '.join(str(m) for m in messages)
+        parts.append(text if field == 'non_field_errors' else f"{field}: {text}")
+    return ' | '.join(parts)
+
+
+def run_import(job, on_progress=None):
+    """
+    Run a QUEUED ImportJob to completion, recording progress and the error
+    report. The job is claimed first, so it never runs twice; a job someone
+    else has claimed is returned untouched.
+    """
+    claimed = ImportJob.objects.filter(pk=job.pk, state=ImportJob.State.QUEUED).update(
+        state=ImportJob.State.RUNNING, updated_at=timezone.now()
+    )
+    if not claimed:
+        logger.info("Import %s was already claimed", job.pk)
+        return job
+    job.state = ImportJob.State.RUNNING
+    name = job.file.name
+
+    def progress(importer):
+        ImportJob.objects.filter(pk=job.pk).update(
+            processed_rows=importer.processed,
+            created_rows=importer.created,
+            error_rows=importer.failed,
+            updated_at=timezone.now(),
+        )
+        if on_progress:
+            on_progress(importer, job.total_rows)
+
+    try:
+        with job.file.storage.open(name, 'rb') as fh:
+            total = estimate_rows(fh, name)
+        job.total_rows = total
+        ImportJob.objects.filter(pk=job.pk).update(total_rows=total)
+
+        importer = Importer(get_target(job.kind, job.school, job.created_by), job.dry_run, progress)
+        with tempfile.TemporaryFile(mode='w+', newline='', encoding='utf-8') as report:
+            with job.file.storage.open(name, 'rb') as fh:
+                importer.run(iter_rows(fh, name), report)
+            if importer.failed:
+                report.seek(0)
+                job.report.save(f"{job.id}.csv", File(report), save=False)
+
+        job.state = ImportJob.State.DONE
+        job.total_rows = importer.processed
+        job.processed_rows = importer.processed
+        job.created_rows = importer.created  # "would be created" on a dry run
+        job.error_rows = importer.failed
+    except Exception as e:
+        logger.exception("Import %s failed", job.pk)
+        job.state = ImportJob.State.FAILED
+        job.error = str(e)
+    job.finished_at = job.updated_at = timezone.now()
+    job.save(update_fields=[
+        'state', 'total_rows', 'processed_rows', 'created_rows', 'error_rows',
+        'report', 'error', 'updated_at', 'finished_at',
+    ])
+    return job
+
+
+def start_import(job):
+    """Run `job` on a background thread once the surrounding transaction commits."""
+    def work():
+        try:
+            run_import(ImportJob.objects.select_related('school', 'created_by').get(pk=job.pk))
+        finally:
+            close_old_connections()
+
+    transaction.on_commit(lambda: _pool.submit(work))
+
+
+# ── Recovery ────────────────────────────────────────────────────────────────
+
+ABANDONED_ERROR = (
+    "The import stopped part-way because its worker went away (a restart or deploy). "
+    "Rows already imported were kept; upload the remaining rows again."
+)
+
+
+def abandoned_jobs(now=None):
+    """
+    (jobs to run again, jobs to fail) among those no worker is running any
+    more: QUEUED or RUNNING without progress for STALE_AFTER. A dry run can
+    simply start over; a real import that wrote some batches can't, since
+    running it again would create those rows twice.
+    """
+    cutoff = (now or timezone.now()) - STALE_AFTER
+    stale = ImportJob.objects.filter(updated_at__lt=cutoff).select_related('school', 'created_by').order_by('created_at')
+    queued = list(stale.filter(state=ImportJob.State.QUEUED))
+    running = list(stale.filter(state=ImportJob.State.RUNNING))
+    return queued + [job for job in running if job.dry_run], [job for job in running if not job.dry_run]
+
+
+def recover_imports(now=None):
+    """Requeue or fail abandoned jobs (see abandoned_jobs); returns (requeued, failed)."""
+    now = now or timezone.now()
+    cutoff = now - STALE_AFTER
+    rerun, dead = abandoned_jobs(now)
+    # Conditional updates: a job whose worker made progress meanwhile is left alone
+    failed = ImportJob.objects.filter(
+        pk__in=[job.pk for job in dead], state=ImportJob.State.RUNNING, updated_at__lt=cutoff,
+    ).update(state=ImportJob.State.FAILED, error=ABANDONED_ERROR, finished_at=now, updated_at=now)
+    ImportJob.objects.filter(
+        pk__in=[job.pk for job in rerun if job.state == ImportJob.State.RUNNING],
+        state=ImportJob.State.RUNNING, updated_at__lt=cutoff,
+    ).update(state=ImportJob.State.QUEUED, processed_rows=0, created_rows=0, error_rows=0, updated_at=now)
+    requeued = list(
+        ImportJob.objects.select_related('school', 'created_by')
+        .filter(pk__in=[job.pk for job in rerun], state=ImportJob.State.QUEUED)
+    )
+    return requeued, failed
@@ -0,0 +1,87 @@
+# apps/core/management/commands/bench_audit_log.py
+import statistics
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.core import audit
+from apps.core.models import AuditLog
+from apps.school.models import School
+from apps.students.models import Guardian
+
+
+def percentiles(timings):
+    timings = sorted(timings)
+    return statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure what the audit log adds to a save: guardian updates, each in its "
+        "own transaction like a request, with capture on and suspended in turn, "
+        "then how fast the buffered entries are written. Uses a throwaway school."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--records", type=int, default=200)
+        parser.add_argument("--saves", type=int, default=2000, help="Saves per mode")
+        parser.add_argument("--keep", action="store_true", help="Keep the benchmark school afterwards")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            self.stdout.write(self.style.WARNING(
+                f"Running on {connection.vendor}; numbers are only meaningful on PostgreSQL."
+            ))
+
+        school = School.objects.create(name=f"bench-audit-{uuid.uuid4().hex[:8]}")
+        try:
+            with audit.suspended():
+                Guardian.objects.bulk_create([
+                    Guardian(school=school, full_name=f"Guardian {n}", phone=f"0700{n:06d}")
+                    for n in range(options["records"])
+                ])
+            guardians = list(Guardian.objects.select_related('school').filter(school=school))
+            self.compare(guardians, options["saves"])
+            self.write_rate(school)
+        finally:
+            if not options["keep"]:
+                AuditLog.objects.filter(school=school).delete()
+                school.delete()
+
+    def compare(self, guardians, saves):
+        def save(guardian, n):
+            guardian.occupation = f"Occupation {n}"
+            started = time.perf_counter()
+            with transaction.atomic():
+                guardian.save()
+            return (time.perf_counter() - started) * 1000
+
+        # Alternate the modes save by save so neither gets a warmer cache
+        timings = {'audited': [], 'suspended': []}
+        for n in range(saves):
+            guardian = guardians[n % len(guardians)]
+            timings['audited'].append(save(guardian, n))
+            with audit.suspended():
+                timings['suspended'].append(save(guardian, -n))
+        audit.flush()
+
+        (on_p50, on_p95), (off_p50, off_p95) = (percentiles(timings[mode]) for mode in ('audited', 'suspended'))
+        self.stdout.write(f"save ms, audit suspended: p50={off_p50:.3f} p95={off_p95:.3f}")
+        self.stdout.write(f"save ms, audited:         p50={on_p50:.3f} p95={on_p95:.3f}")
+        style = self.style.SUCCESS if on_p50 - off_p50 < 1 else self.style.WARNING
+        self.stdout.write(style(f"overhead per save: p50={on_p50 - off_p50:.3f} ms, p95={on_p95 - off_p95:.3f} ms"))
+
+    def write_rate(self, school):
+        entries = [
+            (Guardian, str(n), 'UPDATE', {'occupation': ["Before", "After"]}, None, school.id, timezone.now())
+            for n in range(10000)
+        ]
+        with audit._buffer_lock:
+            audit._buffer.extend(entries)
+        started = time.perf_counter()
+        written = audit.flush()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"flush: {written:,} entries in {elapsed:.2f}s ({written / elapsed:,.0f}/s)")
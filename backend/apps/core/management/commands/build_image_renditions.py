@@ -0,0 +1,75 @@
+# apps/core/management/commands/build_image_renditions.py
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from apps.admissions.models import Application
+from apps.core.images import mark_rendered, render_stored_image
+from apps.school.models import School
+from apps.students.models import Student
+
+SOURCES = {
+    'applications': (Application, 'photo'),
+    'students': (Student, 'photo'),
+    'schools': (School, 'logo'),
+}
+
+
+def render_one(args):
+    """Runs in a worker process. Returns (name, renditions written, error)."""
+    name, force = args
+    try:
+        return name, len(render_stored_image(name, force=force)), None
+    except FileNotFoundError:
+        return name, 0, "missing"
+    except Exception as e:
+        return name, 0, str(e)
+
+
+class Command(BaseCommand):
+    help = (
+        "Build thumbnail and medium renditions for existing applicant photos, "
+        "student photos and school logos, using a process pool."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--only", choices=sorted(SOURCES), action="append",
+                            help="Limit to these image sources (repeatable)")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument("--force", action="store_true", help="Rebuild renditions that already exist")
+
+    def handle(self, *args, **options):
+        names = set()
+        for source in options["only"] or sorted(SOURCES):
+            model, field = SOURCES[source]
+            # An application's photo is reused by the student it becomes; render once
+            names.update(
+                model.objects.exclude(**{field: ''}).exclude(**{f"{field}__isnull": True})
+                .values_list(field, flat=True).distinct().iterator()
+            )
+        self.stdout.write(f"{len(names)} images to check")
+
+        # Forked workers must not inherit open DB sockets
+        connections.close_all()
+        built = failed = 0
+        rendered = []
+        with ProcessPoolExecutor(max_workers=options["workers"], initializer=django.setup) as pool:
+            work = ((name, options["force"]) for name in sorted(names))
+            for done, (name, written, error) in enumerate(pool.map(render_one, work, chunksize=16), 1):
+                if error:
+                    failed += 1
+                    self.stderr.write(f"  {name}: {error}")
+                else:
+                    rendered.append(name)
+                    built += bool(written)
+                if done % 500 == 0:
+                    self.stdout.write(f"… {done}/{len(names)}")
+
+        # Serializers only point at renditions of images flagged as rendered
+        mark_rendered(rendered)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rendered {built} images ({len(names) - built - failed} already done, {failed} failed)"
+        ))
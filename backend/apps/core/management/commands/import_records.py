@@ -0,0 +1,55 @@
+# apps/core/management/commands/import_records.py
+import os
+import time
+
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.imports import run_import
+from apps.core.models import ImportJob
+from apps.school.models import School
+
+
+class Command(BaseCommand):
+    help = (
+        "Import applications or students from a CSV/XLSX file in the foreground, "
+        "printing progress. Rejected rows are written to the job's error report."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=ImportJob.Kind.values)
+        parser.add_argument("path", help="Path to a .csv or .xlsx file")
+        parser.add_argument("--school", required=True, help="School UUID")
+        parser.add_argument("--dry-run", action="store_true", help="Validate only, write nothing")
+
+    def handle(self, *args, **options):
+        try:
+            school = School.objects.get(pk=options["school"])
+        except (School.DoesNotExist, ValueError):
+            raise CommandError(f"School {options['school']} not found")
+
+        job = ImportJob(school=school, kind=options["kind"], dry_run=options["dry_run"])
+        with open(options["path"], "rb") as fh:
+            job.file.save(os.path.basename(options["path"]), File(fh))
+
+        started = time.perf_counter()
+        self.stdout.write(f"Importing {options['path']} as job {job.pk}...")
+
+        def progress(importer, total):
+            of_total = f"/~{total}" if total else ""
+            self.stdout.write(
+                f"… {importer.processed}{of_total} rows, {importer.failed} rejected "
+                f"({importer.processed / (time.perf_counter() - started):,.0f} rows/s)"
+            )
+
+        job = run_import(job, on_progress=progress)
+        elapsed = time.perf_counter() - started
+
+        if job.state == ImportJob.State.FAILED:
+            raise CommandError(f"Import failed: {job.error}")
+        verb = "would be created" if job.dry_run else "created"
+        self.stdout.write(self.style.SUCCESS(
+            f"{job.processed_rows} rows in {elapsed:.1f}s: {job.created_rows} {verb}, {job.error_rows} rejected"
+        ))
+        if job.report:
+            self.stdout.write(f"Error report: {job.report.name}")
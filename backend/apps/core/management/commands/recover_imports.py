@@ -0,0 +1,41 @@
+# apps/core/management/commands/recover_imports.py
+from django.core.management.base import BaseCommand
+
+from apps.core.imports import STALE_AFTER, abandoned_jobs, recover_imports, run_import
+from apps.core.models import ImportJob
+
+
+class Command(BaseCommand):
+    help = (
+        "Find spreadsheet imports left behind by a restart or deploy (QUEUED or "
+        "RUNNING with no progress for a while). With --apply, abandoned queued jobs "
+        "and dry runs are run again here, and part-written imports are marked FAILED. "
+        "Meant for the deploy's release step or a periodic job."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--apply", action="store_true", help="Recover the jobs (default: only list them)")
+
+    def handle(self, *args, **options):
+        rerun, dead = abandoned_jobs()
+        minutes = int(STALE_AFTER.total_seconds() // 60)
+        for job in rerun:
+            self.stdout.write(f"  run again  {job.pk} {job.kind} for {job.school} ({job.state}, since {job.updated_at:%Y-%m-%d %H:%M})")
+        for job in dead:
+            self.stdout.write(f"  fail       {job.pk} {job.kind} for {job.school} ({job.processed_rows} rows done)")
+        if not options["apply"]:
+            self.stdout.write(
+                f"{len(rerun)} to run again, {len(dead)} to fail (no progress for {minutes}+ minutes). "
+                "Re-run with --apply."
+            )
+            return
+
+        requeued, failed = recover_imports()
+        done = 0
+        for job in requeued:
+            self.stdout.write(f"Running import {job.pk}...")
+            job = run_import(job)
+            done += job.state == ImportJob.State.DONE
+        self.stdout.write(self.style.SUCCESS(
+            f"{done}/{len(requeued)} abandoned imports completed, {failed} marked failed"
+        ))
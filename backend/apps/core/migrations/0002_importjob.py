@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:53
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        ('school', '0006_alter_school_academic_year_end_month_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('applications', 'Applications'), ('students', 'Students')], max_length=20)),
+                ('file', models.FileField(max_length=255, upload_to='imports/')),
+                ('dry_run', models.BooleanField(default=False)),
+                ('state', models.CharField(choices=[('QUEUED', 'Queued'), ('RUNNING', 'Running'), ('DONE', 'Done'), ('FAILED', 'Failed')], default='QUEUED', max_length=20)),
+                ('total_rows', models.PositiveIntegerField(blank=True, null=True)),
+                ('processed_rows', models.PositiveIntegerField(default=0)),
+                ('created_rows', models.PositiveIntegerField(default=0)),
+                ('error_rows', models.PositiveIntegerField(default=0)),
+                ('report', models.FileField(blank=True, max_length=255, upload_to='imports/reports/')),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('school', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='import_jobs', to='school.school')),
+            ],
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:09
+
+import django.core.serializers.json
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_importjob'),
+        ('school', '0006_alter_school_academic_year_end_month_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auditlog',
+            name='changes',
+            field=models.JSONField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder),
+        ),
+        migrations.AddField(
+            model_name='auditlog',
+            name='school',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='audit_logs', to='school.school'),
+        ),
+        migrations.AlterField(
+            model_name='auditlog',
+            name='action',
+            field=models.CharField(choices=[('CREATE', 'Create'), ('UPDATE', 'Update'), ('DELETE', 'Delete')], max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='auditlog',
+            name='record_id',
+            field=models.CharField(max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='auditlog',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['school', '-timestamp'], name='auditlog_school_time'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['table_name', 'record_id', '-timestamp'], name='auditlog_record_time'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['-timestamp'], name='auditlog_time'),
+        ),
+    ]
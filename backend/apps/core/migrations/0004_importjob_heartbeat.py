@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:25
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_audit_log_changes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
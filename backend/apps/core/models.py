@@ -1,17 +1,41 @@
 # core/models.py
 import uuid
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.utils import timezone
 from apps.accounts.models import User
 
 class AuditLog(models.Model):
+    """
+    One create, update or delete of an audited record, written in batches by
+    apps.core.audit. `changes` is {field: [old, new]} for an update and the
+    filled-in fields for a create.
+    """
+    class Action(models.TextChoices):
+        CREATE = "CREATE", "Create"
+        UPDATE = "UPDATE", "Update"
+        DELETE = "DELETE", "Delete"
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    school = models.ForeignKey(
+        'school.School', on_delete=models.CASCADE, null=True, blank=True, related_name='audit_logs', db_index=False
+    )
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
-    action = models.CharField(max_length=50)
+    action = models.CharField(max_length=50, choices=Action.choices)
     table_name = models.CharField(max_length=50)
-    record_id = models.UUIDField()
-    timestamp = models.DateTimeField(auto_now_add=True)
-     # Optional school FK if you want to filter audit by school
-    # school = models.ForeignKey('core.School', on_delete=models.CASCADE, null=True, blank=True)
+    record_id = models.CharField(max_length=64)  # UUID or integer primary keys
+    changes = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    timestamp = models.DateTimeField(default=timezone.now)  # when the change was made, not written
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['school', '-timestamp'], name='auditlog_school_time'),
+            models.Index(fields=['table_name', 'record_id', '-timestamp'], name='auditlog_record_time'),
+            models.Index(fields=['-timestamp'], name='auditlog_time'),
+        ]
+
+    def __str__(self):
+        return f"{self.action} {self.table_name} {self.record_id}"
 
 class SyncQueue(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -22,3 +46,40 @@ class SyncQueue(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
      # Optional school FK
     # school = models.ForeignKey('core.School', on_delete=models.CASCADE, null=True, blank=True)
+
+
+class ImportJob(models.Model):
+    """
+    A spreadsheet import (CSV/XLSX) of applications or students, run in the
+    background by apps.core.imports. Progress counters are updated once per
+    batch; rows that fail validation are written to `report`.
+    """
+    class Kind(models.TextChoices):
+        APPLICATIONS = "applications", "Applications"
+        STUDENTS = "students", "Students"
+
+    class State(models.TextChoices):
+        QUEUED = "QUEUED", "Queued"
+        RUNNING = "RUNNING", "Running"
+        DONE = "DONE", "Done"
+        FAILED = "FAILED", "Failed"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    school = models.ForeignKey('school.School', on_delete=models.CASCADE, related_name='import_jobs')
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    file = models.FileField(upload_to='imports/', max_length=255)
+    dry_run = models.BooleanField(default=False)
+    state = models.CharField(max_length=20, choices=State.choices, default=State.QUEUED)
+    total_rows = models.PositiveIntegerField(null=True, blank=True)  # estimate until finished
+    processed_rows = models.PositiveIntegerField(default=0)
+    created_rows = models.PositiveIntegerField(default=0)
+    error_rows = models.PositiveIntegerField(default=0)
+    report = models.FileField(upload_to='imports/reports/', max_length=255, blank=True)
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(default=timezone.now)  # heartbeat: touched on every progress update
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.kind} import {self.id} ({self.state})"
@@ -0,0 +1,56 @@
+# apps/core/phones.py
+"""
+Phone numbers in E.164 (+254712345678), so 0712 345 678, +254 712 345678
+and 254-712-345-678 compare equal.
+
+Local numbers need the school's country: its calling code and the length of
+a national number without the trunk 0. Countries missing from COUNTRIES
+only normalise numbers written internationally (+… or 00…).
+"""
+import re
+
+# country (as stored on School.country, lower-cased) → (calling code, national number length)
+COUNTRIES = {
+    'kenya': ('254', 9),
+    'uganda': ('256', 9),
+    'tanzania': ('255', 9),
+    'rwanda': ('250', 9),
+    'burundi': ('257', 8),
+    'ethiopia': ('251', 9),
+    'south sudan': ('211', 9),
+    'somalia': ('252', 9),
+    'nigeria': ('234', 10),
+    'ghana': ('233', 9),
+    'zambia': ('260', 9),
+    'malawi': ('265', 9),
+    'south africa': ('27', 9),
+}
+DEFAULT_COUNTRY = 'kenya'
+
+SEPARATORS_RE = re.compile(r"[\s\-().\/]")
+
+
+def to_e164(value, country=DEFAULT_COUNTRY):
+    """`value` as +<digits>, or "" when it can't be read as a phone number."""
+    number = SEPARATORS_RE.sub('', value or '')
+    if number.startswith('+'):
+        digits = number[1:]
+    elif number.startswith('00'):
+        digits = number[2:]
+    else:
+        digits = None
+    if digits is not None:
+        return f"+{digits}" if digits.isdigit() and 8 <= len(digits) <= 15 else ""
+
+    if not number.isdigit():
+        return ""
+    code, length = COUNTRIES.get((country or DEFAULT_COUNTRY).strip().lower(), (None, None))
+    if code is None:
+        return ""
+    if number.startswith(code) and len(number) == len(code) + length:
+        return f"+{number}"
+    if number.startswith('0') and len(number) == length + 1:
+        return f"+{code}{number[1:]}"
+    if len(number) == length:
+        return f"+{code}{number}"
+    return ""
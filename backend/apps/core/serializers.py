@@ -1,6 +1,7 @@
 from rest_framework import serializers
-from .models import AuditLog, SyncQueue
+from .models import AuditLog, SyncQueue, ImportJob
 from apps.accounts.serializers import UserSerializer
+from .images import RENDITIONS, rendition_url
 
 # ----------------------------
 # AUDIT LOG SERIALIZERS
@@ -16,28 +17,16 @@ class AuditLogSerializer(serializers.ModelSerializer):
         model = AuditLog
         fields = [
             'id',
+            'school',
             'user',
             'user_email',
             'action',
             'table_name',
             'record_id',
+            'changes',
             'timestamp'
         ]
-
-
-class AuditLogCreateUpdateSerializer(serializers.ModelSerializer):
-    """
-    CREATE / UPDATE: Typically used internally for logging
-    """
-    class Meta:
-        model = AuditLog
-        fields = [
-            'id',
-            'user',
-            'action',
-            'table_name',
-            'record_id'
-        ]
+        read_only_fields = fields
 
 
 # ----------------------------
@@ -73,3 +62,76 @@ class SyncQueueCreateUpdateSerializer(serializers.ModelSerializer):
             'operation',
             'synced'
         ]
+
+
+# ----------------------------
+# IMPORT JOB SERIALIZERS
+# ----------------------------
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    """
+    READ-ONLY: progress of a spreadsheet import, polled by the frontend
+    """
+    progress = serializers.SerializerMethodField()
+    report = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ImportJob
+        fields = [
+            'id', 'kind', 'dry_run', 'state',
+            'total_rows', 'processed_rows', 'created_rows', 'error_rows', 'progress',
+            'report', 'error', 'created_at', 'finished_at',
+        ]
+
+    def get_progress(self, obj):
+        if obj.state == ImportJob.State.DONE:
+            return 100
+        if not obj.total_rows:
+            return 0
+        return min(99, int(obj.processed_rows * 100 / obj.total_rows))
+
+    def get_report(self, obj):
+        # Served by ImportJobViewSet.report so it stays behind authentication
+        return f"/api/core/imports/{obj.id}/report/" if obj.report else None
+
+
+class ImportJobCreateSerializer(serializers.ModelSerializer):
+    """
+    CREATE: multipart upload of a .csv / .xlsx file
+    """
+    class Meta:
+        model = ImportJob
+        fields = ['id', 'kind', 'file', 'dry_run']
+        read_only_fields = ['id']
+
+    def validate_file(self, value):
+        ext = value.name.rsplit('.', 1)[-1].lower()
+        if ext not in ('csv', 'xlsx', 'xlsm'):
+            raise serializers.ValidationError("Upload a .csv or .xlsx file.")
+        return value
+
+
+# ----------------------------
+# IMAGE RENDITION FIELD
+# ----------------------------
+
+class ImageRenditionField(serializers.ImageField):
+    """
+    Image field that serves a resized rendition instead of the original upload.
+    Clients can override per request with ?image_size=thumb|medium|original.
+    """
+
+    def __init__(self, rendition='thumb', **kwargs):
+        self.rendition = rendition
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        request = self.context.get('request')
+        rendition = self.rendition
+        requested = getattr(request, 'query_params', {}).get('image_size')
+        if requested == 'original' or requested in RENDITIONS:
+            rendition = requested
+        url = rendition_url(value, rendition)
+        return request.build_absolute_uri(url) if request is not None else url
@@ -1,10 +1,11 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import AuditLogViewSet, SyncQueueViewSet
+from .views import AuditLogViewSet, SyncQueueViewSet, ImportJobViewSet
 
 router = DefaultRouter()
 router.register(r'audit-logs', AuditLogViewSet, basename='audit-logs')
 router.register(r'sync-queue', SyncQueueViewSet, basename='sync-queue')
+router.register(r'imports', ImportJobViewSet, basename='imports')
 
 urlpatterns = [
     path('', include(router.urls)),
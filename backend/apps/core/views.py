@@ -1,27 +1,50 @@
-from rest_framework.viewsets import ModelViewSet
+from uuid import UUID
+
+from django.http import FileResponse
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import mixins, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.response import Response
+from rest_framework.viewsets import ModelViewSet, GenericViewSet, ReadOnlyModelViewSet
 from rest_framework.permissions import IsAuthenticated
-from .models import AuditLog, SyncQueue
+from apps.school.models import School
+from .imports import start_import
+from .models import AuditLog, SyncQueue, ImportJob
 from .serializers import (
     AuditLogSerializer,
-    AuditLogCreateUpdateSerializer,
     SyncQueueSerializer,
-    SyncQueueCreateUpdateSerializer
+    SyncQueueCreateUpdateSerializer,
+    ImportJobSerializer,
+    ImportJobCreateSerializer,
 )
 
 # ----------------------------
 # AUDIT LOG VIEWSET
 # ----------------------------
-class AuditLogViewSet(ModelViewSet):
-    queryset = AuditLog.objects.select_related('user').all().order_by('-timestamp')
+class AuditLogViewSet(ReadOnlyModelViewSet):
+    """
+    Audited changes, newest first, for the user's schools. Written by
+    apps.core.audit, so there is nothing to create or edit here.
+    """
+    serializer_class = AuditLogSerializer
     permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = {
+        'school': ['exact'],
+        'table_name': ['exact'],
+        'record_id': ['exact'],
+        'action': ['exact'],
+        'user': ['exact'],
+        'timestamp': ['gte', 'lte'],
+    }
 
-    def get_serializer_class(self):
-        """
-        Use read-only serializer for list/retrieve, write serializer for create/update
-        """
-        if self.action in ['create', 'update', 'partial_update']:
-            return AuditLogCreateUpdateSerializer
-        return AuditLogSerializer
+    def get_queryset(self):
+        user = self.request.user
+        logs = AuditLog.objects.select_related('user').order_by('-timestamp')
+        if user.is_superuser:
+            return logs
+        return logs.filter(school__in=user.schools.all())
 
 
 # ----------------------------
@@ -38,3 +61,55 @@ class SyncQueueViewSet(ModelViewSet):
         if self.action in ['create', 'update', 'partial_update']:
             return SyncQueueCreateUpdateSerializer
         return SyncQueueSerializer
+
+
+# ----------------------------
+# IMPORT JOB VIEWSET
+# ----------------------------
+class ImportJobViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin,
+                       mixins.ListModelMixin, GenericViewSet):
+    """
+    Bulk CSV/XLSX import of applications or students for the X-School-ID school.
+    POST returns 202 straight away; poll the job for progress and fetch
+    /report/ for the rows that were rejected.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        user = self.request.user
+        jobs = ImportJob.objects.order_by('-created_at')
+        if user.is_superuser:
+            return jobs
+        return jobs.filter(school__in=user.schools.all())
+
+    def get_serializer_class(self):
+        if self.action == 'create':
+            return ImportJobCreateSerializer
+        return ImportJobSerializer
+
+    def get_school(self):
+        try:
+            school_id = UUID(self.request.headers.get('X-School-ID', ''))
+        except ValueError:
+            raise ValidationError({"detail": "X-School-ID header is required"})
+        schools = School.objects.all() if self.request.user.is_superuser else self.request.user.schools.all()
+        school = schools.filter(id=school_id).first()
+        if school is None:
+            raise PermissionDenied("You are not associated with this school.")
+        return school
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = serializer.save(school=self.get_school(), created_by=request.user)
+        start_import(job)
+        return Response(ImportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['get'])
+    def report(self, request, pk=None):
+        job = self.get_object()
+        if not job.report:
+            return Response({"detail": "No rejected rows for this import."}, status=status.HTTP_404_NOT_FOUND)
+        return FileResponse(job.report.open('rb'), as_attachment=True,
+                            filename=f"{job.kind}-import-errors.csv", content_type='text/csv')
+
@@ -0,0 +1,78 @@
+# apps/core/workers.py
+"""
+In-process background work.
+
+BackgroundPool is a thread pool started on first use, sized from a setting
+when it is; image renditions and spreadsheet imports run on one each.
+
+QueueWorker drains a queue kept in a database table (submission jobs, the
+email outbox) on such a pool. A drain stops once nothing is runnable, so
+after each one the worker asks when the next waiting row falls due (a
+retry in backoff, a claim gone stale) and kicks itself again then; without
+that a retry would wait for the next row to be queued. The worker only
+runs in the web process when its mode setting is "thread"; otherwise the
+queue is left to a management command.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundPool:
+    def __init__(self, name, threads=1, threads_setting=None):
+        self.name = name
+        self.threads = threads
+        self.threads_setting = threads_setting
+        self.lock = threading.Lock()
+        self._executor = None
+
+    def submit(self, fn, *args, **kwargs):
+        with self.lock:
+            if self._executor is None:
+                threads = getattr(settings, self.threads_setting, self.threads) if self.threads_setting else self.threads
+                self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix=self.name)
+        return self._executor.submit(fn, *args, **kwargs)
+
+
+class QueueWorker:
+    def __init__(self, name, drain, next_due, mode_setting, threads=1, threads_setting=None):
+        self.name = name
+        self.drain = drain
+        self.next_due = next_due
+        self.mode_setting = mode_setting
+        self.pool = BackgroundPool(name, threads, threads_setting)
+        self._wakeup = None  # (when, Timer) for the next row that isn't due yet
+
+    def kick(self):
+        if getattr(settings, self.mode_setting, 'thread') == 'thread':
+            self.pool.submit(self._run)
+
+    def _run(self):
+        try:
+            self.drain()
+            self.wake_at(self.next_due())
+        except Exception:
+            logger.exception("%s worker crashed", self.name)
+        finally:
+            close_old_connections()
+
+    def wake_at(self, when):
+        """Kick the worker again at `when`, unless an earlier wakeup is already set."""
+        if when is None:
+            return
+        with self.pool.lock:
+            if self._wakeup is not None and self._wakeup[0] <= when and self._wakeup[1].is_alive():
+                return
+            if self._wakeup is not None:
+                self._wakeup[1].cancel()
+            delay = max((when - timezone.now()).total_seconds(), 1.0)
+            timer = threading.Timer(delay, self.kick)
+            timer.daemon = True
+            timer.start()
+            self._wakeup = (when, timer)
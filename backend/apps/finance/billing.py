@@ -0,0 +1,218 @@
+# apps/finance/billing.py
+"""
+Term billing: turn FeeItem applicability into invoices and ledger charges.
+
+A FeeItem applies to a learner's current_class when its grade_levels
+include that grade, or when it names no grade at all. Applicability is
+read from the fee matrix (see fee_matrix.py), one row per grade and
+frequency, and the whole run is a handful of queries: students, matrix
+rows, lines already charged, then bulk inserts of invoices, lines and
+ledger charges.
+
+Runs are idempotent. Every line is charged for a period (the term for
+per-term and monthly items, the year for yearly ones, "once" for one-time
+ones) and a student is never charged an item twice for the same period,
+so re-running a term only bills what was added since: new learners, or
+new fee items, which go onto the learner's existing invoice for the term.
+
+Students have no department yet, so items restricted to departments can't
+be resolved and are left out (and reported) rather than charged to all.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import connection, transaction
+
+from apps.academics.models import GradeLevel
+from apps.students.models import Student
+from .ledger import post_entries
+from .models import FeeItem, FeeMatrix, Invoice, InvoiceLine, LedgerEntry
+
+
+def lock_billing(school_id):
+    """Serialise billing runs within a school for the current transaction."""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [f"billing:{school_id}"])
+
+
+def charge_period(frequency, term, year):
+    return {
+        'per_term': term,
+        'monthly': term,
+        'per_year': str(year),
+        'one_time': 'once',
+    }[frequency]
+
+
+def charges_for(item, frequency, term, year, months):
+    """(period, description, amount) for one fee matrix item in this run."""
+    amount = Decimal(item['amount'])
+    if frequency == 'monthly':
+        return charge_period(frequency, term, year), f"{item['name']} × {months} months", amount * months
+    return charge_period(frequency, term, year), item['name'], amount
+
+
+def grade_charges(school, term, year, months):
+    """
+    {grade_level_id: [(item, period, description, amount)]} from the fee
+    matrix's department-less cells, None being learners without a class.
+    """
+    by_grade = defaultdict(list)
+    for row in FeeMatrix.objects.filter(school=school, department__isnull=True):
+        by_grade[row.grade_level_id].extend(
+            (item, *charges_for(item, row.frequency, term, year, months)) for item in row.items
+        )
+    for charges in by_grade.values():
+        charges.sort(key=lambda charge: (charge[0]['display_order'], charge[0]['category'], charge[0]['name']))
+    return by_grade
+
+
+def plan_billing(school, term, year, months=3):
+    """
+    ({student_id: [(item, period, description, amount)]} of what is still
+    to be charged, summary) for billing `school`'s active learners for
+    `term`. Items are fee matrix entries (dicts with id, name and amount).
+    """
+    matrix = grade_charges(school, term, year, months)
+    restricted = (
+        FeeItem.objects
+        .filter(category__school=school, is_active=True, departments__isnull=False)
+        .distinct()
+        .order_by('name')
+        .values_list('name', flat=True)
+    )
+
+    students = list(
+        Student.objects
+        .filter(school=school, status=Student.Status.ACTIVE)
+        .order_by('id')
+        .values_list('id', 'current_class_id')
+    )
+
+    # A class no fee item names pays what learners without a class pay
+    by_grade = {
+        grade_id: matrix[grade_id] if grade_id in matrix else matrix[None]
+        for grade_id in {grade_id for _, grade_id in students}
+    }
+    item_ids = {charge[0]['id'] for charges in by_grade.values() for charge in charges}
+
+    periods = {charge_period(frequency, term, year) for frequency in ('per_term', 'per_year', 'one_time')}
+    charged = set(
+        InvoiceLine.objects
+        .filter(fee_item__in=item_ids, period__in=periods)
+        .values_list('student_id', 'fee_item_id', 'period')
+    )
+
+    plan = {}
+    grade_counts = defaultdict(lambda: [0, Decimal(0)])
+    for student_id, grade_id in students:
+        due = [charge for charge in by_grade[grade_id] if (student_id, charge[0]['id'], charge[1]) not in charged]
+        if due:
+            plan[student_id] = due
+            grade_counts[grade_id][0] += 1
+            grade_counts[grade_id][1] += sum(charge[3] for charge in due)
+
+    names = dict(GradeLevel.objects.filter(id__in=[g for g in by_grade if g]).values_list('id', 'name'))
+    summary = {
+        'term': term,
+        'year': year,
+        'students': len(students),
+        'to_bill': len(plan),
+        'already_billed': len(students) - len(plan),
+        'lines': sum(len(due) for due in plan.values()),
+        'total': sum((total for _, total in grade_counts.values()), Decimal(0)),
+        'grades': [
+            {
+                'grade': names.get(grade_id, 'No class'),
+                'items': [description for _, _, description, _ in by_grade[grade_id]],
+                'students': grade_counts[grade_id][0],
+                'amount': grade_counts[grade_id][1],
+            }
+            for grade_id in sorted(by_grade, key=lambda g: names.get(g, ''))
+        ],
+        'skipped_items': list(restricted),
+    }
+    return plan, summary
+
+
+def bill_term(school, term, year, months=3, user=None, dry_run=False, batch_size=2000):
+    """
+    Bill `school` for `term`: one invoice per learner (existing ones topped
+    up with new lines), one ledger charge per invoice for what was added.
+    Returns the plan summary.
+    """
+    with transaction.atomic():
+        lock_billing(school.id)
+        plan, summary = plan_billing(school, term, year, months)
+        if dry_run:
+            return summary
+        if not plan:
+            return {**summary, 'invoices_created': 0, 'invoices_topped_up': 0}
+
+        # student_id → invoice id; existing invoices for the term are topped up
+        invoices = {
+            student_id: invoice_id
+            for student_id, invoice_id in Invoice.objects.filter(school=school, term=term).values_list('student_id', 'id')
+            if student_id in plan
+        }
+        topped_up = [(invoice_id, sum(charge[3] for charge in plan[student_id])) for student_id, invoice_id in invoices.items()]
+        created = [
+            Invoice(
+                school=school, student_id=student_id, term=term, year=year,
+                total=sum(charge[3] for charge in due), created_by=user,
+            )
+            for student_id, due in plan.items() if student_id not in invoices
+        ]
+        Invoice.objects.bulk_create(created, batch_size=batch_size)
+        invoices.update((invoice.student_id, invoice.pk) for invoice in created)
+        add_to_totals(topped_up, batch_size)
+
+        insert_lines(
+            (invoices[student_id], student_id, item['id'], period, description, amount)
+            for student_id, due in plan.items()
+            for item, period, description, amount in due
+        )
+        post_entries(
+            [
+                LedgerEntry(
+                    school=school, student_id=student_id, kind=LedgerEntry.Kind.CHARGE,
+                    amount=sum(charge[3] for charge in due),
+                    description=f"Fees {term}", reference=f"INV-{invoices[student_id]}", created_by=user,
+                )
+                for student_id, due in plan.items()
+            ],
+            batch_size=batch_size,
+        )
+    return {**summary, 'invoices_created': len(created), 'invoices_topped_up': len(topped_up)}
+
+
+def add_to_totals(deltas, batch_size=2000):
+    """Add (invoice_id, amount) pairs to invoice totals: one UPDATE ... FROM VALUES per batch."""
+    with connection.cursor() as cursor:
+        for start in range(0, len(deltas), batch_size):
+            batch = deltas[start:start + batch_size]
+            values = ', '.join(["(%s::bigint, %s::numeric)"] * len(batch))
+            cursor.execute(
+                "UPDATE finance_invoice AS i SET total = i.total + v.delta "
+                f"FROM (VALUES {values}) AS v(id, delta) WHERE i.id = v.id",
+                [value for pair in batch for value in pair],
+            )
+
+
+LINES_SQL = """
+    INSERT INTO finance_invoiceline (invoice_id, student_id, fee_item_id, period, description, amount)
+    SELECT * FROM unnest(%s::bigint[], %s::uuid[], %s::bigint[], %s::varchar[], %s::varchar[], %s::numeric[])
+"""
+
+
+def insert_lines(rows):
+    """
+    Insert (invoice_id, student_id, fee_item_id, period, description, amount)
+    rows as one statement, one array per column: a term's lines run to
+    several per learner and building a model instance for each costs more
+    than the insert itself.
+    """
+    columns = [list(column) for column in zip(*rows)]
+    if columns:
+        with connection.cursor() as cursor:
+            cursor.execute(LINES_SQL, columns)
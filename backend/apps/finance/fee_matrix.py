@@ -0,0 +1,219 @@
+# apps/finance/fee_matrix.py
+"""
+Fee matrix: the active fee items that apply, with their total, for every
+(school, grade level, department, frequency) cell.
+
+A fee item applies to a cell when its grade_levels are empty or include the
+grade, and its departments are empty or include the department. A school's
+cells cover its own grade levels and departments, any others its items
+name, and None for learners without a class or department, so a lookup
+for a learner always finds its row.
+
+Changes are applied precisely: a fee item reaches the cells of its grades
+(or every grade when it names none), its departments (likewise) and its
+frequency, and only the cells an edit could have changed, before and after,
+are recomputed. Edits made in one transaction are gathered and applied
+once when it commits (a fee item form saves the item and then sets two
+M2M lists: one refresh, not three). rebuild_fee_matrix recomputes whole
+schools.
+"""
+import threading
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+FREQUENCIES = ('per_term', 'per_year', 'one_time', 'monthly')
+
+_pending = threading.local()
+
+
+def lock_fee_matrix(school_id):
+    """Serialise matrix refreshes within a school for the current transaction."""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [f"fee_matrix:{school_id}"])
+
+
+# ── Scopes ──────────────────────────────────────────────────────────────────
+# (school_id, grade ids, department ids, frequencies); None for "all of them"
+
+def item_scopes(item_ids):
+    """The cells each fee item currently reaches, as scopes."""
+    from .models import FeeItem
+    grades, departments = defaultdict(set), defaultdict(set)
+    for item_id, grade_id in FeeItem.grade_levels.through.objects.filter(feeitem_id__in=item_ids).values_list(
+        'feeitem_id', 'gradelevel_id'
+    ):
+        grades[item_id].add(grade_id)
+    for item_id, department_id in FeeItem.departments.through.objects.filter(feeitem_id__in=item_ids).values_list(
+        'feeitem_id', 'department_id'
+    ):
+        departments[item_id].add(department_id)
+    return [
+        (school_id, grades[item_id] or None, departments[item_id] or None, {frequency})
+        for item_id, school_id, frequency in FeeItem.objects.filter(id__in=item_ids).values_list(
+            'id', 'category__school_id', 'frequency'
+        )
+    ]
+
+
+def merge(scope, other):
+    """The smallest scope covering both (same school)."""
+    if scope is None:
+        return other
+    return tuple(
+        scope[0] if index == 0 else None if mine is None or theirs is None else mine | theirs
+        for index, (mine, theirs) in enumerate(zip(scope, other))
+    )
+
+
+def pending():
+    """This thread's edits awaiting commit: cells reached before them, items touched, items created."""
+    if not hasattr(_pending, 'before'):
+        _pending.before, _pending.items, _pending.created = {}, set(), set()
+    return _pending
+
+
+def note_before(item_ids):
+    """Record the cells these items reach before an edit (items new in this transaction reach none)."""
+    edits = pending()
+    existing = [item_id for item_id in item_ids if item_id not in edits.created]
+    for scope in item_scopes(existing) if existing else ():
+        edits.before[scope[0]] = merge(edits.before.get(scope[0]), scope)
+
+
+def note_after(item_ids, created=False):
+    """Recompute these items' cells, as they are when the transaction commits."""
+    edits = pending()
+    edits.items.update(item_ids)
+    if created:
+        edits.created.update(item_ids)
+    transaction.on_commit(flush_refreshes)
+
+
+def note_school(school_id):
+    """Recompute a whole school's matrix on commit."""
+    edits = pending()
+    edits.before[school_id] = (school_id, None, None, None)
+    transaction.on_commit(flush_refreshes)
+
+
+def flush_refreshes():
+    edits = pending()
+    scopes = dict(edits.before)
+    for scope in item_scopes(list(edits.items)) if edits.items else ():
+        scopes[scope[0]] = merge(scopes.get(scope[0]), scope)
+    edits.before, edits.items, edits.created = {}, set(), set()
+    for school_id, grade_ids, department_ids, frequencies in scopes.values():
+        refresh_fee_matrix(school_id, grade_ids, department_ids, frequencies)
+
+
+# ── Refreshing ──────────────────────────────────────────────────────────────
+
+def item_entry(item):
+    return {
+        'id': item.id,
+        'name': item.name,
+        'category': item.category.name,
+        'display_order': item.category.display_order,
+        'amount': str(item.amount),
+        'currency': item.currency,
+        'is_mandatory': item.category.is_mandatory,
+    }
+
+
+def one_of(field, ids):
+    """Q for `field` in `ids`, where None in ids means IS NULL."""
+    condition = Q(**{f'{field}__in': [pk for pk in ids if pk is not None]})
+    if None in ids:
+        condition |= Q(**{f'{field}__isnull': True})
+    return condition
+
+
+def refresh_fee_matrix(school_id, grade_ids=None, department_ids=None, frequencies=None):
+    """
+    Recompute `school_id`'s cells for the given grades, departments and
+    frequencies (None: all of them).
+    """
+    from apps.academics.models import Department, GradeLevel
+    from apps.school.models import School
+    from .models import FeeItem, FeeMatrix
+
+    with transaction.atomic():
+        lock_fee_matrix(school_id)
+        if not School.objects.filter(pk=school_id).exists():
+            return 0  # deleted along with its fee items
+        items = list(
+            FeeItem.objects
+            .filter(category__school_id=school_id, is_active=True)
+            .select_related('category')
+            .prefetch_related('grade_levels', 'departments')
+            .order_by('category__display_order', 'category__name', 'name')
+        )
+        reach = {
+            item.id: ({grade.id for grade in item.grade_levels.all()}, {dep.id for dep in item.departments.all()})
+            for item in items
+        }
+
+        if grade_ids is None:
+            grade_ids = {None, *GradeLevel.objects.filter(school_id=school_id).values_list('id', flat=True)}
+            grade_ids.update(grade for grades, _ in reach.values() for grade in grades)
+        else:  # a grade deleted since its cells were noted has none left to refresh
+            grade_ids = {None} & set(grade_ids) | set(
+                GradeLevel.objects.filter(id__in=set(grade_ids) - {None}).values_list('id', flat=True)
+            )
+        if department_ids is None:
+            department_ids = {None, *Department.objects.filter(school_id=school_id).values_list('id', flat=True)}
+            department_ids.update(dep for _, departments in reach.values() for dep in departments)
+        else:
+            department_ids = {None} & set(department_ids) | set(
+                Department.objects.filter(id__in=set(department_ids) - {None}).values_list('id', flat=True)
+            )
+        frequencies = frequencies or FREQUENCIES
+
+        cells = []
+        for grade_id in grade_ids:
+            for department_id in department_ids:
+                for frequency in frequencies:
+                    applicable = [
+                        item for item in items
+                        if item.frequency == frequency
+                        and (not reach[item.id][0] or grade_id in reach[item.id][0])
+                        and (not reach[item.id][1] or department_id in reach[item.id][1])
+                    ]
+                    cells.append(FeeMatrix(
+                        school_id=school_id, grade_level_id=grade_id, department_id=department_id,
+                        frequency=frequency, total=sum(item.amount for item in applicable),
+                        items=[item_entry(item) for item in applicable],
+                    ))
+
+        FeeMatrix.objects.filter(
+            Q(school_id=school_id)
+            & one_of('grade_level', grade_ids)
+            & one_of('department', department_ids)
+            & Q(frequency__in=frequencies)
+        ).delete()
+        FeeMatrix.objects.bulk_create(cells)
+    return len(cells)
+
+
+# ── Reading ─────────────────────────────────────────────────────────────────
+
+def fee_schedule(school_id, grade_level_id=None, department_id=None):
+    """
+    {frequency: FeeMatrix} for a learner in `grade_level_id` and
+    `department_id`: one indexed query.
+    """
+    from .models import FeeMatrix
+    rows = {
+        row.frequency: row
+        for row in FeeMatrix.objects.filter(
+            school_id=school_id, grade_level_id=grade_level_id, department_id=department_id,
+        )
+    }
+    # A class or department that no fee item names pays what learners without one pay
+    if not rows and department_id is not None:
+        return fee_schedule(school_id, grade_level_id)
+    if not rows and grade_level_id is not None:
+        return fee_schedule(school_id)
+    return rows
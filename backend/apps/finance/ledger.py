@@ -0,0 +1,186 @@
+# apps/finance/ledger.py
+"""
+Student fee ledger.
+
+Every charge, payment and adjustment is an append-only LedgerEntry.
+Posting locks the students' rows, works out each entry's running balance
+from Student.fee_balance, inserts the entries with bulk_create and writes
+the new balances back with one UPDATE, all in one transaction. So
+fee_balance is always the ledger total and reading it never needs a SUM()
+over history.
+
+verify_ledger() recomputes the running balances with window functions, one
+pass over a school's entries in (student, id) order, and reports (or fixes)
+any drift between them, balance_after and fee_balance.
+"""
+from decimal import Decimal
+
+from django.db import connection, transaction
+
+from apps.students.models import Student
+from .models import LedgerEntry
+
+LOCK_BATCH = 5000
+
+SIGNS = {
+    LedgerEntry.Kind.CHARGE: 1,
+    LedgerEntry.Kind.PAYMENT: -1,
+}
+
+
+def signed_amount(kind, amount):
+    """Charges and payments are entered as positive amounts; adjustments carry their sign."""
+    amount = Decimal(amount)
+    if kind == LedgerEntry.Kind.ADJUSTMENT:
+        return amount
+    if amount <= 0:
+        raise ValueError(f"A {kind.lower()} must be a positive amount.")
+    return amount * SIGNS[kind]
+
+
+# ── Posting ─────────────────────────────────────────────────────────────────
+
+def post_entries(entries, batch_size=2000):
+    """
+    Append unsaved LedgerEntry objects (amounts already signed; school may be
+    left unset) and move each student's fee_balance with them. Entries for
+    the same student are applied in list order. Returns the saved entries.
+    """
+    entries = list(entries)
+    if not entries:
+        return []
+    with transaction.atomic():
+        # Lock in id order so two concurrent postings can't deadlock
+        student_ids = sorted({entry.student_id for entry in entries})
+        accounts = {}
+        for start in range(0, len(student_ids), LOCK_BATCH):
+            accounts.update(
+                (student_id, [school_id, balance])
+                for student_id, school_id, balance in Student.objects
+                .select_for_update()
+                .filter(id__in=student_ids[start:start + LOCK_BATCH])
+                .order_by('id')
+                .values_list('id', 'school_id', 'fee_balance')
+            )
+        missing = set(student_ids) - accounts.keys()
+        if missing:
+            raise ValueError(f"Unknown student(s): {', '.join(map(str, sorted(missing)))}")
+
+        for entry in entries:
+            account = accounts[entry.student_id]
+            account[1] += entry.amount
+            entry.balance_after = account[1]
+            entry.school_id = entry.school_id or account[0]
+        LedgerEntry.objects.bulk_create(entries, batch_size=batch_size)
+        write_balances([(student_id, balance) for student_id, (_, balance) in accounts.items()], batch_size)
+    return entries
+
+
+def write_balances(balances, batch_size=2000):
+    """Set fee_balance from (student_id, balance) pairs: one UPDATE ... FROM VALUES per batch."""
+    with connection.cursor() as cursor:
+        for start in range(0, len(balances), batch_size):
+            batch = balances[start:start + batch_size]
+            values = ', '.join(["(%s::uuid, %s::numeric)"] * len(batch))
+            cursor.execute(
+                "UPDATE students_student AS s SET fee_balance = v.balance "
+                f"FROM (VALUES {values}) AS v(id, balance) WHERE s.id = v.id",
+                [value for pair in batch for value in pair],
+            )
+
+
+def post_entry(student, kind, amount, description='', reference='', user=None, reverses=None):
+    """Post one entry; `amount` is positive for charges and payments."""
+    entry = LedgerEntry(
+        student_id=getattr(student, 'pk', student),
+        kind=kind,
+        amount=signed_amount(kind, amount),
+        description=description,
+        reference=reference,
+        created_by=user,
+        reverses=reverses,
+    )
+    return post_entries([entry])[0]
+
+
+def reverse_entry(entry, user=None, reason=''):
+    """Cancel `entry` with an equal and opposite adjustment."""
+    with transaction.atomic():
+        LedgerEntry.objects.select_for_update().filter(pk=entry.pk).first()
+        if entry.reversals.exists():
+            raise ValueError("This entry has already been reversed.")
+        return post_entries([LedgerEntry(
+            student_id=entry.student_id,
+            kind=LedgerEntry.Kind.ADJUSTMENT,
+            amount=-entry.amount,
+            description=reason or f"Reversal of {entry.get_kind_display().lower()} #{entry.pk}",
+            reference=entry.reference,
+            created_by=user,
+            reverses=entry,
+        )])[0]
+
+
+# ── Verification ────────────────────────────────────────────────────────────
+
+DRIFT_SQL = """
+    WITH running AS (
+        SELECT id, student_id, balance_after,
+               SUM(amount) OVER (PARTITION BY student_id ORDER BY id ROWS UNBOUNDED PRECEDING) AS expected,
+               ROW_NUMBER() OVER (PARTITION BY student_id ORDER BY id DESC) AS from_end
+        FROM finance_ledgerentry
+        WHERE school_id = %(school_id)s
+    ),
+    per_student AS (
+        SELECT student_id,
+               MAX(expected) FILTER (WHERE from_end = 1) AS ledger_balance,
+               COUNT(*) FILTER (WHERE balance_after <> expected) AS bad_entries,
+               MIN(id) FILTER (WHERE balance_after <> expected) AS first_bad_entry
+        FROM running
+        GROUP BY student_id
+    )
+    SELECT s.id, s.admission_number, s.fee_balance, COALESCE(p.ledger_balance, 0),
+           COALESCE(p.bad_entries, 0), p.first_bad_entry
+    FROM students_student s
+    LEFT JOIN per_student p ON p.student_id = s.id
+    WHERE s.school_id = %(school_id)s
+      AND (s.fee_balance <> COALESCE(p.ledger_balance, 0) OR p.bad_entries > 0)
+    ORDER BY s.admission_number
+"""
+
+FIX_ENTRIES_SQL = """
+    UPDATE finance_ledgerentry AS e SET balance_after = r.expected
+    FROM (
+        SELECT id, SUM(amount) OVER (PARTITION BY student_id ORDER BY id ROWS UNBOUNDED PRECEDING) AS expected
+        FROM finance_ledgerentry
+        WHERE student_id = ANY(%(student_ids)s::uuid[])
+    ) AS r
+    WHERE e.id = r.id AND e.balance_after <> r.expected
+"""
+
+FIX_BALANCES_SQL = """
+    UPDATE students_student AS s
+    SET fee_balance = COALESCE((SELECT SUM(amount) FROM finance_ledgerentry WHERE student_id = s.id), 0)
+    WHERE s.id = ANY(%(student_ids)s::uuid[])
+"""
+
+
+def verify_ledger(school_id, fix=False):
+    """
+    [(student_id, admission_number, fee_balance, ledger_balance, bad_entries,
+    first_bad_entry)] for `school_id`'s students whose fee_balance differs
+    from their ledger total or whose balance_after values don't add up.
+    With fix=True the ledger amounts are taken as the truth: balance_after
+    and fee_balance are rewritten from them.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(DRIFT_SQL, {'school_id': school_id})
+        drift = cursor.fetchall()
+    if fix and drift:
+        student_ids = [row[0] for row in drift]
+        with transaction.atomic():
+            # Wait out postings in flight; the updates below then see their entries
+            list(Student.objects.select_for_update().filter(id__in=student_ids).order_by('id').values_list('id'))
+            with connection.cursor() as cursor:
+                cursor.execute(FIX_ENTRIES_SQL, {'student_ids': student_ids})
+                cursor.execute(FIX_BALANCES_SQL, {'student_ids': student_ids})
+    return drift
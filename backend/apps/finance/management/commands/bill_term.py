@@ -0,0 +1,51 @@
+# apps/finance/management/commands/bill_term.py
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.finance.billing import bill_term
+from apps.school.models import School
+
+
+class Command(BaseCommand):
+    help = (
+        "Invoice a school's active students for a term from the applicable fee items "
+        "and post the charges to the ledger. Prints a preview unless --apply is given; "
+        "re-running a term only bills what is new."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--school", required=True, help="School UUID")
+        parser.add_argument("--term", required=True, help='Term label, e.g. "2026-T1"')
+        parser.add_argument("--year", required=True, type=int, help="Year that per-year items are billed for")
+        parser.add_argument("--months", type=int, default=3, help="Months in the term, for monthly items (default 3)")
+        parser.add_argument("--apply", action="store_true", help="Bill (default: preview only)")
+
+    def handle(self, *args, **options):
+        school = School.objects.filter(id=options["school"]).first()
+        if school is None:
+            raise CommandError("No such school")
+
+        summary = bill_term(
+            school, options["term"], options["year"], months=options["months"], dry_run=not options["apply"],
+        )
+        for grade in summary["grades"]:
+            self.stdout.write(
+                f"{grade['grade']:20} {grade['students']:6} student(s) {grade['amount']:>14}  "
+                f"{', '.join(grade['items']) or '(no fee items)'}"
+            )
+        if summary["skipped_items"]:
+            self.stdout.write(
+                f"Skipped (restricted to departments): {', '.join(summary['skipped_items'])}"
+            )
+
+        line = (
+            f"{summary['term']}: {summary['to_bill']} of {summary['students']} student(s), "
+            f"{summary['lines']} line(s), {summary['total']} total"
+        )
+        if options["apply"]:
+            line += (
+                f"; {summary['invoices_created']} invoice(s) issued, "
+                f"{summary['invoices_topped_up']} topped up"
+            )
+            self.stdout.write(self.style.SUCCESS(line))
+        else:
+            self.stdout.write(line + ". Run again with --apply to bill.")
@@ -0,0 +1,23 @@
+# apps/finance/management/commands/rebuild_fee_matrix.py
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.finance.fee_matrix import refresh_fee_matrix
+from apps.school.models import School
+
+
+class Command(BaseCommand):
+    help = "Recompute the fee matrix (applicable fee items per grade, department and frequency) from scratch."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--school", help="School UUID (default: every school)")
+
+    def handle(self, *args, **options):
+        schools = School.objects.order_by('name')
+        if options["school"]:
+            schools = schools.filter(id=options["school"])
+            if not schools.exists():
+                raise CommandError("No such school")
+        for school in schools:
+            cells = refresh_fee_matrix(school.id)
+            self.stdout.write(f"{school.name}: {cells} cell(s)")
+        self.stdout.write(self.style.SUCCESS("Fee matrix rebuilt"))
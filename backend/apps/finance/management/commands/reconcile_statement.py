@@ -0,0 +1,61 @@
+# apps/finance/management/commands/reconcile_statement.py
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.imports import iter_rows
+from apps.finance.models import StatementImport, StatementLine
+from apps.finance.reconciliation import reconcile
+from apps.school.models import School
+
+
+class Command(BaseCommand):
+    help = (
+        "Match an M-Pesa or bank statement (CSV/XLSX) to a school's learners, post the "
+        "confident matches as payments and queue the rest for review."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path to the statement export")
+        parser.add_argument("--school", required=True, help="School UUID")
+        parser.add_argument("--source", choices=[s.lower() for s in StatementImport.Source.values], default="mpesa")
+        parser.add_argument("--dry-run", action="store_true", help="Match only, post nothing")
+        parser.add_argument("--show", type=int, default=20, help="Review lines to list (default 20)")
+
+    def handle(self, *args, **options):
+        try:
+            school = School.objects.get(pk=options["school"])
+        except (School.DoesNotExist, ValueError):
+            raise CommandError(f"School {options['school']} not found")
+
+        started = time.perf_counter()
+        path = options["path"]
+        try:
+            with open(path, "rb") as fh:
+                statement, lines = reconcile(
+                    school, iter_rows(fh, path), options["source"].upper(),
+                    file_name=os.path.basename(path), dry_run=options["dry_run"],
+                )
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+        elapsed = time.perf_counter() - started
+
+        review = [line for line in lines if line.status == StatementLine.Status.REVIEW]
+        for line in review[:options["show"]]:
+            guesses = ", ".join(
+                f"{c['admission_number']} {c['name']} ({c['score']})" for c in line.candidates[:3]
+            ) or "no candidates"
+            self.stdout.write(
+                f"  row {line.row_number:6} {line.transaction_ref:12} {line.amount:>10}  "
+                f"'{line.account_reference[:30]}' {line.payer[:25]}  → {guesses}"
+            )
+        if len(review) > options["show"]:
+            self.stdout.write(f"  ... and {len(review) - options['show']} more for review")
+
+        verb = "would be posted" if options["dry_run"] else "posted"
+        self.stdout.write(self.style.SUCCESS(
+            f"{statement.lines} credit(s) in {elapsed:.1f}s: {statement.matched} {verb} "
+            f"({statement.amount_posted}), {statement.review} for review, "
+            f"{statement.duplicates} already imported"
+        ))
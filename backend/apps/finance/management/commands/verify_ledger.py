@@ -0,0 +1,47 @@
+# apps/finance/management/commands/verify_ledger.py
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.finance.ledger import verify_ledger
+from apps.school.models import School
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute every student's running balance from the fee ledger and report "
+        "where balance_after or Student.fee_balance has drifted. --fix rewrites them from the ledger."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--school", help="School UUID (default: every school)")
+        parser.add_argument("--fix", action="store_true", help="Rewrite drifted balances from the ledger")
+        parser.add_argument("--limit", type=int, default=50, help="Students to list (default 50)")
+
+    def handle(self, *args, **options):
+        schools = School.objects.order_by('name')
+        if options["school"]:
+            schools = schools.filter(id=options["school"])
+            if not schools.exists():
+                raise CommandError("No such school")
+
+        total = 0
+        for school in schools:
+            drift = verify_ledger(school.id, fix=options["fix"])
+            total += len(drift)
+            if not drift:
+                self.stdout.write(f"{school.name}: ledger consistent")
+                continue
+            self.stdout.write(self.style.WARNING(f"{school.name}: {len(drift)} student(s) drifted"))
+            for _, admission_number, balance, ledger_balance, bad_entries, first_bad in drift[:options["limit"]]:
+                line = f"  {admission_number:20} fee_balance {balance:>12} ledger {ledger_balance:>12}"
+                if bad_entries:
+                    line += f"  {bad_entries} line(s) off from #{first_bad}"
+                self.stdout.write(line)
+            if len(drift) > options["limit"]:
+                self.stdout.write(f"  ... and {len(drift) - options['limit']} more")
+
+        if options["fix"] and total:
+            self.stdout.write(self.style.SUCCESS(f"{total} student(s) rewritten from the ledger"))
+        elif total:
+            self.stdout.write(f"{total} student(s) drifted. Run again with --fix to rewrite them from the ledger.")
+        else:
+            self.stdout.write(self.style.SUCCESS("All balances match the ledger"))
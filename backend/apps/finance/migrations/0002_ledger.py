@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:25
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0001_initial'),
+        ('school', '0006_alter_school_academic_year_end_month_and_more'),
+        ('students', '0009_guardian_phone_e164'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('CHARGE', 'Charge'), ('PAYMENT', 'Payment'), ('ADJUSTMENT', 'Adjustment')], max_length=12)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('balance_after', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('description', models.CharField(blank=True, max_length=255)),
+                ('reference', models.CharField(blank=True, max_length=100)),
+                ('posted_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('reverses', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='reversals', to='finance.ledgerentry')),
+                ('school', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='school.school')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='students.student')),
+            ],
+            options={
+                'ordering': ['student', 'id'],
+                'indexes': [models.Index(fields=['student', 'id'], name='ledger_student_seq'), models.Index(fields=['school', 'posted_at'], name='ledger_school_posted')],
+            },
+        ),
+        # Balances recorded before the ledger become each student's first line
+        migrations.RunSQL(
+            """
+            INSERT INTO finance_ledgerentry
+                (school_id, student_id, kind, amount, balance_after, description, reference, posted_at)
+            SELECT school_id, id, 'ADJUSTMENT', fee_balance, fee_balance, 'Opening balance', '', now()
+            FROM students_student
+            WHERE fee_balance <> 0
+            """,
+            migrations.RunSQL.noop,
+        ),
+    ]
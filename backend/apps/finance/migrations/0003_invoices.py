@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0002_ledger'),
+        ('school', '0006_alter_school_academic_year_end_month_and_more'),
+        ('students', '0009_guardian_phone_e164'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Invoice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=20)),
+                ('year', models.PositiveSmallIntegerField()),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('school', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='invoices', to='school.school')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='invoices', to='students.student')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='InvoiceLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(max_length=20)),
+                ('description', models.CharField(max_length=255)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('fee_item', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='invoice_lines', to='finance.feeitem')),
+                ('invoice', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='finance.invoice')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='students.student')),
+            ],
+            options={
+                'ordering': ['invoice', 'id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['school', 'term'], name='invoice_school_term'),
+        ),
+        migrations.AddConstraint(
+            model_name='invoice',
+            constraint=models.UniqueConstraint(fields=('student', 'term'), name='invoice_once_per_term'),
+        ),
+        migrations.AddIndex(
+            model_name='invoiceline',
+            index=models.Index(fields=['fee_item', 'period'], name='invoiceline_item_period'),
+        ),
+        migrations.AddConstraint(
+            model_name='invoiceline',
+            constraint=models.UniqueConstraint(fields=('student', 'fee_item', 'period'), name='fee_charged_once_per_period'),
+        ),
+    ]
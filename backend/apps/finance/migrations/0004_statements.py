@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0003_invoices'),
+        ('school', '0006_alter_school_academic_year_end_month_and_more'),
+        ('students', '0009_guardian_phone_e164'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatementImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('MPESA', 'M-Pesa'), ('BANK', 'Bank')], max_length=10)),
+                ('file_name', models.CharField(max_length=255)),
+                ('lines', models.PositiveIntegerField(default=0)),
+                ('matched', models.PositiveIntegerField(default=0)),
+                ('review', models.PositiveIntegerField(default=0)),
+                ('duplicates', models.PositiveIntegerField(default=0)),
+                ('amount_posted', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('school', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='statement_imports', to='school.school')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='StatementLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('row_number', models.PositiveIntegerField()),
+                ('transaction_ref', models.CharField(blank=True, max_length=50)),
+                ('paid_at', models.DateTimeField(blank=True, null=True)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('account_reference', models.CharField(blank=True, max_length=255)),
+                ('payer', models.CharField(blank=True, max_length=150)),
+                ('payer_phone', models.CharField(blank=True, max_length=16)),
+                ('status', models.CharField(choices=[('MATCHED', 'Matched'), ('REVIEW', 'Needs review'), ('DUPLICATE', 'Duplicate'), ('IGNORED', 'Ignored')], max_length=10)),
+                ('method', models.CharField(blank=True, choices=[('ADMISSION', 'Admission number'), ('ADMISSION_TYPO', 'Admission number (mistyped)'), ('PHONE', 'Guardian phone'), ('NAME', 'Name'), ('MANUAL', 'Manual')], max_length=20)),
+                ('score', models.PositiveSmallIntegerField(default=0)),
+                ('candidates', models.JSONField(blank=True, default=list)),
+                ('resolved_at', models.DateTimeField(blank=True, null=True)),
+                ('ledger_entry', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='finance.ledgerentry')),
+                ('resolved_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('school', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='school.school')),
+                ('statement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='statement_lines', to='finance.statementimport')),
+                ('student', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='students.student')),
+            ],
+            options={
+                'ordering': ['statement', 'row_number'],
+                'indexes': [models.Index(fields=['school', 'status'], name='statementline_school_status')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(models.Q(('status', 'DUPLICATE'), _negated=True), models.Q(('transaction_ref', ''), _negated=True)), fields=('school', 'transaction_ref'), name='statement_ref_once')],
+            },
+        ),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copy of the whole-school refresh (apps/finance/fee_matrix.py) as it stood for this migration
+FREQUENCIES = ('per_term', 'per_year', 'one_time', 'monthly')
+
+
+def item_entry(item):
+    return {
+        'id': item.id,
+        'name': item.name,
+        'category': item.category.name,
+        'display_order': item.category.display_order,
+        'amount': str(item.amount),
+        'currency': item.currency,
+        'is_mandatory': item.category.is_mandatory,
+    }
+
+
+def build_fee_matrix(apps, schema_editor):
+    FeeItem = apps.get_model('finance', 'FeeItem')
+    FeeMatrix = apps.get_model('finance', 'FeeMatrix')
+    GradeLevel = apps.get_model('academics', 'GradeLevel')
+    Department = apps.get_model('academics', 'Department')
+    School = apps.get_model('school', 'School')
+
+    for school_id in School.objects.values_list('id', flat=True):
+        items = list(
+            FeeItem.objects
+            .filter(category__school_id=school_id, is_active=True)
+            .select_related('category')
+            .prefetch_related('grade_levels', 'departments')
+            .order_by('category__display_order', 'category__name', 'name')
+        )
+        reach = {
+            item.id: ({grade.id for grade in item.grade_levels.all()}, {dep.id for dep in item.departments.all()})
+            for item in items
+        }
+        grade_ids = {None, *GradeLevel.objects.filter(school_id=school_id).values_list('id', flat=True)}
+        grade_ids.update(grade for grades, _ in reach.values() for grade in grades)
+        department_ids = {None, *Department.objects.filter(school_id=school_id).values_list('id', flat=True)}
+        department_ids.update(dep for _, departments in reach.values() for dep in departments)
+
+        cells = []
+        for grade_id in grade_ids:
+            for department_id in department_ids:
+                for frequency in FREQUENCIES:
+                    applicable = [
+                        item for item in items
+                        if item.frequency == frequency
+                        and (not reach[item.id][0] or grade_id in reach[item.id][0])
+                        and (not reach[item.id][1] or department_id in reach[item.id][1])
+                    ]
+                    cells.append(FeeMatrix(
+                        school_id=school_id, grade_level_id=grade_id, department_id=department_id,
+                        frequency=frequency, total=sum(item.amount for item in applicable),
+                        items=[item_entry(item) for item in applicable],
+                    ))
+        FeeMatrix.objects.bulk_create(cells)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0005_gradelevel_education_level_gradelevel_pathway'),
+        ('finance', '0004_statements'),
+        ('school', '0006_alter_school_academic_year_end_month_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeeMatrix',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('frequency', models.CharField(max_length=30)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('items', models.JSONField(default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('department', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='academics.department')),
+                ('grade_level', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='academics.gradelevel')),
+                ('school', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fee_matrix', to='school.school')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('school', 'grade_level', 'department', 'frequency'), name='fee_matrix_unique_cell', nulls_distinct=False)],
+            },
+        ),
+        migrations.RunPython(build_fee_matrix, migrations.RunPython.noop),
+    ]
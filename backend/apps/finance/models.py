@@ -43,7 +43,9 @@
 #     # school = models.ForeignKey('core.School', on_delete=models.CASCADE, null=True, blank=True)
 
 # finance/models.py
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 from apps.school.models import School
 from apps.academics.models import GradeLevel, Department
 
@@ -101,4 +103,214 @@ class FeeItem(models.Model):
         ordering = ["name"]
 
     def __str__(self):
-        return f"{self.name} - {self.amount} {self.currency}"
\ No newline at end of file
+        return f"{self.name} - {self.amount} {self.currency}"
+
+class LedgerEntry(models.Model):
+    """
+    One line of a student's fee account. Append-only: a mistake is corrected by
+    posting a reversing entry, never by editing or deleting. `amount` is the
+    signed effect on what the student owes (charges positive, payments
+    negative) and `balance_after` the running balance, which
+    Student.fee_balance always equals for the latest entry. Post through
+    apps.finance.ledger, which keeps the two in step.
+    """
+    class Kind(models.TextChoices):
+        CHARGE = "CHARGE", "Charge"
+        PAYMENT = "PAYMENT", "Payment"
+        ADJUSTMENT = "ADJUSTMENT", "Adjustment"
+
+    school = models.ForeignKey(School, on_delete=models.CASCADE, related_name="ledger_entries")
+    student = models.ForeignKey("students.Student", on_delete=models.CASCADE, related_name="ledger_entries")
+    kind = models.CharField(max_length=12, choices=Kind.choices)
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    balance_after = models.DecimalField(max_digits=14, decimal_places=2)
+    description = models.CharField(max_length=255, blank=True)
+    reference = models.CharField(max_length=100, blank=True)  # receipt / M-Pesa code / invoice number
+    reverses = models.ForeignKey("self", on_delete=models.PROTECT, null=True, blank=True, related_name="reversals")
+    posted_at = models.DateTimeField(default=timezone.now)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+
+    class Meta:
+        ordering = ["student", "id"]
+        indexes = [
+            # Statements and the verification window both read a student's lines in id order
+            models.Index(fields=["student", "id"], name="ledger_student_seq"),
+            models.Index(fields=["school", "posted_at"], name="ledger_school_posted"),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Ledger entries are append-only; post a reversing entry instead.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("Ledger entries are append-only; post a reversing entry instead.")
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.amount} ({self.student_id})"
+
+
+class Invoice(models.Model):
+    """
+    A student's bill for one term, produced by a billing run
+    (apps.finance.billing). One per student per term; a re-run adds any
+    newly applicable lines to it instead of issuing another.
+    """
+    school = models.ForeignKey(School, on_delete=models.CASCADE, related_name="invoices")
+    student = models.ForeignKey("students.Student", on_delete=models.CASCADE, related_name="invoices")
+    term = models.CharField(max_length=20)  # "2026-T1"
+    year = models.PositiveSmallIntegerField()
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+
+    class Meta:
+        ordering = ["-created_at"]
+        constraints = [
+            models.UniqueConstraint(fields=["student", "term"], name="invoice_once_per_term"),
+        ]
+        indexes = [models.Index(fields=["school", "term"], name="invoice_school_term")]
+
+    @property
+    def reference(self):
+        return f"INV-{self.pk}"
+
+    def __str__(self):
+        return f"{self.reference} {self.term} ({self.student_id})"
+
+
+class InvoiceLine(models.Model):
+    """
+    One fee item on an invoice. `period` is what the item is charged per:
+    the term for per-term and monthly items, the year for yearly ones and
+    "once" for one-time ones, so no student pays an item twice for a period.
+    """
+    invoice = models.ForeignKey(Invoice, on_delete=models.CASCADE, related_name="lines")
+    student = models.ForeignKey("students.Student", on_delete=models.CASCADE, related_name="+")
+    fee_item = models.ForeignKey(FeeItem, on_delete=models.PROTECT, related_name="invoice_lines")
+    period = models.CharField(max_length=20)
+    description = models.CharField(max_length=255)
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+
+    class Meta:
+        ordering = ["invoice", "id"]
+        constraints = [
+            models.UniqueConstraint(fields=["student", "fee_item", "period"], name="fee_charged_once_per_period"),
+        ]
+        # A billing run looks up what its items were already charged for this period
+        indexes = [models.Index(fields=["fee_item", "period"], name="invoiceline_item_period")]
+
+    def __str__(self):
+        return f"{self.description} {self.amount}"
+
+
+class StatementImport(models.Model):
+    """
+    An M-Pesa paybill or bank statement run through reconciliation
+    (apps.finance.reconciliation). Counters are filled in by the run and
+    moved as review lines are resolved.
+    """
+    class Source(models.TextChoices):
+        MPESA = "MPESA", "M-Pesa"
+        BANK = "BANK", "Bank"
+
+    school = models.ForeignKey(School, on_delete=models.CASCADE, related_name="statement_imports")
+    source = models.CharField(max_length=10, choices=Source.choices)
+    file_name = models.CharField(max_length=255)
+    lines = models.PositiveIntegerField(default=0)
+    matched = models.PositiveIntegerField(default=0)
+    review = models.PositiveIntegerField(default=0)
+    duplicates = models.PositiveIntegerField(default=0)
+    amount_posted = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.get_source_display()} {self.file_name}"
+
+
+class StatementLine(models.Model):
+    """
+    One credit from a statement. MATCHED lines were posted to the ledger as
+    payments; REVIEW lines wait for someone to pick the student (the
+    matcher's best guesses are in `candidates`); DUPLICATE lines carry a
+    transaction reference that was already imported.
+    """
+    class Status(models.TextChoices):
+        MATCHED = "MATCHED", "Matched"
+        REVIEW = "REVIEW", "Needs review"
+        DUPLICATE = "DUPLICATE", "Duplicate"
+        IGNORED = "IGNORED", "Ignored"
+
+    class Method(models.TextChoices):
+        ADMISSION = "ADMISSION", "Admission number"
+        ADMISSION_TYPO = "ADMISSION_TYPO", "Admission number (mistyped)"
+        PHONE = "PHONE", "Guardian phone"
+        NAME = "NAME", "Name"
+        MANUAL = "MANUAL", "Manual"
+
+    statement = models.ForeignKey(StatementImport, on_delete=models.CASCADE, related_name="statement_lines")
+    school = models.ForeignKey(School, on_delete=models.CASCADE, related_name="+")
+    row_number = models.PositiveIntegerField()
+    transaction_ref = models.CharField(max_length=50, blank=True)  # M-Pesa receipt / bank reference
+    paid_at = models.DateTimeField(null=True, blank=True)
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    account_reference = models.CharField(max_length=255, blank=True)
+    payer = models.CharField(max_length=150, blank=True)
+    payer_phone = models.CharField(max_length=16, blank=True)  # E.164, when the statement shows it unmasked
+    status = models.CharField(max_length=10, choices=Status.choices)
+    method = models.CharField(max_length=20, choices=Method.choices, blank=True)
+    score = models.PositiveSmallIntegerField(default=0)
+    student = models.ForeignKey("students.Student", on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    candidates = models.JSONField(default=list, blank=True)
+    ledger_entry = models.ForeignKey(LedgerEntry, on_delete=models.PROTECT, null=True, blank=True, related_name="+")
+    resolved_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    resolved_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["statement", "row_number"]
+        constraints = [
+            # A receipt is paid in once, however many statements it shows up in
+            models.UniqueConstraint(
+                fields=["school", "transaction_ref"],
+                condition=~models.Q(status="DUPLICATE") & ~models.Q(transaction_ref=""),
+                name="statement_ref_once",
+            ),
+        ]
+        indexes = [models.Index(fields=["school", "status"], name="statementline_school_status")]
+
+    def __str__(self):
+        return f"{self.transaction_ref or self.row_number} {self.amount} ({self.status})"
+
+
+class FeeMatrix(models.Model):
+    """
+    Which active fee items apply, and what they add up to, for one school,
+    grade level, department and frequency; grade_level/department None is
+    a learner without one. Maintained by apps.finance.fee_matrix whenever a
+    fee item, its grade/department sets or its category change, so "what
+    does this learner pay" is one indexed read.
+    """
+    school = models.ForeignKey(School, on_delete=models.CASCADE, related_name="fee_matrix")
+    grade_level = models.ForeignKey(GradeLevel, on_delete=models.CASCADE, null=True, blank=True, related_name="+")
+    department = models.ForeignKey(Department, on_delete=models.CASCADE, null=True, blank=True, related_name="+")
+    frequency = models.CharField(max_length=30)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    # [{"id", "name", "category", "display_order", "amount", "currency", "is_mandatory"}], in display order
+    items = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["school", "grade_level", "department", "frequency"],
+                name="fee_matrix_unique_cell",
+                nulls_distinct=False,
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.grade_level_id}/{self.department_id} {self.frequency}: {self.total}"
@@ -0,0 +1,480 @@
+# apps/finance/reconciliation.py
+"""
+Statement reconciliation: match M-Pesa paybill and bank statement credits
+to learners and post them to the ledger as payments.
+
+Parents type whatever they like into the account reference: the admission
+number (often mistyped), their own phone, the child's name. Each line is
+scored against in-memory indexes of the school's learners, built once per
+statement (Directory):
+
+    admission number   exact, or one typo away (symmetric-delete index)
+    guardian phone     numbers in the reference, or the payer's M-Pesa
+                       number when the statement shows it unmasked
+    learner name       name words in the reference, allowing one typo
+    guardian name      the payer's name against the learner's guardians
+
+A line whose best candidate is strong enough and clear of the runner-up is
+posted; everything else goes to the review queue with its candidates.
+Transaction references already imported are kept as duplicates and never
+posted twice.
+
+Directory and read_statement() need no database, so the matcher can be
+exercised offline against statement files and hand-built directories.
+"""
+import datetime
+import re
+from collections import Counter, defaultdict
+from decimal import Decimal, InvalidOperation
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.core.phones import DEFAULT_COUNTRY, to_e164
+from apps.students.models import Guardian, Student, StudentGuardian
+from .ledger import post_entries
+from .models import LedgerEntry, StatementImport, StatementLine
+
+# Scores; a line is posted when its best candidate reaches CONFIDENT and
+# leads the next one by MARGIN
+EXACT_ADMISSION = 100
+TYPO_ADMISSION = 60
+AMBIGUOUS_TYPO = 40
+PHONE = 80
+LEARNER_NAME = 50  # all of the learner's names in the reference
+GUARDIAN_NAME = 30  # the payer's name is one of the learner's guardians
+CONFIDENT = 80
+MARGIN = 25
+
+MAX_CANDIDATES = 5
+MAX_NAME_POSTING = 200
+MIN_FUZZY_LENGTH = 5
+
+STOPWORDS = {
+    'ADM', 'ADMN', 'ADMNO', 'ADMISSION', 'NO', 'NUMBER', 'ACC', 'ACCOUNT', 'REF',
+    'FEE', 'FEES', 'SCHOOL', 'PAYMENT', 'PAY', 'TERM', 'FOR', 'THE', 'AND', 'OF',
+    'MPESA', 'PAYBILL', 'DEPOSIT', 'CASH', 'TRANSFER', 'FROM', 'BY', 'KES', 'KSH',
+}
+METHOD_ORDER = (
+    StatementLine.Method.ADMISSION,
+    StatementLine.Method.ADMISSION_TYPO,
+    StatementLine.Method.PHONE,
+    StatementLine.Method.NAME,
+)
+
+WORD_RE = re.compile(r"[A-Z]+")
+PHONE_RE = re.compile(r"\+?\d[\d\s\-]{7,14}\d")
+OTHER_PARTY_RE = re.compile(r"^\s*(\+?[\d*]{6,})\s*-\s*(.*)$")
+
+
+# ── Text ────────────────────────────────────────────────────────────────────
+
+def compact(value):
+    """'adm 2026-0042' → 'ADM20260042'."""
+    return re.sub(r"[^0-9A-Z]", "", (value or '').upper())
+
+
+def admission_keys(admission_number):
+    """Keys an admission number is indexed under: all of it, and without a letter prefix."""
+    key = compact(admission_number)
+    keys = {key} if key else set()
+    tail = re.sub(r"^[A-Z]+", "", key)
+    if len(tail) >= 4:
+        keys.add(tail)
+    return keys
+
+
+def reference_keys(text):
+    """Admission-number-like keys in free text: the whole of it, each word, each digit run."""
+    keys = set(admission_keys(text))
+    for word in re.split(r"[\s,;:]+", text or ''):
+        keys |= admission_keys(word)
+    for run in re.findall(r"\d[\d\-/]*\d", text or ''):
+        keys.add(compact(run))
+    return {key for key in keys if len(key) >= 3}
+
+
+def name_words(text):
+    return {word for word in WORD_RE.findall((text or '').upper()) if len(word) >= 3} - STOPWORDS
+
+
+def deletions(word):
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+def within_one_edit(a, b):
+    """True when a and b differ by at most one substitution, insertion, deletion or adjacent swap."""
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        return a[i + 1:] == b[i + 1:] or (
+            i + 1 < len(a) and a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2:] == b[i + 2:]
+        )
+    return a[i:] == b[i + 1:]
+
+
+# ── Directory ───────────────────────────────────────────────────────────────
+
+class Directory:
+    """
+    In-memory indexes of a school's learners. Built from plain tuples:
+    students (id, admission_number, full_name), guardians (id, full_name,
+    phone_e164) and active links (student_id, guardian_id).
+    """
+
+    def __init__(self, students, guardians, links, country=DEFAULT_COUNTRY):
+        self.country = country
+        self.students = {}
+        self.admissions = defaultdict(set)      # key → student ids
+        self.admission_variants = defaultdict(set)  # key or key minus one character → keys
+        self.words = defaultdict(set)           # learner name word → student ids
+        self.word_variants = defaultdict(set)   # word or word minus one character → words
+        self.name_length = {}                   # student id → number of name words
+        self.phones = defaultdict(set)          # E.164 → student ids
+        self.guardian_words = defaultdict(set)  # student id → guardian name words
+
+        for student_id, admission_number, full_name in students:
+            self.students[student_id] = (admission_number, full_name)
+            for key in admission_keys(admission_number):
+                self.admissions[key].add(student_id)
+                if len(key) >= 4:
+                    for variant in deletions(key) | {key}:
+                        self.admission_variants[variant].add(key)
+            words = name_words(full_name)
+            self.name_length[student_id] = len(words)
+            for word in words:
+                self.words[word].add(student_id)
+
+        for word in self.words:
+            if len(word) >= MIN_FUZZY_LENGTH:
+                for variant in deletions(word) | {word}:
+                    self.word_variants[variant].add(word)
+
+        guardians = {guardian_id: (name, phone) for guardian_id, name, phone in guardians}
+        for student_id, guardian_id in links:
+            if student_id not in self.students or guardian_id not in guardians:
+                continue
+            name, phone = guardians[guardian_id]
+            if phone:
+                self.phones[phone].add(student_id)
+            self.guardian_words[student_id] |= name_words(name)
+
+    @classmethod
+    def for_school(cls, school):
+        students = [
+            (student_id, admission_number, ' '.join(filter(None, names)))
+            for student_id, admission_number, *names in Student.objects
+            .filter(school=school)
+            .values_list('id', 'admission_number', 'first_name', 'middle_name', 'last_name')
+            .iterator(chunk_size=5000)
+        ]
+        guardians = Guardian.objects.filter(school=school).values_list('id', 'full_name', 'phone_e164')
+        links = StudentGuardian.objects.filter(student__school=school, is_active=True).values_list(
+            'student_id', 'guardian_id'
+        )
+        return cls(students, guardians.iterator(chunk_size=5000), links.iterator(chunk_size=5000), school.country)
+
+    def mistyped_admissions(self, key):
+        keys = set()
+        for variant in deletions(key) | {key}:
+            keys |= self.admission_variants.get(variant, set())
+        students = set()
+        for candidate in keys:
+            if within_one_edit(key, candidate):
+                students |= self.admissions[candidate]
+        return students
+
+    def similar_words(self, word):
+        if word in self.words or len(word) < MIN_FUZZY_LENGTH:
+            return {word} if word in self.words else set()
+        similar = set()
+        for variant in deletions(word) | {word}:
+            similar |= self.word_variants.get(variant, set())
+        return {candidate for candidate in similar if within_one_edit(word, candidate)}
+
+    def match(self, reference, payer='', payer_phone=''):
+        """
+        Score every learner the line points at. Returns (status, method,
+        score, student_id, candidates), candidates best first.
+        """
+        scores = Counter()
+        reasons = defaultdict(set)
+
+        def add(student_ids, points, method):
+            for student_id in student_ids:
+                if method not in reasons[student_id]:
+                    scores[student_id] += points
+                    reasons[student_id].add(method)
+
+        keys = reference_keys(reference)
+        exact = set().union(*(self.admissions.get(key, set()) for key in keys))
+        add(exact, EXACT_ADMISSION, StatementLine.Method.ADMISSION)
+        if not exact:
+            mistyped = set().union(*(self.mistyped_admissions(key) for key in keys if len(key) >= 4))
+            # In a dense run of numbers one typo reaches several learners: none of them is likely
+            add(mistyped, TYPO_ADMISSION if len(mistyped) == 1 else AMBIGUOUS_TYPO, StatementLine.Method.ADMISSION_TYPO)
+
+        phones = {to_e164(found, self.country) for found in PHONE_RE.findall(reference or '')}
+        phones = (phones | {payer_phone}) - {''}
+        for phone in phones:
+            add(self.phones.get(phone, ()), PHONE, StatementLine.Method.PHONE)
+
+        # Learner names typed into the reference. Common names are shared by
+        # hundreds of learners, so candidates come from pairs of words (set
+        # intersections) and single words only where they are rare
+        postings = [
+            set().union(*(self.words[similar] for similar in self.similar_words(word)))
+            for word in name_words(reference)
+        ]
+        postings = [posting for posting in postings if posting]
+        named = set(scores) & set().union(*postings) if postings else set()
+        for i, posting in enumerate(postings):
+            if len(posting) <= MAX_NAME_POSTING:
+                named |= {student_id for student_id in posting if self.name_length[student_id] == 1}
+            for other in postings[i + 1:]:
+                named |= posting & other
+        for student_id in named:
+            count = sum(student_id in posting for posting in postings)
+            length = self.name_length[student_id]
+            if count >= 2 or count == length:
+                add([student_id], LEARNER_NAME * min(count, length) // max(length, 1), StatementLine.Method.NAME)
+
+        # The payer's name backs up learners already in the running
+        payer_words = name_words(payer)
+        if payer_words:
+            for student_id in list(scores):
+                shared = len(payer_words & self.guardian_words[student_id])
+                if shared:
+                    scores[student_id] += GUARDIAN_NAME * min(shared, 2) // 2
+
+        ranked = scores.most_common(MAX_CANDIDATES)
+        candidates = [
+            {
+                'student': str(student_id),
+                'admission_number': self.students[student_id][0],
+                'name': self.students[student_id][1],
+                'score': score,
+                'reasons': [method for method in METHOD_ORDER if method in reasons[student_id]],
+            }
+            for student_id, score in ranked
+        ]
+        if ranked:
+            best_id, best = ranked[0]
+            runner_up = ranked[1][1] if len(ranked) > 1 else 0
+            if best >= CONFIDENT and best - runner_up >= MARGIN:
+                method = next(method for method in METHOD_ORDER if method in reasons[best_id])
+                return StatementLine.Status.MATCHED, method, best, best_id, candidates
+        return StatementLine.Status.REVIEW, '', ranked[0][1] if ranked else 0, None, candidates
+
+
+# ── Reading ─────────────────────────────────────────────────────────────────
+
+# Statement columns by what they hold; headers are compared lower-cased with
+# everything but letters and digits removed ("Receipt No." → "receiptno")
+COLUMNS = {
+    'transaction_ref': ('receiptno', 'receipt', 'transactionid', 'transid', 'transactionreference',
+                        'bankreference', 'reference', 'ref'),
+    'paid_at': ('completiontime', 'transtime', 'transactiondate', 'valuedate', 'postingdate', 'date',
+                'initiationtime'),
+    'amount': ('paidin', 'credit', 'creditamount', 'transamount', 'deposit', 'amount'),
+    'account_reference': ('acno', 'accountno', 'accountnumber', 'billrefnumber', 'billreference',
+                          'accountreference'),
+    'payer': ('otherpartyinfo', 'payer', 'payername', 'customername', 'sender', 'name'),
+    'narration': ('details', 'narration', 'description', 'particulars'),
+    'phone': ('msisdn', 'phonenumber', 'phone', 'mobile'),
+    'state': ('transactionstatus', 'status'),
+}
+DATE_FORMATS = (
+    '%d-%m-%Y %H:%M:%S', '%Y-%m-%d %H:%M:%S', '%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M',
+    '%Y-%m-%dT%H:%M:%S', '%d-%m-%Y', '%Y-%m-%d', '%d/%m/%Y', '%d-%b-%Y', '%d %b %Y',
+)
+
+
+def column_map(header):
+    keys = [re.sub(r"[^a-z0-9]", "", name.lower()) for name in header]
+    columns = {}
+    for field, aliases in COLUMNS.items():
+        for alias in aliases:
+            if alias in keys and keys.index(alias) not in columns.values():
+                columns[field] = keys.index(alias)
+                break
+    return columns
+
+
+def parse_amount(value):
+    value = re.sub(r"(?i)[,\s]|kes|ksh", "", value or '')
+    try:
+        return Decimal(value) if value else None
+    except InvalidOperation:
+        return None
+
+
+def parse_paid_at(value):
+    value = (value or '').strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return timezone.make_aware(datetime.datetime.strptime(value, fmt))
+        except ValueError:
+            continue
+    return None
+
+
+def read_statement(rows, country=DEFAULT_COUNTRY):
+    """
+    Unsaved StatementLines for the credits in `rows` (header first, as
+    apps.core.imports.iter_rows yields them), plus the number of rows left
+    out: debits, failed transactions and rows without a readable amount.
+    """
+    rows = iter(rows)
+    columns = column_map(next(rows, None) or [])
+    if 'amount' not in columns:
+        raise ValueError("No amount column found (expected e.g. 'Paid In', 'Credit' or 'Amount').")
+
+    def cell(values, field):
+        index = columns.get(field)
+        return values[index].strip() if index is not None and index < len(values) else ''
+
+    lines, skipped = [], 0
+    for number, values in enumerate(rows, start=2):
+        if not any(values):
+            continue
+        amount = parse_amount(cell(values, 'amount'))
+        state = cell(values, 'state').lower()
+        if amount is None or amount <= 0 or (state and state not in ('completed', 'success', 'successful')):
+            skipped += 1
+            continue
+
+        payer, phone = cell(values, 'payer'), cell(values, 'phone')
+        other_party = OTHER_PARTY_RE.match(payer)
+        if other_party:  # M-Pesa "254712345678 - JANE DOE", the number often masked
+            phone, payer = other_party.groups()
+        # Bank exports without an account column carry the reference in the narration
+        reference = cell(values, 'account_reference' if 'account_reference' in columns else 'narration')
+        lines.append(StatementLine(
+            row_number=number,
+            transaction_ref=cell(values, 'transaction_ref')[:50],
+            paid_at=parse_paid_at(cell(values, 'paid_at')),
+            amount=amount,
+            account_reference=reference[:255],
+            payer=payer[:150],
+            payer_phone='' if '*' in phone else to_e164(phone, country),
+        ))
+    return lines, skipped
+
+
+# ── Reconciling ─────────────────────────────────────────────────────────────
+
+def lock_statements(school_id):
+    """Serialise statement imports within a school for the current transaction."""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [f"statements:{school_id}"])
+
+
+def imported_refs(school, refs, batch_size=5000):
+    refs = list(refs)
+    found = set()
+    for start in range(0, len(refs), batch_size):
+        found.update(
+            StatementLine.objects
+            .filter(school=school, transaction_ref__in=refs[start:start + batch_size])
+            .exclude(status=StatementLine.Status.DUPLICATE)
+            .values_list('transaction_ref', flat=True)
+        )
+    return found
+
+
+def payment(line, source, user=None):
+    return LedgerEntry(
+        school_id=line.school_id,
+        student_id=line.student_id,
+        kind=LedgerEntry.Kind.PAYMENT,
+        amount=-line.amount,
+        description=f"{StatementImport.Source(source).label} payment",
+        reference=line.transaction_ref,
+        posted_at=line.paid_at or timezone.now(),
+        created_by=user,
+    )
+
+
+def reconcile(school, rows, source, file_name='', user=None, dry_run=False, directory=None):
+    """
+    Match a statement's credits (`rows` header first) to `school`'s learners,
+    post the confident ones as payments and keep the rest for review.
+    Returns (StatementImport, lines); nothing is written with dry_run.
+    """
+    with transaction.atomic():
+        lock_statements(school.id)
+        lines, _ = read_statement(rows, school.country)
+        directory = directory or Directory.for_school(school)
+        seen = imported_refs(school, {line.transaction_ref for line in lines} - {''})
+
+        statement = StatementImport(school=school, source=source, file_name=file_name[:255], created_by=user)
+        for line in lines:
+            line.school = school
+            if line.transaction_ref and line.transaction_ref in seen:
+                line.status = StatementLine.Status.DUPLICATE
+                statement.duplicates += 1
+                continue
+            seen.add(line.transaction_ref)
+            line.status, line.method, line.score, line.student_id, line.candidates = directory.match(
+                line.account_reference, line.payer, line.payer_phone,
+            )
+            if line.status == StatementLine.Status.MATCHED:
+                statement.matched += 1
+                statement.amount_posted += line.amount
+            else:
+                statement.review += 1
+        statement.lines = len(lines)
+        if dry_run:
+            return statement, lines
+
+        statement.save()
+        matched = [line for line in lines if line.status == StatementLine.Status.MATCHED]
+        for line, entry in zip(matched, post_entries([payment(line, source, user) for line in matched])):
+            line.ledger_entry = entry
+        for line in lines:
+            line.statement = statement
+        StatementLine.objects.bulk_create(lines, batch_size=2000)
+    return statement, lines
+
+
+def assign_line(line, student, user=None):
+    """Resolve a review line: post it as `student`'s payment."""
+    with transaction.atomic():
+        line = StatementLine.objects.select_for_update().select_related('statement').get(pk=line.pk)
+        if line.status != StatementLine.Status.REVIEW:
+            raise ValueError(f"This line is {line.get_status_display().lower()}, not awaiting review.")
+        if student.school_id != line.school_id:
+            raise ValueError("The student belongs to another school.")
+        line.student = student
+        line.ledger_entry = post_entries([payment(line, line.statement.source, user)])[0]
+        line.status, line.method = StatementLine.Status.MATCHED, StatementLine.Method.MANUAL
+        line.resolved_by, line.resolved_at = user, timezone.now()
+        line.save(update_fields=['student', 'ledger_entry', 'status', 'method', 'resolved_by', 'resolved_at'])
+        StatementImport.objects.filter(pk=line.statement_id).update(
+            matched=F('matched') + 1,
+            review=F('review') - 1,
+            amount_posted=F('amount_posted') + line.amount,
+        )
+    return line
+
+
+def ignore_line(line, user=None):
+    """Resolve a review line without posting it (not a fee payment, refunded...)."""
+    with transaction.atomic():
+        line = StatementLine.objects.select_for_update().get(pk=line.pk)
+        if line.status != StatementLine.Status.REVIEW:
+            raise ValueError(f"This line is {line.get_status_display().lower()}, not awaiting review.")
+        line.status = StatementLine.Status.IGNORED
+        line.resolved_by, line.resolved_at = user, timezone.now()
+        line.save(update_fields=['status', 'resolved_by', 'resolved_at'])
+        StatementImport.objects.filter(pk=line.statement_id).update(review=F('review') - 1)
+    return line
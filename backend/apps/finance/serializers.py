@@ -1,10 +1,13 @@
 # apps/finance/serializers.py
 from rest_framework import serializers
-from .models import FeeCategory, FeeItem
+from .models import (
+    FeeCategory, FeeItem, FeeMatrix, Invoice, InvoiceLine, LedgerEntry, StatementImport, StatementLine,
+)
 from apps.school.serializers import SchoolMiniSerializer  # if you have one, or create it
 from apps.academics.serializers import GradeLevelSerializer, DepartmentSerializer
 from apps.school.models import School   # ← add this line!
 from apps.academics.models import GradeLevel, Department  # ← add this line
+from apps.students.models import Student
 from rest_framework.fields import UUIDField
 from uuid import UUID
 
@@ -98,4 +101,119 @@ class FeeItemCreateUpdateSerializer(serializers.ModelSerializer):
             instance.grade_levels.set(grade_level_ids)
         if department_ids is not None:
             instance.departments.set(department_ids)
-        return instance
\ No newline at end of file
+        return instance
+
+class LedgerEntrySerializer(serializers.ModelSerializer):
+    kind_display = serializers.CharField(source='get_kind_display', read_only=True)
+    admission_number = serializers.CharField(source='student.admission_number', read_only=True)
+
+    class Meta:
+        model = LedgerEntry
+        fields = [
+            'id', 'student', 'admission_number', 'kind', 'kind_display',
+            'amount', 'balance_after', 'description', 'reference',
+            'reverses', 'posted_at', 'created_by',
+        ]
+        read_only_fields = fields
+
+
+class LedgerPostSerializer(serializers.Serializer):
+    """A charge or payment is entered as a positive amount; an adjustment carries its sign."""
+    student = serializers.PrimaryKeyRelatedField(queryset=Student.objects.all())
+    kind = serializers.ChoiceField(choices=LedgerEntry.Kind.choices)
+    amount = serializers.DecimalField(max_digits=12, decimal_places=2)
+    description = serializers.CharField(max_length=255, required=False, allow_blank=True, default='')
+    reference = serializers.CharField(max_length=100, required=False, allow_blank=True, default='')
+
+    def validate_student(self, value):
+        user = self.context['request'].user
+        if not user.is_superuser and not School.objects.filter(id=value.school_id, users=user).exists():
+            raise serializers.ValidationError("You do not have permission to post to this student's account.")
+        return value
+
+    def validate(self, attrs):
+        if attrs['amount'] == 0:
+            raise serializers.ValidationError({'amount': "Amount cannot be zero."})
+        if attrs['kind'] != LedgerEntry.Kind.ADJUSTMENT and attrs['amount'] < 0:
+            raise serializers.ValidationError({'amount': "Charges and payments take a positive amount."})
+        return attrs
+
+
+class InvoiceLineSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = InvoiceLine
+        fields = ['id', 'fee_item', 'period', 'description', 'amount']
+
+
+class InvoiceSerializer(serializers.ModelSerializer):
+    lines = InvoiceLineSerializer(many=True, read_only=True)
+    admission_number = serializers.CharField(source='student.admission_number', read_only=True)
+
+    class Meta:
+        model = Invoice
+        fields = ['id', 'reference', 'student', 'admission_number', 'term', 'year', 'total', 'lines', 'created_at']
+
+
+class BillingRunSerializer(serializers.Serializer):
+    school = serializers.PrimaryKeyRelatedField(queryset=School.objects.all())
+    term = serializers.CharField(max_length=20)  # "2026-T1"
+    year = serializers.IntegerField(min_value=2000, max_value=2100)
+    months = serializers.IntegerField(min_value=1, max_value=12, default=3)  # monthly items are billed × months
+    dry_run = serializers.BooleanField(default=False)
+
+    def validate_school(self, value):
+        user = self.context['request'].user
+        if not user.is_superuser and not School.objects.filter(id=value.id, users=user).exists():
+            raise serializers.ValidationError("You do not have permission to bill this school.")
+        return value
+
+
+class StatementImportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = StatementImport
+        fields = [
+            'id', 'school', 'source', 'file_name', 'lines', 'matched', 'review',
+            'duplicates', 'amount_posted', 'created_at',
+        ]
+        read_only_fields = fields
+
+
+class StatementUploadSerializer(serializers.Serializer):
+    school = serializers.PrimaryKeyRelatedField(queryset=School.objects.all())
+    source = serializers.ChoiceField(choices=StatementImport.Source.choices)
+    file = serializers.FileField()
+    dry_run = serializers.BooleanField(default=False)
+
+    def validate_school(self, value):
+        user = self.context['request'].user
+        if not user.is_superuser and not School.objects.filter(id=value.id, users=user).exists():
+            raise serializers.ValidationError("You do not have permission to reconcile for this school.")
+        return value
+
+
+class StatementLineSerializer(serializers.ModelSerializer):
+    admission_number = serializers.CharField(source='student.admission_number', read_only=True, default=None)
+
+    class Meta:
+        model = StatementLine
+        fields = [
+            'id', 'statement', 'row_number', 'transaction_ref', 'paid_at', 'amount',
+            'account_reference', 'payer', 'payer_phone', 'status', 'method', 'score',
+            'student', 'admission_number', 'candidates', 'ledger_entry', 'resolved_at',
+        ]
+        read_only_fields = fields
+
+
+class StatementLineAssignSerializer(serializers.Serializer):
+    student = serializers.PrimaryKeyRelatedField(queryset=Student.objects.all())
+
+
+class FeeMatrixSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = FeeMatrix
+        fields = ['id', 'school', 'grade_level', 'department', 'frequency', 'total', 'items', 'updated_at']
+        read_only_fields = fields
+
+
+class FeeScheduleQuerySerializer(serializers.Serializer):
+    student = serializers.UUIDField()
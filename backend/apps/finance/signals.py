@@ -0,0 +1,81 @@
+# apps/finance/signals.py
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from apps.academics.models import Department, GradeLevel
+from apps.core.audit import register_audit
+from .fee_matrix import note_after, note_before, note_school
+from .models import FeeCategory, FeeItem
+
+
+# ── Fee matrix ──────────────────────────────────────────────────────────────
+# The cells an edit reaches are noted before it (pre_*) and worked out again
+# on commit: an item moved from Grade 1 to Grade 2 refreshes both.
+
+@receiver(pre_save, sender=FeeItem)
+@receiver(pre_delete, sender=FeeItem)
+def fee_item_before(sender, instance, **kwargs):
+    if instance.pk:
+        note_before([instance.pk])
+
+
+@receiver(post_save, sender=FeeItem)
+@receiver(post_delete, sender=FeeItem)
+def fee_item_after(sender, instance, created=False, **kwargs):
+    note_after([instance.pk], created=created)
+
+
+@receiver(m2m_changed, sender=FeeItem.grade_levels.through)
+@receiver(m2m_changed, sender=FeeItem.departments.through)
+def fee_item_reach_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # Forward: item.grade_levels.add(...); reverse: grade.applicable_fees.add(item, ...)
+    if not reverse:
+        item_ids = [instance.pk]
+    elif pk_set is not None:
+        item_ids = list(pk_set)
+    else:  # grade.applicable_fees.clear()
+        column = 'gradelevel_id' if sender is FeeItem.grade_levels.through else 'department_id'
+        item_ids = list(sender.objects.filter(**{column: instance.pk}).values_list('feeitem_id', flat=True))
+    if action.startswith('pre_'):
+        note_before(item_ids)
+    else:
+        note_after(item_ids)
+
+
+@receiver(pre_delete, sender=GradeLevel)
+@receiver(pre_delete, sender=Department)
+def reach_target_deleted(sender, instance, **kwargs):
+    # The cascade removes the through rows without m2m_changed: an item that
+    # named only this grade (or department) now applies to all of them
+    column = 'gradelevel_id' if sender is GradeLevel else 'department_id'
+    through = FeeItem.grade_levels.through if sender is GradeLevel else FeeItem.departments.through
+    item_ids = list(through.objects.filter(**{column: instance.pk}).values_list('feeitem_id', flat=True))
+    if item_ids:
+        note_before(item_ids)
+        note_after(item_ids)
+
+
+@receiver(pre_save, sender=FeeCategory)
+def fee_category_before(sender, instance, **kwargs):
+    instance._old_school_id = (
+        FeeCategory.objects.filter(pk=instance.pk).values_list('school_id', flat=True).first() if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=FeeCategory)
+def fee_category_saved(sender, instance, created, **kwargs):
+    # Its name, order and "mandatory" flag are copied into its items' cells
+    if created:
+        return
+    old_school_id = getattr(instance, '_old_school_id', None)
+    if old_school_id and old_school_id != instance.school_id:
+        note_school(old_school_id)
+        note_school(instance.school_id)
+    else:
+        note_after(list(instance.items.values_list('id', flat=True)))
+
+
+# ── Audit log ───────────────────────────────────────────────────────────────
+
+register_audit(FeeCategory)
+register_audit(FeeItem, school='category__school')
@@ -1,3 +1,304 @@
-from django.test import TestCase
+import datetime
+import os
+from decimal import Decimal
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from apps.academics.models import GradeLevel
+from apps.core.imports import iter_rows
+from apps.school.models import School
+from apps.students.models import Guardian, Student, StudentGuardian
+from .billing import bill_term
+from .ledger import post_entries, post_entry, reverse_entry, verify_ledger
+from .models import FeeCategory, FeeItem, Invoice, InvoiceLine, LedgerEntry, StatementImport, StatementLine
+from .reconciliation import Directory, read_statement, reconcile
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+# Amani and Baraka are siblings sharing John Otieno's phone
+STUDENTS = [
+    (1, 'ADM/2026/0101', 'Amani Otieno'),
+    (2, 'ADM/2026/0102', 'Baraka Otieno'),
+    (3, 'ADM/2026/0555', 'Chebet Kiprono'),
+    (4, 'ADM/2026/0780', 'Wanjiru Kamau'),
+]
+GUARDIANS = [
+    (10, 'John Otieno', '+254712345678'),
+    (11, 'Mary Chebet', '+254722000111'),
+]
+LINKS = [(1, 10), (2, 10), (3, 11)]
+
+
+def statement_rows(name):
+    with open(os.path.join(FIXTURES, name), 'rb') as fh:
+        return list(iter_rows(fh, name))
+
+
+class ReadStatementTests(SimpleTestCase):
+    def test_paybill_export(self):
+        lines, skipped = read_statement(statement_rows('paybill_statement.csv'))
+
+        self.assertEqual(skipped, 2)  # the failed payment and the withdrawal
+        self.assertEqual([line.transaction_ref for line in lines], ['SIJ4K7P2QA', 'SIJ4K9R5TB', 'SIJ5L1M8WC'])
+        first = lines[0]
+        self.assertEqual(first.row_number, 2)
+        self.assertEqual(first.amount, Decimal('5000.00'))
+        self.assertEqual(first.paid_at, timezone.make_aware(datetime.datetime(2026, 9, 3, 8, 15, 22)))
+        self.assertEqual(first.account_reference, 'ADM 2026/0101')
+        self.assertEqual((first.payer, first.payer_phone), ('JOHN OTIENO', '+254712345678'))
+        # A masked number is no use for matching
+        self.assertEqual((lines[1].payer, lines[1].payer_phone), ('MARY CHEBET', ''))
+
+    def test_bank_export_takes_the_reference_from_the_narration(self):
+        lines, skipped = read_statement(statement_rows('bank_statement.csv'))
+
+        self.assertEqual(skipped, 1)  # the debit
+        self.assertEqual([line.transaction_ref for line in lines], ['FT26245XK1', 'FT26246QW9'])
+        self.assertEqual(lines[0].account_reference, 'CASH DEPOSIT ADM 2026-0102 BARAKA OTIENO')
+        self.assertEqual(lines[0].amount, Decimal('12000.00'))
+        self.assertEqual(lines[0].paid_at, timezone.make_aware(datetime.datetime(2026, 9, 2)))
+        self.assertEqual(lines[0].payer, '')
+
+    def test_statement_without_an_amount_column_is_refused(self):
+        with self.assertRaises(ValueError):
+            read_statement([['receipt_no.', 'details'], ['SIJ4K7P2QA', 'Pay Bill']])
+
+
+class DirectoryMatchTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = Directory(STUDENTS, GUARDIANS, LINKS)
+
+    def candidates(self, result):
+        return {(candidate['student'], candidate['score']) for candidate in result[4]}
+
+    def test_exact_admission_number(self):
+        for reference in ('ADM 2026/0101', 'adm-2026-0101', '20260101'):
+            with self.subTest(reference=reference):
+                self.assertEqual(
+                    self.directory.match(reference)[:4],
+                    (StatementLine.Status.MATCHED, StatementLine.Method.ADMISSION, 100, 1),
+                )
+
+    def test_typo_reaching_one_learner(self):
+        # One typo on its own is a guess; the payer being the learner's guardian settles it
+        status, _, score, student, _ = self.directory.match('2026/0556')
+        self.assertEqual((status, score, student), (StatementLine.Status.REVIEW, 60, None))
+
+        self.assertEqual(
+            self.directory.match('2026/0556', payer='MARY CHEBET')[:4],
+            (StatementLine.Status.MATCHED, StatementLine.Method.ADMISSION_TYPO, 90, 3),
+        )
+
+    def test_typo_reaching_several_learners_goes_to_review(self):
+        result = self.directory.match('ADM 2026/0103', payer='JOHN OTIENO')
+
+        self.assertEqual((result[0], result[3]), (StatementLine.Status.REVIEW, None))
+        self.assertEqual(self.candidates(result), {('1', 70), ('2', 70)})
+
+    def test_guardian_phone_shared_by_siblings_goes_to_review(self):
+        result = self.directory.match('0712345678')
+
+        self.assertEqual((result[0], result[3]), (StatementLine.Status.REVIEW, None))
+        self.assertEqual(self.candidates(result), {('1', 80), ('2', 80)})
+        self.assertTrue(all(candidate['reasons'] == [StatementLine.Method.PHONE] for candidate in result[4]))
+
+    def test_guardian_phone_of_one_learner(self):
+        self.assertEqual(
+            self.directory.match('', payer_phone='+254722000111')[:4],
+            (StatementLine.Status.MATCHED, StatementLine.Method.PHONE, 80, 3),
+        )
+
+
+class ReconcileTests(TestCase):
+    def setUp(self):
+        self.school = School.objects.create(name="Reconcile Academy")
+        students = {}
+        for _, admission_number, full_name in STUDENTS:
+            first_name, last_name = full_name.split()
+            students[admission_number] = Student.objects.create(
+                school=self.school, admission_number=admission_number, first_name=first_name,
+                last_name=last_name, gender=Student.Gender.MALE, date_of_birth=datetime.date(2015, 1, 1),
+            )
+        john = Guardian.objects.create(school=self.school, full_name="John Otieno", phone="0712345678")
+        mary = Guardian.objects.create(school=self.school, full_name="Mary Chebet", phone="0722000111")
+        for admission_number, guardian in (
+            ('ADM/2026/0101', john), ('ADM/2026/0102', john), ('ADM/2026/0555', mary),
+        ):
+            StudentGuardian.objects.create(student=students[admission_number], guardian=guardian)
+        self.students = students
+
+    def test_reimport_marks_every_line_duplicate(self):
+        rows = statement_rows('paybill_statement.csv')
+        statement, lines = reconcile(self.school, rows, StatementImport.Source.MPESA)
+
+        self.assertEqual((statement.matched, statement.review, statement.duplicates), (2, 1, 0))
+        self.assertEqual(statement.amount_posted, Decimal('8500.00'))
+        self.assertEqual(
+            [line.student_id for line in lines],
+            [self.students['ADM/2026/0101'].id, self.students['ADM/2026/0555'].id, None],
+        )
+        self.students['ADM/2026/0101'].refresh_from_db()
+        self.assertEqual(self.students['ADM/2026/0101'].fee_balance, Decimal('-5000.00'))
+
+        statement, lines = reconcile(self.school, rows, StatementImport.Source.MPESA)
+
+        self.assertEqual((statement.matched, statement.review, statement.duplicates), (0, 0, 3))
+        self.assertTrue(all(line.status == StatementLine.Status.DUPLICATE for line in lines))
+        self.assertEqual(LedgerEntry.objects.filter(school=self.school).count(), 2)
+        self.students['ADM/2026/0101'].refresh_from_db()
+        self.assertEqual(self.students['ADM/2026/0101'].fee_balance, Decimal('-5000.00'))
+
+
+class LedgerTests(TestCase):
+    def setUp(self):
+        self.school = School.objects.create(name="Ledger Academy")
+        self.student = Student.objects.create(
+            school=self.school, admission_number='ADM/2026/0101', first_name='Amani', last_name='Otieno',
+            gender=Student.Gender.MALE, date_of_birth=datetime.date(2015, 1, 1),
+        )
+
+    def entry(self, kind, amount):
+        return LedgerEntry(student_id=self.student.id, kind=kind, amount=Decimal(amount))
+
+    def test_entries_for_one_student_post_in_list_order(self):
+        entries = post_entries([
+            self.entry(LedgerEntry.Kind.CHARGE, '12000'),
+            self.entry(LedgerEntry.Kind.PAYMENT, '-5000'),
+            self.entry(LedgerEntry.Kind.ADJUSTMENT, '-500'),
+            self.entry(LedgerEntry.Kind.CHARGE, '1500'),
+        ])
+
+        self.assertEqual(
+            [entry.balance_after for entry in entries],
+            [Decimal('12000'), Decimal('7000'), Decimal('6500'), Decimal('8000')],
+        )
+        self.assertEqual(
+            list(LedgerEntry.objects.filter(student=self.student).values_list('balance_after', flat=True)),
+            [Decimal('12000.00'), Decimal('7000.00'), Decimal('6500.00'), Decimal('8000.00')],
+        )
+        self.student.refresh_from_db()
+        self.assertEqual(self.student.fee_balance, Decimal('8000.00'))
+        self.assertEqual(entries[0].school_id, self.school.id)
+
+    def test_an_entry_is_reversed_once(self):
+        payment = post_entry(self.student, LedgerEntry.Kind.PAYMENT, '3000', reference='SIJ4K7P2QA')
+        reversal = reverse_entry(payment)
+
+        self.assertEqual(reversal.amount, Decimal('3000'))
+        self.assertEqual(reversal.reverses_id, payment.id)
+        with self.assertRaisesMessage(ValueError, "already been reversed"):
+            reverse_entry(payment)
+
+        self.assertEqual(LedgerEntry.objects.filter(student=self.student).count(), 2)
+        self.student.refresh_from_db()
+        self.assertEqual(self.student.fee_balance, Decimal('0.00'))
+
+    def test_verify_ledger_fixes_drift(self):
+        first, second = post_entries([
+            self.entry(LedgerEntry.Kind.CHARGE, '12000'),
+            self.entry(LedgerEntry.Kind.PAYMENT, '-5000'),
+        ])
+        self.assertEqual(verify_ledger(self.school.id), [])
+
+        # Writes that went around the ledger: a stale running balance and a hand-edited fee_balance
+        LedgerEntry.objects.filter(pk=second.pk).update(balance_after=Decimal('12000'))
+        Student.objects.filter(pk=self.student.pk).update(fee_balance=Decimal('100'))
+
+        drift = verify_ledger(self.school.id, fix=True)
+
+        self.assertEqual(
+            drift, [(self.student.id, 'ADM/2026/0101', Decimal('100.00'), Decimal('7000.00'), 1, second.id)],
+        )
+        self.assertEqual(verify_ledger(self.school.id), [])
+        self.assertEqual(LedgerEntry.objects.get(pk=second.pk).balance_after, Decimal('7000.00'))
+        self.student.refresh_from_db()
+        self.assertEqual(self.student.fee_balance, Decimal('7000.00'))
+
+
+class BillingTests(TestCase):
+    def setUp(self):
+        self.school = School.objects.create(name="Billing Academy")
+        self.grade_1 = GradeLevel.objects.create(school=self.school, name="Grade 1", order=1)
+        self.grade_2 = GradeLevel.objects.create(school=self.school, name="Grade 2", order=2)
+        self.students = {
+            admission_number: Student.objects.create(
+                school=self.school, admission_number=admission_number, first_name=first_name,
+                last_name='Otieno', gender=Student.Gender.MALE, date_of_birth=datetime.date(2015, 1, 1),
+                current_class=grade,
+            )
+            for admission_number, first_name, grade in (
+                ('ADM/2026/0101', 'Amani', self.grade_1),
+                ('ADM/2026/0102', 'Baraka', self.grade_2),
+                ('ADM/2026/0103', 'Chebet', None),
+            )
+        }
+        self.category = FeeCategory.objects.create(school=self.school, name="School fees")
+        # The fee matrix is refreshed when the transaction commits
+        with self.captureOnCommitCallbacks(execute=True):
+            tuition = FeeItem.objects.create(category=self.category, name="Tuition", amount=10000)
+            tuition.grade_levels.set([self.grade_1])
+            FeeItem.objects.create(category=self.category, name="Activity", amount=2000)
+            FeeItem.objects.create(category=self.category, name="Uniform", amount=3000, frequency='one_time')
+            FeeItem.objects.create(category=self.category, name="Lunch", amount=1000, frequency='monthly')
+
+    def invoice_totals(self, term):
+        return dict(Invoice.objects.filter(term=term).values_list('student__admission_number', 'total'))
+
+    def balances(self):
+        return dict(Student.objects.filter(school=self.school).values_list('admission_number', 'fee_balance'))
+
+    def test_bills_each_learner_what_applies_to_its_class(self):
+        summary = bill_term(self.school, '2026-T1', 2026)
+
+        self.assertEqual((summary['to_bill'], summary['lines'], summary['invoices_created']), (3, 10, 3))
+        totals = {
+            'ADM/2026/0101': Decimal('18000.00'),  # tuition, activity, uniform, 3 months' lunch
+            'ADM/2026/0102': Decimal('8000.00'),   # Grade 2 pays no tuition
+            'ADM/2026/0103': Decimal('8000.00'),
+        }
+        self.assertEqual(self.invoice_totals('2026-T1'), totals)
+        self.assertEqual(self.balances(), totals)
+        self.assertEqual(
+            list(
+                InvoiceLine.objects.filter(student=self.students['ADM/2026/0101'])
+                .order_by('description').values_list('description', 'period', 'amount')
+            ),
+            [
+                ('Activity', '2026-T1', Decimal('2000.00')),
+                ('Lunch × 3 months', '2026-T1', Decimal('3000.00')),
+                ('Tuition', '2026-T1', Decimal('10000.00')),
+                ('Uniform', 'once', Decimal('3000.00')),
+            ],
+        )
+
+    def test_rerun_bills_only_what_was_added(self):
+        bill_term(self.school, '2026-T1', 2026)
+        self.assertEqual(bill_term(self.school, '2026-T1', 2026)['to_bill'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            FeeItem.objects.create(category=self.category, name="Exam", amount=500)
+        newcomer = Student.objects.create(
+            school=self.school, admission_number='ADM/2026/0104', first_name='Wanjiru', last_name='Kamau',
+            gender=Student.Gender.FEMALE, date_of_birth=datetime.date(2015, 1, 1), current_class=self.grade_2,
+        )
+        summary = bill_term(self.school, '2026-T1', 2026)
+
+        self.assertEqual((summary['invoices_created'], summary['invoices_topped_up']), (1, 3))
+        self.assertEqual(Invoice.objects.filter(term='2026-T1').count(), 4)
+        self.assertEqual(self.invoice_totals('2026-T1')['ADM/2026/0101'], Decimal('18500.00'))
+        self.assertEqual(self.invoice_totals('2026-T1')[newcomer.admission_number], Decimal('8500.00'))
+        self.assertEqual(self.balances()['ADM/2026/0101'], Decimal('18500.00'))
+
+        # The next term charges the one-time uniform to nobody who has paid it
+        bill_term(self.school, '2026-T2', 2026)
+        self.assertEqual(self.invoice_totals('2026-T2')['ADM/2026/0101'], Decimal('15500.00'))
+        self.assertFalse(InvoiceLine.objects.filter(invoice__term='2026-T2', period='once').exists())
+        self.assertEqual(verify_ledger(self.school.id), [])
+
+    def test_dry_run_writes_nothing(self):
+        summary = bill_term(self.school, '2026-T1', 2026, dry_run=True)
+
+        self.assertEqual((summary['to_bill'], summary['total']), (3, Decimal('34000.00')))
+        self.assertFalse(Invoice.objects.exists())
+        self.assertFalse(LedgerEntry.objects.exists())
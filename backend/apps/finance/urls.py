@@ -4,11 +4,21 @@ from rest_framework.routers import DefaultRouter
 from .views import (
     FeeCategoryViewSet,
     FeeItemViewSet,
+    FeeMatrixViewSet,
+    InvoiceViewSet,
+    LedgerEntryViewSet,
+    StatementImportViewSet,
+    StatementLineViewSet,
 )
 
 router = DefaultRouter()
 router.register(r'fee-categories', FeeCategoryViewSet, basename='fee-category')
 router.register(r'fee-items', FeeItemViewSet, basename='fee-item')
+router.register(r'fee-matrix', FeeMatrixViewSet, basename='fee-matrix')
+router.register(r'invoices', InvoiceViewSet, basename='invoice')
+router.register(r'ledger', LedgerEntryViewSet, basename='ledger-entry')
+router.register(r'statements', StatementImportViewSet, basename='statement')
+router.register(r'statement-lines', StatementLineViewSet, basename='statement-line')
 
 urlpatterns = [
     path('', include(router.urls)),
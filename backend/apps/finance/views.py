@@ -1,13 +1,33 @@
 # apps/finance/views.py
-from rest_framework.viewsets import ModelViewSet
+from rest_framework import mixins, serializers, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.viewsets import GenericViewSet, ModelViewSet
 from rest_framework.permissions import IsAuthenticated
-from .models import FeeCategory, FeeItem
+from django_filters.rest_framework import DjangoFilterBackend
+from .billing import bill_term
+from .fee_matrix import fee_schedule
+from .ledger import post_entry, reverse_entry
+from .models import FeeCategory, FeeItem, FeeMatrix, Invoice, LedgerEntry, StatementImport, StatementLine
+from .reconciliation import assign_line, ignore_line, reconcile
 from .serializers import (
     FeeCategorySerializer,
     FeeCategoryCreateUpdateSerializer,
     FeeItemSerializer,
-    FeeItemCreateUpdateSerializer
+    FeeItemCreateUpdateSerializer,
+    BillingRunSerializer,
+    FeeMatrixSerializer,
+    FeeScheduleQuerySerializer,
+    InvoiceSerializer,
+    LedgerEntrySerializer,
+    LedgerPostSerializer,
+    StatementImportSerializer,
+    StatementLineAssignSerializer,
+    StatementLineSerializer,
+    StatementUploadSerializer,
 )
+from apps.core.imports import iter_rows
+from apps.students.models import Student
 from apps.core.permissions import IsAssociatedWithSchool
 
 class FeeCategoryViewSet(ModelViewSet):
@@ -55,4 +75,179 @@ class FeeItemViewSet(ModelViewSet):
 
     def get_queryset(self):
         user = self.request.user
-        return self.queryset.filter(category__school__users=user)
\ No newline at end of file
+        return self.queryset.filter(category__school__users=user)
+
+
+class LedgerEntryViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, mixins.CreateModelMixin, GenericViewSet):
+    """
+    Student fee ledger. Lines can be posted and reversed, never edited or
+    deleted; every post moves the student's fee_balance in the same transaction.
+    Filter with ?student=<uuid> for a statement.
+    """
+    queryset = LedgerEntry.objects.select_related('student').all()
+    permission_classes = [IsAuthenticated, IsAssociatedWithSchool]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['student', 'kind', 'reference']
+
+    def get_serializer_class(self):
+        if self.action == 'create':
+            return LedgerPostSerializer
+        return LedgerEntrySerializer
+
+    def get_queryset(self):
+        user = self.request.user
+        if user.is_superuser:
+            return self.queryset
+        return self.queryset.filter(school__users=user)
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            entry = post_entry(user=request.user, **serializer.validated_data)
+        except ValueError as exc:
+            raise serializers.ValidationError(str(exc))
+        return Response(LedgerEntrySerializer(entry).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['post'])
+    def reverse(self, request, pk=None):
+        """Cancel this line with an equal and opposite adjustment."""
+        try:
+            entry = reverse_entry(self.get_object(), user=request.user, reason=request.data.get('reason', ''))
+        except ValueError as exc:
+            raise serializers.ValidationError(str(exc))
+        return Response(LedgerEntrySerializer(entry).data, status=status.HTTP_201_CREATED)
+
+
+class InvoiceViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, GenericViewSet):
+    """
+    Term invoices. POST invoices/generate/ bills a school for a term
+    ({"school", "term", "year", "months", "dry_run"}); re-running it only
+    bills what is new, so it is safe to repeat.
+    """
+    queryset = Invoice.objects.select_related('student').prefetch_related('lines').all()
+    serializer_class = InvoiceSerializer
+    permission_classes = [IsAuthenticated, IsAssociatedWithSchool]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['student', 'term', 'year']
+
+    def get_queryset(self):
+        user = self.request.user
+        if user.is_superuser:
+            return self.queryset
+        return self.queryset.filter(school__users=user)
+
+    @action(detail=False, methods=['post'])
+    def generate(self, request):
+        serializer = BillingRunSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        summary = bill_term(
+            data['school'], data['term'], data['year'], months=data['months'],
+            user=request.user, dry_run=data['dry_run'],
+        )
+        return Response(summary, status=status.HTTP_200_OK if data['dry_run'] else status.HTTP_201_CREATED)
+
+
+class StatementImportViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, GenericViewSet):
+    """
+    M-Pesa / bank statement reconciliation. POST statements/ with a CSV or
+    XLSX export ({"school", "source", "file", "dry_run"}) posts the confident
+    matches as payments; the rest wait in statement-lines/?status=REVIEW.
+    """
+    queryset = StatementImport.objects.all()
+    serializer_class = StatementImportSerializer
+    permission_classes = [IsAuthenticated, IsAssociatedWithSchool]
+
+    def get_queryset(self):
+        user = self.request.user
+        if user.is_superuser:
+            return self.queryset
+        return self.queryset.filter(school__users=user)
+
+    def create(self, request, *args, **kwargs):
+        serializer = StatementUploadSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        upload = data['file']
+        try:
+            statement, lines = reconcile(
+                data['school'], iter_rows(upload.file, upload.name), data['source'],
+                file_name=upload.name, user=request.user, dry_run=data['dry_run'],
+            )
+        except ValueError as exc:
+            raise serializers.ValidationError({'file': str(exc)})
+        body = StatementImportSerializer(statement).data
+        if data['dry_run']:
+            body['lines'] = StatementLineSerializer(lines, many=True).data
+            return Response(body)
+        return Response(body, status=status.HTTP_201_CREATED)
+
+
+class StatementLineViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, GenericViewSet):
+    """
+    Statement lines; the review queue is ?status=REVIEW. A review line is
+    resolved by assigning it to a student (posting the payment) or ignoring it.
+    """
+    queryset = StatementLine.objects.select_related('student').all()
+    serializer_class = StatementLineSerializer
+    permission_classes = [IsAuthenticated, IsAssociatedWithSchool]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['statement', 'status', 'method', 'student', 'transaction_ref']
+
+    def get_queryset(self):
+        user = self.request.user
+        if user.is_superuser:
+            return self.queryset
+        return self.queryset.filter(school__users=user)
+
+    @action(detail=True, methods=['post'])
+    def assign(self, request, pk=None):
+        line = self.get_object()
+        serializer = StatementLineAssignSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            line = assign_line(line, serializer.validated_data['student'], user=request.user)
+        except ValueError as exc:
+            raise serializers.ValidationError(str(exc))
+        return Response(StatementLineSerializer(line).data)
+
+    @action(detail=True, methods=['post'])
+    def ignore(self, request, pk=None):
+        try:
+            line = ignore_line(self.get_object(), user=request.user)
+        except ValueError as exc:
+            raise serializers.ValidationError(str(exc))
+        return Response(StatementLineSerializer(line).data)
+
+
+class FeeMatrixViewSet(mixins.ListModelMixin, GenericViewSet):
+    """
+    Applicable fee items and totals per grade level, department and
+    frequency, kept up to date as fee items change. ?grade_level=&department=
+    picks a cell; for-student/?student=<uuid> is a learner's fee schedule.
+    """
+    queryset = FeeMatrix.objects.all()
+    serializer_class = FeeMatrixSerializer
+    permission_classes = [IsAuthenticated, IsAssociatedWithSchool]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['school', 'grade_level', 'department', 'frequency']
+
+    def get_queryset(self):
+        user = self.request.user
+        if user.is_superuser:
+            return self.queryset
+        return self.queryset.filter(school__users=user)
+
+    @action(detail=False, methods=['get'], url_path='for-student')
+    def for_student(self, request):
+        query = FeeScheduleQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        students = Student.objects.all() if request.user.is_superuser else Student.objects.filter(school__users=request.user)
+        student = students.filter(pk=query.validated_data['student']).values('school_id', 'current_class_id').first()
+        if student is None:
+            raise serializers.ValidationError({'student': "Unknown student."})
+        schedule = fee_schedule(student['school_id'], student['current_class_id'])
+        return Response({
+            frequency: FeeMatrixSerializer(row).data for frequency, row in schedule.items()
+        })
@@ -0,0 +1,8 @@
+# apps/health/signals.py
+from apps.core.audit import register_audit
+from .models import Allergy, MedicalRecord, Vaccination
+
+# Medical details stay out of the log: only which fields changed is kept
+register_audit(MedicalRecord, redact=True)
+register_audit(Vaccination, redact=True)
+register_audit(Allergy, redact=True)
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class SchoolConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.school'  # ✅ full module path
+
+    def ready(self):
+        from apps.core.images import register_renditions
+        from .models import School
+        register_renditions(School, 'logo')
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('school', '0006_alter_school_academic_year_end_month_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='school',
+            name='logo_rendered',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+    ]
@@ -36,6 +36,7 @@ class School(models.Model):
     country = models.CharField(max_length=100, default="Kenya")
     website = models.URLField(blank=True)
     logo = models.ImageField(upload_to="school_logos/", blank=True, null=True)
+    logo_rendered = models.BooleanField(default=False, editable=False)  # thumb/medium built (core.images)
     currency = models.CharField(max_length=10, default="KES")
     
     # Official registration details
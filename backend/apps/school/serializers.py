@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from rest_framework.exceptions import PermissionDenied
 from .models import School, Module
+from apps.core.serializers import ImageRenditionField
 from uuid import UUID
 
 
@@ -9,7 +10,7 @@ class SchoolMiniSerializer(serializers.ModelSerializer):
     
     setup_complete = serializers.BooleanField(read_only=True)
     modules = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
-    logo = serializers.ImageField(read_only=True, allow_null=True)
+    logo = ImageRenditionField(read_only=True, allow_null=True)
     currency = serializers.CharField(read_only=True)
     owner = serializers.UUIDField(source="owner.id", read_only=True)
     class Meta:
@@ -33,6 +34,7 @@ class ModuleSerializer(serializers.ModelSerializer):
 
 class SchoolSerializer(serializers.ModelSerializer):
     modules = ModuleSerializer(many=True, read_only=True)
+    logo = ImageRenditionField(rendition='medium', read_only=True)
     owner = serializers.UUIDField(source="owner.id", read_only=True)
     class Meta:
         model = School
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class StudentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.students'
+
+    def ready(self):
+        from apps.core.images import register_renditions
+        from .models import Student
+        register_renditions(Student, 'photo')
+        from . import signals  # noqa: F401
@@ -0,0 +1,171 @@
+# apps/students/guardians.py
+"""
+Guardian matching and deduplication by normalised phone.
+
+Enrollment links the application's primary guardian to an existing
+Guardian of the school with the same E.164 phone (Guardian.phone_e164,
+indexed per school) and only creates one when there is none, so siblings
+share their parents instead of each getting a copy.
+
+find_duplicates()/merge_guardians() clean up the copies made before that
+(see the dedupe_guardians command): guardians of a school with the same
+phone and the same name are merged into the oldest one.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+
+from apps.core.audit import record_saves
+from apps.core.phones import to_e164
+from .households import lock_households, relabel
+from .models import Guardian, MedicalRecord, StudentGuardian
+from .search import index_students
+
+RELATIONSHIPS = {'FATHER', 'MOTHER', 'GUARDIAN'}
+
+# Copied onto the guardian that is kept when it has no value of its own
+FILLABLE_FIELDS = ('email', 'address', 'occupation', 'id_number', 'relationship')
+
+
+def name_key(full_name):
+    """'Jane  W. Wanjiku' and 'wanjiku jane w' agree: lower-cased words, sorted."""
+    return ' '.join(sorted(word.strip('.,').lower() for word in (full_name or '').split() if word.strip('.,')))
+
+
+# ── Intake ──────────────────────────────────────────────────────────────────
+
+def guardian_from_application(application, country):
+    relationship = (application.primary_guardian_relationship or '').strip().upper()
+    return Guardian(
+        school_id=application.school_id,
+        full_name=application.primary_guardian_name.strip(),
+        phone=application.primary_guardian_phone or '',
+        phone_e164=to_e164(application.primary_guardian_phone, country),
+        email=application.primary_guardian_email or None,
+        relationship=relationship if relationship in RELATIONSHIPS else 'OTHER' if relationship else '',
+        id_number=application.primary_guardian_id_number or '',
+    )
+
+
+def resolve_guardians(school, applications):
+    """
+    {application.id: Guardian} for `school`'s `applications` that name a
+    primary guardian: existing guardians matched by phone (one indexed query),
+    new ones created for the rest (one insert), siblings in the same batch
+    sharing one.
+    """
+    candidates = {
+        app.id: guardian_from_application(app, school.country)
+        for app in applications if app.primary_guardian_name
+    }
+    phones = {guardian.phone_e164 for guardian in candidates.values()} - {''}
+    existing = {}
+    if phones:
+        for guardian in (
+            Guardian.objects
+            .filter(school=school, phone_e164__in=phones, is_active=True)
+            .order_by('created_at')
+        ):
+            existing.setdefault(guardian.phone_e164, guardian)  # the oldest wins
+
+    resolved, created = {}, []
+    for app_id, candidate in candidates.items():
+        guardian = existing.get(candidate.phone_e164) if candidate.phone_e164 else None
+        if guardian is None:
+            guardian = candidate
+            created.append(candidate)
+            if candidate.phone_e164:
+                existing[candidate.phone_e164] = candidate
+        resolved[app_id] = guardian
+    Guardian.objects.bulk_create(created)
+    return resolved
+
+
+def link_primary_guardians(pairs):
+    """Link (student, guardian) pairs as primary guardians; one insert."""
+    StudentGuardian.objects.bulk_create(
+        [
+            StudentGuardian(student=student, guardian=guardian, is_primary=True, has_pickup_permission=True)
+            for student, guardian in pairs
+        ],
+        ignore_conflicts=True,
+    )
+
+
+# ── Deduplication ───────────────────────────────────────────────────────────
+
+def find_duplicates(school):
+    """
+    [(phone, guardians, name_groups)] for every phone shared by several of
+    `school`'s guardians, oldest guardian first. name_groups splits them by
+    name: only guardians in the same name group are the same person for
+    sure; different names on one phone may be two parents sharing it.
+    """
+    rows = (
+        Guardian.objects
+        .filter(school=school, is_active=True)
+        .exclude(phone_e164='')
+        .order_by('phone_e164', 'created_at', 'id')
+    )
+    by_phone = defaultdict(list)
+    for guardian in rows.iterator(chunk_size=2000):
+        by_phone[guardian.phone_e164].append(guardian)
+
+    duplicates = []
+    for phone, guardians in by_phone.items():
+        if len(guardians) < 2:
+            continue
+        by_name = defaultdict(list)
+        for guardian in guardians:
+            by_name[name_key(guardian.full_name)].append(guardian)
+        duplicates.append((phone, guardians, list(by_name.values())))
+    return duplicates
+
+
+def merge_guardians(keep, duplicates):
+    """
+    Move the duplicates' links and medical consents onto `keep`, fill its
+    blanks from them and delete them. Their households become one. Returns
+    the ids of the affected students.
+    """
+    duplicate_ids = [guardian.id for guardian in duplicates]
+    with transaction.atomic():
+        lock_households(keep.school_id)
+        household_id = Guardian.objects.values_list('household_id', flat=True).get(pk=keep.pk)
+        # Merging nodes merges their components: no union-find needed
+        relabel(
+            set(Guardian.objects.filter(id__in=duplicate_ids).values_list('household_id', flat=True)) - {household_id},
+            household_id,
+        )
+
+        links = StudentGuardian.objects.filter(guardian_id__in=duplicate_ids)
+        student_ids = set(links.values_list('student_id', flat=True))
+        already = set(StudentGuardian.objects.filter(guardian=keep).values_list('student_id', flat=True))
+        # A student linked to both: the keeper's link stays, the copy's goes
+        links.filter(student_id__in=already).delete()
+        moving = list(links.order_by('student_id', 'created_at'))
+        seen = set()
+        for link in moving:
+            if link.student_id in seen:
+                link.delete()
+            seen.add(link.student_id)
+        StudentGuardian.objects.filter(guardian_id__in=duplicate_ids).update(guardian=keep)
+        consents = list(MedicalRecord.objects.filter(consent_by_id__in=duplicate_ids))
+        MedicalRecord.objects.filter(id__in=[consent.id for consent in consents]).update(consent_by=keep)
+        for consent in consents:
+            consent.consent_by_id = keep.pk
+        record_saves(consents, update_fields=['consent_by'])
+
+        changed = []
+        for field in FILLABLE_FIELDS:
+            if not getattr(keep, field):
+                value = next((getattr(g, field) for g in duplicates if getattr(g, field)), None)
+                if value:
+                    setattr(keep, field, value)
+                    changed.append(field)
+        if changed:
+            Guardian.objects.filter(pk=keep.pk).update(**{field: getattr(keep, field) for field in changed})
+            record_saves([keep], update_fields=changed)
+        Guardian.objects.filter(id__in=duplicate_ids).delete()
+        transaction.on_commit(lambda: index_students(student_ids))
+    return student_ids
@@ -0,0 +1,187 @@
+# apps/students/households.py
+"""
+Households: connected components of the student–guardian graph.
+
+Two learners are in the same household when a chain of active
+StudentGuardian links joins them (siblings share a parent; step-siblings
+share a parent's partner's child...). Every Student and Guardian carries a
+household_id; a household is simply everyone with the same id, so "who is
+in this family" is one indexed lookup.
+
+The labels are kept flat, weighted quick-find style:
+
+    link added     union: the smaller household is relabelled to the
+                   larger one's id (one UPDATE per table)
+    link removed   the household may have split: its links are re-run
+                   through union-find, the largest part keeps the id and
+                   every other part gets a new one
+
+rebuild_households() recomputes a whole school from scratch (see the
+rebuild_households command).
+"""
+import uuid
+from collections import defaultdict
+
+from django.db import connection, transaction
+
+
+class DisjointSet:
+    """Union-find with path halving and union by size."""
+
+    def __init__(self):
+        self.parent = {}
+        self.size = {}
+
+    def add(self, item):
+        if item not in self.parent:
+            self.parent[item] = item
+            self.size[item] = 1
+
+    def find(self, item):
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+
+    def groups(self):
+        groups = defaultdict(list)
+        for item in self.parent:
+            groups[self.find(item)].append(item)
+        return list(groups.values())
+
+
+def lock_households(school_id):
+    """Serialise household changes within a school for the current transaction."""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [f"households:{school_id}"])
+
+
+def household_size(household_id):
+    from .models import Guardian, Student
+    return (
+        Student.objects.filter(household_id=household_id).count()
+        + Guardian.objects.filter(household_id=household_id).count()
+    )
+
+
+def relabel(household_ids, new_id, student_ids=None, guardian_ids=None):
+    from .models import Guardian, Student
+    students = Student.objects.filter(household_id__in=household_ids)
+    guardians = Guardian.objects.filter(household_id__in=household_ids)
+    if student_ids is not None:
+        students, guardians = students.filter(id__in=student_ids), guardians.filter(id__in=guardian_ids)
+    students.update(household_id=new_id)
+    guardians.update(household_id=new_id)
+
+
+def join_households(student_id, guardian_id):
+    """A link was added: merge the student's and the guardian's households."""
+    from .models import Guardian, Student
+    with transaction.atomic():
+        student = Student.objects.only('school_id', 'household_id').get(pk=student_id)
+        lock_households(student.school_id)
+        student.refresh_from_db(fields=['household_id'])  # may have moved while we waited
+        guardian_household = Guardian.objects.values_list('household_id', flat=True).get(pk=guardian_id)
+        if student.household_id == guardian_household:
+            return student.household_id
+        keep, merge = student.household_id, guardian_household
+        if household_size(keep) < household_size(merge):
+            keep, merge = merge, keep
+        relabel([merge], keep)
+        return keep
+
+
+def split_household(household_id):
+    """
+    A link was removed (or deactivated): give each part of the household
+    that is no longer connected its own id. Returns the ids now in use.
+    """
+    from .models import Guardian, Student, StudentGuardian
+    with transaction.atomic():
+        school_id = (
+            Student.objects.filter(household_id=household_id).values_list('school_id', flat=True).first()
+            or Guardian.objects.filter(household_id=household_id).values_list('school_id', flat=True).first()
+        )
+        if school_id is None:
+            return []
+        lock_households(school_id)
+
+        members = DisjointSet()
+        for student_id in Student.objects.filter(household_id=household_id).values_list('id', flat=True):
+            members.add(('s', student_id))
+        for guardian_id in Guardian.objects.filter(household_id=household_id).values_list('id', flat=True):
+            members.add(('g', guardian_id))
+        links = StudentGuardian.objects.filter(
+            is_active=True, student__household_id=household_id, guardian__household_id=household_id,
+        ).values_list('student_id', 'guardian_id')
+        for student_id, guardian_id in links:
+            members.union(('s', student_id), ('g', guardian_id))
+
+        parts = sorted(members.groups(), key=len, reverse=True)
+        ids = [household_id]
+        for part in parts[1:]:
+            new_id = uuid.uuid4()
+            relabel(
+                [household_id], new_id,
+                student_ids=[pk for kind, pk in part if kind == 's'],
+                guardian_ids=[pk for kind, pk in part if kind == 'g'],
+            )
+            ids.append(new_id)
+        return ids
+
+
+def rebuild_households(school_id, batch_size=1000):
+    """
+    Recompute every household of a school with one pass of union-find.
+    Returns the number of households.
+    """
+    from .models import Guardian, Student, StudentGuardian
+
+    members = DisjointSet()
+    for student_id in Student.objects.filter(school_id=school_id).values_list('id', flat=True):
+        members.add(('s', student_id))
+    for guardian_id in Guardian.objects.filter(school_id=school_id).values_list('id', flat=True):
+        members.add(('g', guardian_id))
+    links = StudentGuardian.objects.filter(is_active=True, student__school_id=school_id).values_list(
+        'student_id', 'guardian_id'
+    )
+    for student_id, guardian_id in links:
+        guardian = ('g', guardian_id)
+        members.add(guardian)  # a guardian from another school still joins its children
+        members.union(('s', student_id), guardian)
+
+    students, guardians = [], []
+    parts = members.groups()
+    for part in parts:
+        household_id = uuid.uuid4()
+        for kind, pk in part:
+            (students if kind == 's' else guardians).append((pk, household_id))
+    with transaction.atomic():
+        write_labels(Student, students, batch_size)
+        write_labels(Guardian, guardians, batch_size)
+    return len(parts)
+
+
+def write_labels(model, labels, batch_size):
+    """Set household_id from (pk, household_id) pairs: one UPDATE ... FROM VALUES per batch."""
+    table = connection.ops.quote_name(model._meta.db_table)
+    pk_type = model._meta.pk.db_type(connection)
+    with connection.cursor() as cursor:
+        for start in range(0, len(labels), batch_size):
+            batch = labels[start:start + batch_size]
+            values = ', '.join([f"(%s::{pk_type}, %s::uuid)"] * len(batch))
+            cursor.execute(
+                f"UPDATE {table} AS t SET household_id = v.household_id "
+                f"FROM (VALUES {values}) AS v(id, household_id) WHERE t.id = v.id",
+                [value for pair in batch for value in pair],
+            )
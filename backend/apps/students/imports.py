@@ -0,0 +1,76 @@
+# apps/students/imports.py
+from rest_framework import serializers
+
+from apps.core.imports import GradeLevelNameField, ImportTarget
+from .models import Student
+from .search import index_students
+from .serializers import StudentCreateUpdateSerializer
+
+DATE_FORMATS = ['iso-8601', '%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y']
+GENDERS = {'M': 'MALE', 'F': 'FEMALE', 'BOY': 'MALE', 'GIRL': 'FEMALE'}
+
+
+class StudentImportSerializer(StudentCreateUpdateSerializer):
+    """
+    StudentCreateUpdateSerializer's rules with the per-row lookups swapped out:
+    the class comes from the preloaded grade level map and uniqueness is
+    checked per batch (StudentImport.check_batch).
+    """
+    current_class = GradeLevelNameField(required=False)
+    upi_number = serializers.CharField(max_length=50, required=False, allow_blank=True, allow_null=True)
+    date_of_birth = serializers.DateField(input_formats=DATE_FORMATS)
+
+    class Meta(StudentCreateUpdateSerializer.Meta):
+        fields = None
+        exclude = ['school', 'photo', 'transport_assignment', 'alumni', 'created_by', 'fee_balance']
+
+
+class StudentImport(ImportTarget):
+    model = Student
+    serializer_class = StudentImportSerializer
+    class_field = 'current_class'
+
+    def __init__(self, school, user=None):
+        super().__init__(school, user)
+        self.seen_admission_numbers = set()
+        self.seen_upi_numbers = set()
+
+    def prepare(self, record):
+        data = super().prepare(record)
+        if 'gender' in data:
+            gender = data['gender'].upper()
+            data['gender'] = GENDERS.get(gender, gender)
+        return data
+
+    def check_batch(self, rows):
+        numbers = {data['admission_number'] for _, data in rows}
+        upis = {data['upi_number'] for _, data in rows if data.get('upi_number')}
+        taken_numbers = set(
+            Student.objects.filter(school=self.school, admission_number__in=numbers)
+            .values_list('admission_number', flat=True)
+        )
+        taken_upis = set(Student.objects.filter(upi_number__in=upis).values_list('upi_number', flat=True))
+
+        errors = {}
+        for number, data in rows:
+            admission_number, upi = data['admission_number'], data.get('upi_number')
+            if admission_number in taken_numbers:
+                errors[number] = f"admission_number: {admission_number} already exists in this school."
+            elif admission_number in self.seen_admission_numbers:
+                errors[number] = f"admission_number: {admission_number} appears earlier in the file."
+            elif upi and upi in taken_upis:
+                errors[number] = f"upi_number: {upi} already belongs to another student."
+            elif upi and upi in self.seen_upi_numbers:
+                errors[number] = f"upi_number: {upi} appears earlier in the file."
+            else:
+                self.seen_admission_numbers.add(admission_number)
+                if upi:
+                    self.seen_upi_numbers.add(upi)
+        return errors
+
+    def build(self, validated_data):
+        return Student(school=self.school, created_by=self.user, **validated_data)
+
+    def after_create(self, instances):
+        # bulk_create skips the post_save hook that maintains search entries
+        index_students([student.id for student in instances])
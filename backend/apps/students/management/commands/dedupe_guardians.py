@@ -0,0 +1,71 @@
+# apps/students/management/commands/dedupe_guardians.py
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+
+from apps.school.models import School
+from apps.students.guardians import find_duplicates, merge_guardians
+from apps.students.models import Guardian
+
+
+class Command(BaseCommand):
+    help = (
+        "Merge guardians of a school that share a phone number (E.164) and a name. "
+        "Prints a preview unless --apply is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--school", required=True, help="School UUID")
+        parser.add_argument("--apply", action="store_true", help="Merge (default: preview only)")
+        parser.add_argument(
+            "--phone-only", action="store_true",
+            help="Also merge guardians whose names differ (one person per phone)",
+        )
+
+    def handle(self, *args, **options):
+        school = School.objects.filter(id=options["school"]).first()
+        if school is None:
+            raise CommandError("No such school")
+
+        duplicates = find_duplicates(school)
+        links = dict(
+            Guardian.objects
+            .filter(id__in=[g.id for _, guardians, _ in duplicates for g in guardians])
+            .annotate(links=Count('students'))
+            .values_list('id', 'links')
+        )
+
+        merges, review = [], 0
+        for phone, guardians, name_groups in duplicates:
+            if options["phone_only"] or len(name_groups) == 1:
+                groups = [guardians]
+            else:
+                groups = [group for group in name_groups if len(group) > 1]
+                review += 1
+            merges.extend((group[0], group[1:]) for group in groups)
+            keep_ids = {group[0].id for group in groups}
+            merge_ids = {guardian.id for group in groups for guardian in group[1:]}
+
+            self.stdout.write(f"{phone}")
+            for guardian in guardians:
+                mark = "keep " if guardian.id in keep_ids else "merge" if guardian.id in merge_ids else "     "
+                self.stdout.write(
+                    f"  {mark} {guardian.full_name:40} {guardian.phone:16} "
+                    f"{links.get(guardian.id, 0)} student(s)  #{guardian.id}"
+                )
+
+        removed = sum(len(duplicate) for _, duplicate in merges)
+        summary = (
+            f"{len(duplicates)} shared phone(s); {removed} guardian(s) "
+            f"{'merged' if options['apply'] else 'would be merged'} into {len(merges)}"
+        )
+        if review:
+            summary += f"; {review} phone(s) with different names left for review (--phone-only merges them)"
+
+        if options["apply"]:
+            students = set()
+            for keep, duplicate in merges:
+                students |= merge_guardians(keep, duplicate)
+            summary += f"; {len(students)} student(s) relinked"
+            self.stdout.write(self.style.SUCCESS(summary))
+        else:
+            self.stdout.write(summary + ". Run again with --apply to merge.")
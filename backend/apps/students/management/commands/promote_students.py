@@ -0,0 +1,52 @@
+# apps/students/management/commands/promote_students.py
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.school.models import School
+from apps.students.models import PromotionBatch
+from apps.students.promotion import apply_promotion, plan_promotion, revert_promotion
+
+
+class Command(BaseCommand):
+    help = "Year-end promotion of a school's active learners (preview with --dry-run, undo with --revert)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--school", required=True, help="School UUID")
+        parser.add_argument("--label", help="Academic year being closed, e.g. 2025")
+        parser.add_argument("--graduation-date", type=datetime.date.fromisoformat, help="YYYY-MM-DD (default: today)")
+        parser.add_argument("--dry-run", action="store_true", help="Show what would happen and change nothing")
+        parser.add_argument("--revert", metavar="BATCH", help="Revert a promotion batch by id")
+
+    def handle(self, *args, **options):
+        school = School.objects.filter(id=options["school"]).first()
+        if school is None:
+            raise CommandError("No such school")
+
+        try:
+            if options["revert"]:
+                batch = PromotionBatch.objects.get(school=school, id=options["revert"])
+                restored = revert_promotion(batch)
+                self.stdout.write(self.style.SUCCESS(f"Reverted '{batch.label}': {restored} learners restored"))
+                return
+
+            if options["dry_run"]:
+                plan = plan_promotion(school)
+                for step in plan["steps"]:
+                    source = step["from_class"]["name"] if step["from_class"] else "(no class)"
+                    target = step["to_class"]["name"] if step["to_class"] else ""
+                    note = step["reason"] or ""
+                    self.stdout.write(f"{step['action']:9} {source:>20} → {target:20} {step['students']:6}  {note}")
+                self.stdout.write(
+                    f"Would promote {plan['promoted']}, graduate {plan['graduated']}, skip {plan['skipped']}"
+                )
+                return
+
+            if not options["label"]:
+                raise CommandError("--label is required")
+            batch = apply_promotion(school, options["label"], options["graduation_date"])
+        except (ValueError, PromotionBatch.DoesNotExist) as e:
+            raise CommandError(str(e) or "No such promotion batch")
+        self.stdout.write(self.style.SUCCESS(
+            f"Promotion {batch.id}: {batch.promoted_count} promoted, {batch.graduated_count} graduated"
+        ))
@@ -0,0 +1,24 @@
+# apps/students/management/commands/rebuild_households.py
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.school.models import School
+from apps.students.households import lock_households, rebuild_households
+
+
+class Command(BaseCommand):
+    help = "Recompute household ids from guardian links (all schools, or one with --school)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--school", help="School UUID to rebuild")
+
+    def handle(self, *args, **options):
+        schools = School.objects.order_by('name')
+        if options["school"]:
+            schools = schools.filter(id=options["school"])
+        for school in schools:
+            with transaction.atomic():
+                lock_households(school.id)
+                households = rebuild_households(school.id)
+            self.stdout.write(f"{school.name}: {households} households")
+        self.stdout.write(self.style.SUCCESS("Done"))
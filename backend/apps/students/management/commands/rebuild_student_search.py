@@ -0,0 +1,25 @@
+# apps/students/management/commands/rebuild_student_search.py
+from django.core.management.base import BaseCommand
+
+from apps.students.models import Student
+from apps.students.search import index_students
+
+
+class Command(BaseCommand):
+    help = "Rebuild the learner search entries (all schools, or one with --school)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--school", help="School UUID to rebuild")
+        parser.add_argument("--batch", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        students = Student.objects.order_by()
+        if options["school"]:
+            students = students.filter(school_id=options["school"])
+
+        ids = list(students.values_list('id', flat=True))
+        batch = options["batch"]
+        for start in range(0, len(ids), batch):
+            index_students(ids[start:start + batch], batch_size=batch)
+            self.stdout.write(f"… {min(start + batch, len(ids))}/{len(ids)}")
+        self.stdout.write(self.style.SUCCESS(f"Indexed {len(ids)} students"))
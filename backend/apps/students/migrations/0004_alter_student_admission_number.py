@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0003_student_allergies_student_blood_group_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='student',
+            name='admission_number',
+            field=models.CharField(max_length=50),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:34
+
+from django.db import migrations, models
+
+
+def blank_upi_to_null(apps, schema_editor):
+    # Blank strings collide on the unique index; NULLs don't.
+    Student = apps.get_model('students', 'Student')
+    Student.objects.filter(upi_number='').update(upi_number=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0004_alter_student_admission_number'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='student',
+            name='upi_number',
+            field=models.CharField(blank=True, max_length=50, null=True, unique=True),
+        ),
+        migrations.RunPython(blank_upi_to_null, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,165 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:02
+
+import re
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copy of the search keys (apps/students/search.py) as they stood for this migration
+WORD_RE = re.compile(r"[^\W_]+", re.UNICODE)
+NON_ALNUM_RE = re.compile(r"[^0-9A-Z]")
+
+PHONETIC_RULES = [
+    (re.compile(r"ph"), "f"),
+    (re.compile(r"(?:ck|q)"), "k"),
+    (re.compile(r"c(?=[eiy])"), "s"),
+    (re.compile(r"ch"), "k"),
+    (re.compile(r"c"), "k"),
+    (re.compile(r"x"), "ks"),
+    (re.compile(r"(?<=[bcdfgjklmnpqrstvz])h"), ""),
+    (re.compile(r"r"), "l"),
+    (re.compile(r"(?<=.)[aeiouyw]"), ""),
+    (re.compile(r"(.)\1+"), r"\1"),
+]
+
+STUDENT_FIELDS = (
+    'id', 'school_id', 'first_name', 'middle_name', 'last_name',
+    'admission_number', 'upi_number', 'nemis_id', 'emergency_name', 'emergency_phone',
+)
+
+
+def words(text):
+    return [w.lower() for w in WORD_RE.findall(text or '')]
+
+
+def trigrams(word):
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def phonetic_key(word):
+    key = ''.join(ch for ch in word.lower() if 'a' <= ch <= 'z')
+    if len(key) < 2:
+        return None
+    for pattern, replacement in PHONETIC_RULES:
+        key = pattern.sub(replacement, key)
+    return key[:20] or None
+
+
+def normalize_identifier(value):
+    return NON_ALNUM_RE.sub('', (value or '').upper())
+
+
+def normalize_phone(value):
+    digits = re.sub(r"\D", "", value or "")
+    return digits[-9:] if len(digits) >= 9 else None
+
+
+def digit_key(value):
+    digits = re.sub(r"\D", "", value)
+    return '~' + ''.join(sorted(digits)) if len(digits) >= 5 else None
+
+
+def value_parts(value):
+    return ' '.join(re.findall(r"[A-Z]+|[0-9]+", value.upper())).lower()
+
+
+class Keys:
+    def __init__(self):
+        self.trigrams, self.phonetic, self.identifiers = set(), set(), set()
+
+    def add_name(self, text):
+        for word in words(text):
+            self.trigrams |= trigrams(word)
+            key = phonetic_key(word)
+            if key:
+                self.phonetic.add(key)
+
+    def add_identifier(self, value):
+        if not normalize_identifier(value):
+            return
+        self.identifiers.add(normalize_identifier(value))
+        for part in words(value_parts(value)):
+            self.trigrams |= trigrams(part)
+            key = digit_key(part)
+            if key:
+                self.identifiers.add(key)
+
+    def add_phone(self, value):
+        phone = normalize_phone(value)
+        if phone:
+            self.identifiers.update((phone, digit_key(phone)))
+            self.trigrams |= trigrams(phone)
+
+
+def build_entries(student_rows, guardian_rows, entry_model):
+    guardians = {}
+    for student_id, full_name, phone, id_number in guardian_rows:
+        guardians.setdefault(student_id, []).append((full_name, phone, id_number))
+
+    entries = []
+    for row in student_rows:
+        own, contact = Keys(), Keys()
+        for name in (row['first_name'], row['middle_name'], row['last_name']):
+            own.add_name(name)
+        for value in (row['admission_number'], row['upi_number'], row['nemis_id']):
+            own.add_identifier(value)
+
+        contact.add_name(row['emergency_name'])
+        contact.add_phone(row['emergency_phone'])
+        for full_name, phone, id_number in guardians.get(row['id'], []):
+            contact.add_name(full_name)
+            contact.add_phone(phone)
+            contact.add_identifier(id_number)
+
+        entries.append(entry_model(
+            student_id=row['id'],
+            school_id=row['school_id'],
+            trigrams=sorted(own.trigrams),
+            contact_trigrams=sorted(contact.trigrams - own.trigrams),
+            phonetic=sorted(own.phonetic | {'+' + key for key in contact.phonetic - own.phonetic}),
+            identifiers=sorted(own.identifiers | contact.identifiers),
+        ))
+    return entries
+
+
+def build_search_entries(apps, schema_editor):
+    Student = apps.get_model('students', 'Student')
+    StudentGuardian = apps.get_model('students', 'StudentGuardian')
+    StudentSearchEntry = apps.get_model('students', 'StudentSearchEntry')
+
+    links = list(
+        StudentGuardian.objects.filter(is_active=True)
+        .values_list('student_id', 'guardian__full_name', 'guardian__phone', 'guardian__id_number')
+    )
+    students = Student.objects.values(*STUDENT_FIELDS).iterator(chunk_size=2000)
+    StudentSearchEntry.objects.bulk_create(build_entries(students, links, StudentSearchEntry), batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('school', '0006_alter_school_academic_year_end_month_and_more'),
+        ('students', '0005_alter_student_upi_number'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentSearchEntry',
+            fields=[
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_entry', serialize=False, to='students.student')),
+                ('trigrams', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=3), default=list, size=None)),
+                ('contact_trigrams', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=3), default=list, size=None)),
+                ('phonetic', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=20), default=list, size=None)),
+                ('identifiers', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=50), default=list, size=None)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('school', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='school.school')),
+            ],
+            options={
+                'indexes': [django.contrib.postgres.indexes.GinIndex(fields=['trigrams'], name='student_search_trigrams'), django.contrib.postgres.indexes.GinIndex(fields=['contact_trigrams'], name='student_search_contact_trgm'), django.contrib.postgres.indexes.GinIndex(fields=['phonetic'], name='student_search_phonetic'), django.contrib.postgres.indexes.GinIndex(fields=['identifiers'], name='student_search_identifiers')],
+            },
+        ),
+        migrations.RunPython(build_search_entries, migrations.RunPython.noop),
+    ]
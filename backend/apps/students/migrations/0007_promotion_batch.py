@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:17
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0005_gradelevel_education_level_gradelevel_pathway'),
+        ('school', '0006_alter_school_academic_year_end_month_and_more'),
+        ('students', '0006_student_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PromotionBatch',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('label', models.CharField(help_text='Academic year being closed, e.g. 2025', max_length=50)),
+                ('graduation_date', models.DateField()),
+                ('state', models.CharField(choices=[('APPLIED', 'Applied'), ('REVERTED', 'Reverted')], default='APPLIED', max_length=10)),
+                ('promoted_count', models.PositiveIntegerField(default=0)),
+                ('graduated_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('reverted_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('reverted_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('school', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='promotion_batches', to='school.school')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PromotionEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='students.promotionbatch')),
+                ('from_class', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='academics.gradelevel')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='students.student')),
+                ('to_class', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='academics.gradelevel')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='promotionbatch',
+            constraint=models.UniqueConstraint(condition=models.Q(('state', 'APPLIED')), fields=('school', 'label'), name='promotion_once_per_label'),
+        ),
+        migrations.AddIndex(
+            model_name='promotionentry',
+            index=models.Index(fields=['batch', 'from_class'], name='students_pr_batch_i_151da8_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='promotionentry',
+            unique_together={('batch', 'student')},
+        ),
+    ]
@@ -0,0 +1,107 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:20
+
+import uuid
+from collections import defaultdict
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+# Frozen copy of the household rebuild (apps/students/households.py) as it stood for this migration
+class DisjointSet:
+    def __init__(self):
+        self.parent = {}
+        self.size = {}
+
+    def add(self, item):
+        if item not in self.parent:
+            self.parent[item] = item
+            self.size[item] = 1
+
+    def find(self, item):
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+
+    def groups(self):
+        groups = defaultdict(list)
+        for item in self.parent:
+            groups[self.find(item)].append(item)
+        return list(groups.values())
+
+
+def write_labels(connection, model, labels):
+    table = connection.ops.quote_name(model._meta.db_table)
+    pk_type = model._meta.pk.db_type(connection)
+    with connection.cursor() as cursor:
+        for start in range(0, len(labels), BATCH_SIZE):
+            batch = labels[start:start + BATCH_SIZE]
+            values = ', '.join([f"(%s::{pk_type}, %s::uuid)"] * len(batch))
+            cursor.execute(
+                f"UPDATE {table} AS t SET household_id = v.household_id "
+                f"FROM (VALUES {values}) AS v(id, household_id) WHERE t.id = v.id",
+                [value for pair in batch for value in pair],
+            )
+
+
+def build_households(apps, schema_editor):
+    School = apps.get_model('school', 'School')
+    Student = apps.get_model('students', 'Student')
+    Guardian = apps.get_model('students', 'Guardian')
+    StudentGuardian = apps.get_model('students', 'StudentGuardian')
+    # The new columns start with one id shared by every row
+    for school_id in School.objects.values_list('id', flat=True):
+        members = DisjointSet()
+        for student_id in Student.objects.filter(school_id=school_id).values_list('id', flat=True):
+            members.add(('s', student_id))
+        for guardian_id in Guardian.objects.filter(school_id=school_id).values_list('id', flat=True):
+            members.add(('g', guardian_id))
+        links = StudentGuardian.objects.filter(is_active=True, student__school_id=school_id).values_list(
+            'student_id', 'guardian_id'
+        )
+        for student_id, guardian_id in links:
+            guardian = ('g', guardian_id)
+            members.add(guardian)  # a guardian from another school still joins its children
+            members.union(('s', student_id), guardian)
+
+        students, guardians = [], []
+        for part in members.groups():
+            household_id = uuid.uuid4()
+            for kind, pk in part:
+                (students if kind == 's' else guardians).append((pk, household_id))
+        write_labels(schema_editor.connection, Student, students)
+        write_labels(schema_editor.connection, Guardian, guardians)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('school', '0006_alter_school_academic_year_end_month_and_more'),
+        ('students', '0007_promotion_batch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='guardian',
+            name='household_id',
+            field=models.UUIDField(db_index=True, default=uuid.uuid4, editable=False),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='household_id',
+            field=models.UUIDField(db_index=True, default=uuid.uuid4, editable=False),
+        ),
+        migrations.RunPython(build_households, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:23
+
+import re
+
+from django.db import migrations, models
+
+# Frozen copy of apps/core/phones.py as it stood for this migration
+COUNTRIES = {
+    'kenya': ('254', 9),
+    'uganda': ('256', 9),
+    'tanzania': ('255', 9),
+    'rwanda': ('250', 9),
+    'burundi': ('257', 8),
+    'ethiopia': ('251', 9),
+    'south sudan': ('211', 9),
+    'somalia': ('252', 9),
+    'nigeria': ('234', 10),
+    'ghana': ('233', 9),
+    'zambia': ('260', 9),
+    'malawi': ('265', 9),
+    'south africa': ('27', 9),
+}
+DEFAULT_COUNTRY = 'kenya'
+
+SEPARATORS_RE = re.compile(r"[\s\-().\/]")
+
+
+def to_e164(value, country=DEFAULT_COUNTRY):
+    number = SEPARATORS_RE.sub('', value or '')
+    if number.startswith('+'):
+        digits = number[1:]
+    elif number.startswith('00'):
+        digits = number[2:]
+    else:
+        digits = None
+    if digits is not None:
+        return f"+{digits}" if digits.isdigit() and 8 <= len(digits) <= 15 else ""
+
+    if not number.isdigit():
+        return ""
+    code, length = COUNTRIES.get((country or DEFAULT_COUNTRY).strip().lower(), (None, None))
+    if code is None:
+        return ""
+    if number.startswith(code) and len(number) == len(code) + length:
+        return f"+{number}"
+    if number.startswith('0') and len(number) == length + 1:
+        return f"+{code}{number[1:]}"
+    if len(number) == length:
+        return f"+{code}{number}"
+    return ""
+
+
+def fill_phone_e164(apps, schema_editor):
+    Guardian = apps.get_model('students', 'Guardian')
+    guardians = []
+    rows = Guardian.objects.select_related('school').only('id', 'phone', 'school__country')
+    for guardian in rows.iterator(chunk_size=2000):
+        guardian.phone_e164 = to_e164(guardian.phone, guardian.school.country)
+        if guardian.phone_e164:
+            guardians.append(guardian)
+    Guardian.objects.bulk_update(guardians, ['phone_e164'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('school', '0006_alter_school_academic_year_end_month_and_more'),
+        ('students', '0008_households'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='guardian',
+            name='phone_e164',
+            field=models.CharField(blank=True, editable=False, max_length=16),
+        ),
+        migrations.AddIndex(
+            model_name='guardian',
+            index=models.Index(fields=['school', 'phone_e164'], name='guardian_school_phone_e164'),
+        ),
+        migrations.RunPython(fill_phone_e164, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,12 @@
 # students/models.py
 import uuid
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
 from apps.accounts.models import User  # Assuming custom User
+from apps.core.phones import to_e164
 from apps.school.models import School  # Multi-tenancy
 
 User = settings.AUTH_USER_MODEL
@@ -27,8 +30,8 @@ class Student(models.Model):
     school = models.ForeignKey(School, on_delete=models.CASCADE, related_name='students')
     
     # Identification
-    admission_number = models.CharField(max_length=50, unique=True)
-    upi_number = models.CharField(max_length=50, blank=True, unique=True)  # Kenyan NEMIS UPI
+    admission_number = models.CharField(max_length=50)
+    upi_number = models.CharField(max_length=50, blank=True, null=True, unique=True)  # Kenyan NEMIS UPI
     nemis_id = models.CharField(max_length=50, blank=True)  # For NEMIS integration
     
     # Personal Info
@@ -42,6 +45,7 @@ class Student(models.Model):
     sub_county = models.CharField(max_length=100, blank=True)
     religion = models.CharField(max_length=50, blank=True)
     photo = models.ImageField(upload_to='student_photos/', blank=True, null=True)
+    photo_rendered = models.BooleanField(default=False, editable=False)  # thumb/medium built (core.images)
 
     kcpe_index = models.CharField(max_length=20, blank=True)  # Renamed for consistency
     kcpe_year = models.PositiveIntegerField(null=True, blank=True)
@@ -110,6 +114,8 @@ class Student(models.Model):
         default=Status.ACTIVE
     )
     notes = models.TextField(blank=True)
+    # Family: shared with siblings and guardians (see apps/students/households.py)
+    household_id = models.UUIDField(default=uuid.uuid4, editable=False, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey(
@@ -130,15 +136,58 @@ class Student(models.Model):
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.admission_number})"
 
+    def save(self, *args, **kwargs):
+        # fee_balance belongs to the ledger (apps/finance/ledger.py), which moves
+        # it with its own UPDATEs; a save of a stale instance must not undo them
+        if not self._state.adding and not kwargs.get('force_insert'):
+            update_fields = kwargs.get('update_fields')
+            if update_fields is None:
+                deferred = self.get_deferred_fields()
+                update_fields = [
+                    field.name for field in self._meta.concrete_fields
+                    if not field.primary_key and field.attname not in deferred
+                ]
+            kwargs['update_fields'] = [name for name in update_fields if name != 'fee_balance']
+        super().save(*args, **kwargs)
+
     @property
     def full_name(self):
         return f"{self.first_name} {self.middle_name} {self.last_name}".strip()
 
 
+class StudentSearchEntry(models.Model):
+    """
+    Precomputed search keys for one student, their guardians and emergency
+    contact. Maintained on save; see apps/students/search.py.
+    """
+    student = models.OneToOneField(Student, on_delete=models.CASCADE, primary_key=True, related_name='search_entry')
+    # Unindexed on purpose: an index here tempts the planner to walk the whole
+    # school instead of combining the GIN indexes below
+    school = models.ForeignKey(School, on_delete=models.CASCADE, related_name='+', db_index=False)
+    trigrams = ArrayField(models.CharField(max_length=3), default=list)
+    contact_trigrams = ArrayField(models.CharField(max_length=3), default=list)
+    phonetic = ArrayField(models.CharField(max_length=20), default=list)
+    identifiers = ArrayField(models.CharField(max_length=50), default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['trigrams'], name='student_search_trigrams'),
+            GinIndex(fields=['contact_trigrams'], name='student_search_contact_trgm'),
+            GinIndex(fields=['phonetic'], name='student_search_phonetic'),
+            GinIndex(fields=['identifiers'], name='student_search_identifiers'),
+        ]
+
+    def __str__(self):
+        return f"Search keys for {self.student_id}"
+
+
 class Guardian(models.Model):
     school = models.ForeignKey(School, on_delete=models.CASCADE, related_name='student_guardians')
     full_name = models.CharField(max_length=150)
     phone = models.CharField(max_length=20)
+    # `phone` in E.164, set on save; what intake matching and dedupe compare
+    phone_e164 = models.CharField(max_length=16, blank=True, editable=False)
     email = models.EmailField(blank=True, null=True)
     address = models.TextField(blank=True, null=True)
     relationship = models.CharField(
@@ -149,16 +198,25 @@ class Guardian(models.Model):
     occupation = models.CharField(max_length=100, blank=True)
     id_number = models.CharField(max_length=50, blank=True)  # Kenyan ID
     is_active = models.BooleanField(default=True)
+    household_id = models.UUIDField(default=uuid.uuid4, editable=False, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.full_name
 
+    def save(self, *args, **kwargs):
+        self.phone_e164 = to_e164(self.phone, self.school.country if self.school_id else None)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'phone' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'phone_e164'}
+        super().save(*args, **kwargs)
+
     class Meta:
         indexes = [
             models.Index(fields=['phone']),
             models.Index(fields=['email']),
+            models.Index(fields=['school', 'phone_e164'], name='guardian_school_phone_e164'),
         ]
 
 
@@ -269,4 +327,50 @@ class MedicalDocument(models.Model):
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"Document for {self.medical_record.student.full_name}"
\ No newline at end of file
+        return f"Document for {self.medical_record.student.full_name}"
+
+class PromotionBatch(models.Model):
+    """
+    One year-end promotion run. Its entries record where each learner was
+    moved from, so the whole run can be reverted in one step.
+    """
+    class State(models.TextChoices):
+        APPLIED = "APPLIED", "Applied"
+        REVERTED = "REVERTED", "Reverted"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    school = models.ForeignKey(School, on_delete=models.CASCADE, related_name='promotion_batches')
+    label = models.CharField(max_length=50, help_text="Academic year being closed, e.g. 2025")
+    graduation_date = models.DateField()
+    state = models.CharField(max_length=10, choices=State.choices, default=State.APPLIED)
+    promoted_count = models.PositiveIntegerField(default=0)
+    graduated_count = models.PositiveIntegerField(default=0)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    reverted_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    reverted_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['school', 'label'],
+                condition=models.Q(state='APPLIED'),
+                name='promotion_once_per_label',
+            ),
+        ]
+
+    def __str__(self):
+        return f"Promotion {self.label} ({self.get_state_display()})"
+
+
+class PromotionEntry(models.Model):
+    """A learner moved by a PromotionBatch; to_class is null for graduates."""
+    batch = models.ForeignKey(PromotionBatch, on_delete=models.CASCADE, related_name='entries')
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='+')
+    from_class = models.ForeignKey('academics.GradeLevel', on_delete=models.SET_NULL, null=True, related_name='+')
+    to_class = models.ForeignKey('academics.GradeLevel', on_delete=models.SET_NULL, null=True, related_name='+')
+
+    class Meta:
+        unique_together = ('batch', 'student')
+        indexes = [models.Index(fields=['batch', 'from_class'])]
@@ -0,0 +1,200 @@
+# apps/students/promotion.py
+"""
+Year-end promotion.
+
+Every ACTIVE learner moves to the next GradeLevel by `order` within its
+curriculum; learners in a curriculum's top grade graduate. The grade →
+next-grade map is built once per run, then each grade is moved with one
+INSERT ... SELECT (recording who moved, into PromotionEntry) and one UPDATE,
+top grade first so nobody is promoted twice. A run is a PromotionBatch that
+revert_promotion() undoes in one transaction.
+"""
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from apps.academics.models import GradeLevel
+from apps.core.audit import record
+from apps.school.models import School
+from .models import PromotionBatch, PromotionEntry, Student
+
+PROMOTE = 'PROMOTE'
+GRADUATE = 'GRADUATE'
+SKIP = 'SKIP'
+
+RECORD_SQL = """
+    INSERT INTO students_promotionentry (batch_id, student_id, from_class_id, to_class_id)
+    SELECT %s, id, current_class_id, %s
+    FROM students_student
+    WHERE school_id = %s AND status = %s AND current_class_id = %s
+"""
+
+
+def next_grades(grades):
+    """
+    {grade_id: (next_grade or None, reason)} for `grades`. None with no
+    reason means "graduate"; None with a reason means the grade's learners
+    are left where they are.
+    """
+    groups = defaultdict(list)
+    for grade in grades:
+        # A school's own grades never chain into the global templates
+        groups[(grade.school_id, grade.curriculum_id)].append(grade)
+
+    mapping = {}
+    for group in groups.values():
+        group.sort(key=lambda grade: (grade.order, grade.name))
+        for grade in group:
+            above = [g for g in group if g.order > grade.order]
+            if not above:
+                mapping[grade.id] = (None, None)
+                continue
+            candidates = [g for g in above if g.order == above[0].order]
+            if len(candidates) > 1:
+                names = ', '.join(g.name for g in candidates)
+                mapping[grade.id] = (None, f"Ambiguous next grade: {names} share order {above[0].order}")
+            else:
+                mapping[grade.id] = (candidates[0], None)
+    return mapping
+
+
+def plan_promotion(school):
+    """
+    What a promotion would do right now: one step per grade holding active
+    learners, top grade first. Costs one grade query and one count query.
+    """
+    grades = list(GradeLevel.objects.filter(Q(school=school) | Q(school__isnull=True)))
+    mapping = next_grades(grades)
+    grades = {grade.id: grade for grade in grades}
+    counts = (
+        Student.objects
+        .filter(school=school, status=Student.Status.ACTIVE)
+        .order_by()
+        .values('current_class_id')
+        .annotate(students=Count('id'))
+    )
+
+    steps = []
+    for row in counts:
+        grade = grades.get(row['current_class_id'])
+        if grade is None:
+            steps.append({
+                'from_class': None, 'to_class': None, 'action': SKIP,
+                'reason': "No class assigned", 'students': row['students'], 'order': -1,
+            })
+            continue
+        next_grade, reason = mapping[grade.id]
+        action = SKIP if reason else (PROMOTE if next_grade else GRADUATE)
+        steps.append({
+            'from_class': {'id': grade.id, 'name': grade.name},
+            'to_class': {'id': next_grade.id, 'name': next_grade.name} if next_grade else None,
+            'action': action,
+            'reason': reason,
+            'students': row['students'],
+            'order': grade.order,
+        })
+    steps.sort(key=lambda step: -step['order'])
+    for step in steps:
+        del step['order']
+    return {
+        'steps': steps,
+        'promoted': sum(s['students'] for s in steps if s['action'] == PROMOTE),
+        'graduated': sum(s['students'] for s in steps if s['action'] == GRADUATE),
+        'skipped': sum(s['students'] for s in steps if s['action'] == SKIP),
+    }
+
+
+def audit_moves(school_id, students, **values):
+    """Audit the update() about to set `values` on `students`: one read of what they hold now."""
+    fields = {name: Student._meta.get_field(name).attname for name in values}
+    for student_id, *before in students.values_list('id', *fields.values()):
+        changes = {
+            name: (old, values[name]) for name, old in zip(fields, before) if old != values[name]
+        }
+        if changes:
+            record(Student, student_id, changes, school_id)
+
+
+def apply_promotion(school, label, graduation_date=None, user=None):
+    """Promote the school's active learners; returns the PromotionBatch."""
+    graduation_date = graduation_date or timezone.localdate()
+    with transaction.atomic():
+        # One run per school at a time
+        School.objects.select_for_update().filter(pk=school.pk).first()
+        if PromotionBatch.objects.filter(school=school, label=label, state=PromotionBatch.State.APPLIED).exists():
+            raise ValueError(f"Promotion '{label}' has already been applied; revert it first.")
+
+        plan = plan_promotion(school)
+        batch = PromotionBatch.objects.create(
+            school=school, label=label, graduation_date=graduation_date, created_by=user,
+        )
+        now = timezone.now()
+        promoted = graduated = 0
+        with connection.cursor() as cursor:
+            for step in plan['steps']:
+                if step['action'] == SKIP:
+                    continue
+                from_id = step['from_class']['id']
+                to_id = step['to_class']['id'] if step['to_class'] else None
+                cursor.execute(RECORD_SQL, [batch.id, to_id, school.id, Student.Status.ACTIVE, from_id])
+                moved = Student.objects.filter(
+                    id__in=PromotionEntry.objects.filter(batch=batch, from_class_id=from_id).values('student_id')
+                )
+                if to_id is None:
+                    audit_moves(school.id, moved, status=Student.Status.GRADUATED, graduation_date=graduation_date)
+                    graduated += moved.update(
+                        status=Student.Status.GRADUATED, graduation_date=graduation_date, updated_at=now,
+                    )
+                else:
+                    audit_moves(school.id, moved, current_class=to_id)
+                    promoted += moved.update(current_class_id=to_id, updated_at=now)
+
+        batch.promoted_count = promoted
+        batch.graduated_count = graduated
+        batch.save(update_fields=['promoted_count', 'graduated_count'])
+    return batch
+
+
+def revert_promotion(batch, user=None):
+    """
+    Put every learner `batch` moved back where it found them. Learners whose
+    class or status has changed since are left alone. Returns how many were
+    restored.
+    """
+    with transaction.atomic():
+        batch = PromotionBatch.objects.select_for_update().get(pk=batch.pk)
+        if batch.state != PromotionBatch.State.APPLIED:
+            raise ValueError("This promotion has already been reverted.")
+        later = PromotionBatch.objects.filter(
+            school_id=batch.school_id, state=PromotionBatch.State.APPLIED, created_at__gt=batch.created_at,
+        ).first()
+        if later:
+            raise ValueError(f"Revert the later promotion '{later.label}' first.")
+
+        now = timezone.now()
+        restored = 0
+        moves = (
+            batch.entries.order_by().values_list('from_class_id', 'to_class_id').distinct()
+        )
+        for from_id, to_id in moves:
+            if from_id is None:
+                continue  # the grade has since been deleted
+            students = Student.objects.filter(
+                id__in=batch.entries.filter(from_class_id=from_id, to_class_id=to_id).values('student_id')
+            )
+            if to_id is None:
+                students = students.filter(status=Student.Status.GRADUATED, current_class_id=from_id)
+                audit_moves(batch.school_id, students, status=Student.Status.ACTIVE, graduation_date=None)
+                restored += students.update(status=Student.Status.ACTIVE, graduation_date=None, updated_at=now)
+            else:
+                students = students.filter(status=Student.Status.ACTIVE, current_class_id=to_id)
+                audit_moves(batch.school_id, students, current_class=from_id)
+                restored += students.update(current_class_id=from_id, updated_at=now)
+
+        batch.state = PromotionBatch.State.REVERTED
+        batch.reverted_by = user
+        batch.reverted_at = now
+        batch.save(update_fields=['state', 'reverted_by', 'reverted_at'])
+    return restored
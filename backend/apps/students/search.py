@@ -0,0 +1,307 @@
+# apps/students/search.py
+"""
+Typo-tolerant learner search.
+
+Every student has one StudentSearchEntry holding precomputed keys:
+
+    trigrams          pg_trgm-style trigrams of the student's own names and
+                      of each part of their admission, UPI and NEMIS numbers
+    contact_trigrams  the same for guardians (through StudentGuardian) and
+                      the emergency contact: names, phones, ID numbers
+    phonetic          a sound-alike key per name word (Wanjiku ~ Wanjiko,
+                      Kariuki ~ Kaliuki, Achieng ~ Akieng); contacts' keys
+                      carry a "+" prefix
+    identifiers       exact identifiers and phones, normalised so 0712 345 678
+                      and +254712345678 agree, plus a digit-order-free key
+                      per number so transposed digits still match
+
+All four are GIN-indexed arrays, so a query only visits entries sharing a
+key with it and never reads students_student. Entries are rebuilt on save
+(see signals.py); bulk writers call index_students(); the
+rebuild_student_search command backfills.
+"""
+import re
+
+from django.db import connection
+
+WORD_RE = re.compile(r"[^\W_]+", re.UNICODE)
+NON_ALNUM_RE = re.compile(r"[^0-9A-Z]")
+
+CONTACT_WEIGHT = 0.5     # a hit on a guardian's name counts half a hit on the learner's
+PHONETIC_WEIGHT = 0.4
+IDENTIFIER_WEIGHT = 1.0
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 50
+
+
+# ── Keys ────────────────────────────────────────────────────────────────────
+
+def words(text):
+    return [w.lower() for w in WORD_RE.findall(text or '')]
+
+
+def trigrams(word):
+    """pg_trgm's trigrams: two spaces before the word, one after."""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+PHONETIC_RULES = [
+    (re.compile(r"ph"), "f"),
+    (re.compile(r"(?:ck|q)"), "k"),
+    (re.compile(r"c(?=[eiy])"), "s"),
+    (re.compile(r"ch"), "k"),          # Achieng / Akieng
+    (re.compile(r"c"), "k"),
+    (re.compile(r"x"), "ks"),
+    (re.compile(r"(?<=[bcdfgjklmnpqrstvz])h"), ""),   # dh, th, sh, kh → d, t, s, k
+    (re.compile(r"r"), "l"),           # r/l are interchangeable in many Kenyan spellings
+    (re.compile(r"(?<=.)[aeiouyw]"), ""),
+    (re.compile(r"(.)\1+"), r"\1"),
+]
+
+
+def phonetic_key(word):
+    """Consonant skeleton of a name: the first letter, then its sounding consonants."""
+    key = ''.join(ch for ch in word.lower() if 'a' <= ch <= 'z')
+    if len(key) < 2:
+        return None
+    for pattern, replacement in PHONETIC_RULES:
+        key = pattern.sub(replacement, key)
+    return key[:20] or None
+
+
+def normalize_identifier(value):
+    return NON_ALNUM_RE.sub('', (value or '').upper())
+
+
+def normalize_phone(value):
+    """Last nine digits: the subscriber number, whatever prefix was typed."""
+    digits = re.sub(r"\D", "", value or "")
+    return digits[-9:] if len(digits) >= 9 else None
+
+
+def digit_key(value):
+    """
+    Same key for 01234 and 01243: the digits in sorted order. Runs shorter
+    than five digits (years, mostly) would match half the school, so get none.
+    """
+    digits = re.sub(r"\D", "", value)
+    return '~' + ''.join(sorted(digits)) if len(digits) >= 5 else None
+
+
+def value_parts(value):
+    """ADM201401234 → 'adm 201401234': letter and digit runs as separate words."""
+    return ' '.join(re.findall(r"[A-Z]+|[0-9]+", value.upper())).lower()
+
+
+class Keys:
+    def __init__(self):
+        self.trigrams, self.phonetic, self.identifiers = set(), set(), set()
+
+    def add_name(self, text):
+        for word in words(text):
+            self.trigrams |= trigrams(word)
+            key = phonetic_key(word)
+            if key:
+                self.phonetic.add(key)
+
+    def add_identifier(self, value):
+        if not normalize_identifier(value):
+            return
+        self.identifiers.add(normalize_identifier(value))
+        # Parts as typed (ADM/2014/01234 → adm, 2014, 01234), so each can be found alone
+        for part in words(value_parts(value)):
+            self.trigrams |= trigrams(part)
+            key = digit_key(part)
+            if key:
+                self.identifiers.add(key)
+
+    def add_phone(self, value):
+        phone = normalize_phone(value)
+        if phone:
+            self.identifiers.update((phone, digit_key(phone)))
+            self.trigrams |= trigrams(phone)
+
+
+# ── Maintenance ─────────────────────────────────────────────────────────────
+
+STUDENT_FIELDS = (
+    'id', 'school_id', 'first_name', 'middle_name', 'last_name',
+    'admission_number', 'upi_number', 'nemis_id', 'emergency_name', 'emergency_phone',
+)
+
+
+def build_entries(student_rows, guardian_rows):
+    """
+    Unsaved entries from `student_rows` (dicts of STUDENT_FIELDS) and
+    `guardian_rows` ((student_id, full_name, phone, id_number) tuples).
+    """
+    from .models import StudentSearchEntry
+
+    guardians = {}
+    for student_id, full_name, phone, id_number in guardian_rows:
+        guardians.setdefault(student_id, []).append((full_name, phone, id_number))
+
+    entries = []
+    for row in student_rows:
+        own, contact = Keys(), Keys()
+        for name in (row['first_name'], row['middle_name'], row['last_name']):
+            own.add_name(name)
+        for value in (row['admission_number'], row['upi_number'], row['nemis_id']):
+            own.add_identifier(value)
+
+        contact.add_name(row['emergency_name'])
+        contact.add_phone(row['emergency_phone'])
+        for full_name, phone, id_number in guardians.get(row['id'], []):
+            contact.add_name(full_name)
+            contact.add_phone(phone)
+            contact.add_identifier(id_number)
+
+        entries.append(StudentSearchEntry(
+            student_id=row['id'],
+            school_id=row['school_id'],
+            trigrams=sorted(own.trigrams),
+            contact_trigrams=sorted(contact.trigrams - own.trigrams),
+            phonetic=sorted(own.phonetic | {'+' + key for key in contact.phonetic - own.phonetic}),
+            identifiers=sorted(own.identifiers | contact.identifiers),
+        ))
+    return entries
+
+
+def index_students(student_ids, batch_size=1000):
+    """(Re)build the search entries of `student_ids`: two reads and one upsert per batch."""
+    from .models import Student, StudentGuardian, StudentSearchEntry
+
+    student_ids = list(student_ids)
+    for start in range(0, len(student_ids), batch_size):
+        batch = student_ids[start:start + batch_size]
+        students = Student.objects.filter(id__in=batch).values(*STUDENT_FIELDS)
+        links = (
+            StudentGuardian.objects
+            .filter(student_id__in=batch, is_active=True)
+            .values_list('student_id', 'guardian__full_name', 'guardian__phone', 'guardian__id_number')
+        )
+        StudentSearchEntry.objects.bulk_create(
+            build_entries(students, links),
+            update_conflicts=True,
+            unique_fields=['student'],
+            update_fields=['school', 'trigrams', 'contact_trigrams', 'phonetic', 'identifiers', 'updated_at'],
+        )
+
+
+# ── Querying ────────────────────────────────────────────────────────────────
+
+def query_keys(q):
+    """Keys of the query string: terms with digits are identifiers/phones, the rest names."""
+    keys = Keys()
+    for term in q.split():
+        if any(ch.isdigit() for ch in term):
+            keys.add_identifier(term)
+            keys.add_phone(term)
+        else:
+            keys.add_name(term)
+    # A number typed in pieces (0712 345 678) is still one phone
+    keys.add_phone(q)
+    keys.identifiers.discard(None)
+    return keys
+
+
+def anchor_trigrams(q):
+    """
+    Trigrams a candidate must contain for the trigram branch: the interior
+    trigram around the middle of each word. One typo breaks at most three
+    trigrams, so the middle one survives a slip near either end; slips in the
+    middle are left to the phonetic and digit keys. Numbers anchor on their
+    first and last three digits instead (a middle trigram like "012" is shared
+    by thousands of admission numbers). Words shorter than three characters
+    are matched as prefixes.
+    """
+    anchors = set()
+    for term in q.split():
+        for word in words(value_parts(term) if any(ch.isdigit() for ch in term) else term):
+            if word.isdigit() and len(word) > 3:
+                anchors.update((word[:3], word[-3:]))
+            elif len(word) >= 3:
+                middle = (len(word) - 3) // 2
+                anchors.add(word[middle:middle + 3])
+            else:
+                anchors.add(f"  {word}"[-3:])
+    return sorted(anchors)
+
+
+SEARCH_SQL = """
+    SELECT student_id,
+           (({own_trigrams}) + %(contact_weight)s * ({contact_trigrams}))::float / %(trigram_count)s
+           + %(phonetic_weight)s * (({own_phonetic}) + %(contact_weight)s * ({contact_phonetic}))::float
+             / %(phonetic_count)s
+           + CASE WHEN identifiers && %(identifiers)s::varchar[] THEN %(identifier_weight)s ELSE 0 END
+           AS score
+    FROM students_studentsearchentry
+    WHERE (trigrams @> %(anchors)s::varchar[]
+           OR contact_trigrams @> %(anchors)s::varchar[]
+           OR phonetic @> %(phonetic)s::varchar[]
+           OR phonetic @> %(contact_phonetic)s::varchar[]
+           OR identifiers && %(identifiers)s::varchar[])
+      AND school_id = %(school_id)s
+    ORDER BY score DESC, cardinality(trigrams), student_id
+    LIMIT %(limit)s
+"""
+
+
+def hit_count(column, prefix, keys):
+    """SQL counting how many of `keys` `column` holds: one containment test per key."""
+    return ' + '.join(
+        f"({column} @> ARRAY[%({prefix}{i})s]::varchar[])::int" for i in range(len(keys))
+    ) or '0'
+
+
+def search_query(school_id, q, limit=DEFAULT_LIMIT):
+    """(sql, params) for `q`, or None when it has nothing to match on."""
+    keys = query_keys(q)
+    anchors = anchor_trigrams(q)
+    if not keys.trigrams or not anchors:
+        return None
+    query_trigrams = sorted(keys.trigrams)
+    phonetic = sorted(keys.phonetic)
+    contact_phonetic = ['+' + key for key in phonetic]
+    sql = SEARCH_SQL.format(
+        own_trigrams=hit_count('trigrams', 't', query_trigrams),
+        contact_trigrams=hit_count('contact_trigrams', 't', query_trigrams),
+        own_phonetic=hit_count('phonetic', 'p', phonetic),
+        contact_phonetic=hit_count('phonetic', 'c', contact_phonetic),
+    )
+    params = {
+        'school_id': school_id,
+        'trigram_count': len(query_trigrams),
+        'anchors': anchors,
+        # An empty array is contained in everything: no phonetic branch then
+        'phonetic': phonetic or ['-'],
+        'contact_phonetic': contact_phonetic or ['-'],
+        'phonetic_count': max(len(phonetic), 1),
+        'identifiers': sorted(keys.identifiers),
+        'contact_weight': CONTACT_WEIGHT,
+        'phonetic_weight': PHONETIC_WEIGHT,
+        'identifier_weight': IDENTIFIER_WEIGHT,
+        'limit': max(1, min(limit, MAX_LIMIT)),
+    }
+    params.update((f't{i}', key) for i, key in enumerate(query_trigrams))
+    params.update((f'p{i}', key) for i, key in enumerate(phonetic))
+    params.update((f'c{i}', key) for i, key in enumerate(contact_phonetic))
+    return sql, params
+
+
+def search_students(school_id, q, limit=DEFAULT_LIMIT):
+    """
+    Ranked [(student_id, score)] for `q` in one school. A candidate must
+    contain every anchor trigram or every sound-alike key (in the learner's
+    or a contact's keys), or match an identifier; candidates are ranked by
+    the share of the query's trigrams and sound-alike keys they hold,
+    contacts' counting half, plus an identifier bonus. Fewer keys wins a
+    tie: a closer match.
+    """
+    query = search_query(school_id, q, limit)
+    if query is None:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(*query)
+        return cursor.fetchall()
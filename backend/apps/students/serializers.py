@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from django.db import IntegrityError
-from .models import Student, Guardian, StudentGuardian, MedicalRecord, MedicalDocument
+from .models import Student, Guardian, StudentGuardian, MedicalRecord, MedicalDocument, PromotionBatch
+from apps.core.fieldsets import SparseFieldsetSerializerMixin
+from apps.core.serializers import ImageRenditionField
 # from apps.academics.serializers import ClassSerializer
 # from apps.transport.serializers import StudentAssignmentSerializer  # For transport link
 
@@ -9,12 +11,16 @@ from .models import Student, Guardian, StudentGuardian, MedicalRecord, MedicalDo
 # STUDENT SERIALIZERS
 # ----------------------------
 
-class StudentSerializer(serializers.ModelSerializer):
+class StudentSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     full_name = serializers.ReadOnlyField()
     school = serializers.PrimaryKeyRelatedField(read_only=True)
     # current_class = ClassSerializer(read_only=True)
     # transport_assignment = StudentAssignmentSerializer(read_only=True)  # From transport
     medical_record = serializers.PrimaryKeyRelatedField(read_only=True)
+    photo = ImageRenditionField(read_only=True)  # thumbnail; ?image_size=medium|original
+
+    # Columns behind properties, for ?fields= column deferral
+    sparse_sources = {'full_name': ('first_name', 'middle_name', 'last_name')}
 
     class Meta:
         model = Student
@@ -34,10 +40,29 @@ class StudentCreateUpdateSerializer(serializers.ModelSerializer):
             'alumni': {'read_only': True},
         }
 
+    def validate_upi_number(self, value):
+        # Store missing UPIs as NULL so they don't collide on the unique index
+        return value or None
+
     def create(self, validated_data):
         validated_data['created_by'] = self.context['request'].user
         return super().create(validated_data)
 
+# ----------------------------
+# PROMOTION SERIALIZERS
+# ----------------------------
+
+class PromotionBatchSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PromotionBatch
+        exclude = ['school']
+        read_only_fields = [f.name for f in PromotionBatch._meta.fields]
+
+class PromotionRunSerializer(serializers.Serializer):
+    label = serializers.CharField(max_length=50)
+    graduation_date = serializers.DateField(required=False)
+    dry_run = serializers.BooleanField(default=False)
+
 # ----------------------------
 # GUARDIAN SERIALIZERS
 # ----------------------------
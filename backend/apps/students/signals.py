@@ -0,0 +1,83 @@
+# apps/students/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from apps.core.audit import register_audit
+from .households import join_households, split_household
+from .models import Guardian, MedicalRecord, Student, StudentGuardian
+from .search import STUDENT_FIELDS, index_students
+
+INDEXED_STUDENT_FIELDS = {name.removesuffix('_id') for name in STUDENT_FIELDS} - {'id'}
+
+
+def reindex_on_commit(student_ids):
+    # After commit: a cascade delete may still be removing the student now
+    student_ids = list(student_ids)
+    if student_ids:
+        transaction.on_commit(lambda: index_students(student_ids))
+
+
+@receiver(post_save, sender=Student)
+def index_student(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not INDEXED_STUDENT_FIELDS.intersection(update_fields):
+        return  # e.g. a fee_balance update
+    reindex_on_commit([instance.pk])
+
+
+@receiver(post_save, sender=Guardian)
+def index_guardian_students(sender, instance, created=False, **kwargs):
+    if created:
+        return  # not linked to anyone yet
+    reindex_on_commit(
+        StudentGuardian.objects.filter(guardian=instance).values_list('student_id', flat=True)
+    )
+
+
+@receiver(post_save, sender=StudentGuardian)
+@receiver(post_delete, sender=StudentGuardian)
+def index_linked_student(sender, instance, **kwargs):
+    reindex_on_commit([instance.student_id])
+
+
+# ── Households ──────────────────────────────────────────────────────────────
+
+def student_household(student_id):
+    return Student.objects.filter(pk=student_id).values_list('household_id', flat=True).first()
+
+
+@receiver(post_init, sender=StudentGuardian)
+def remember_link(sender, instance, **kwargs):
+    instance._linked = (instance.__dict__.get('student_id'), instance.__dict__.get('guardian_id'))
+
+
+@receiver(post_save, sender=StudentGuardian)
+def update_household(sender, instance, created=False, **kwargs):
+    old_student_id, old_guardian_id = instance._linked
+    instance._linked = (instance.student_id, instance.guardian_id)
+    households = set()
+    if instance.is_active:
+        join_households(instance.student_id, instance.guardian_id)
+    else:
+        households.add(student_household(instance.student_id))
+    # Moved to another student or guardian: the old pair is unlinked as if deleted
+    if not created and old_student_id and (old_student_id, old_guardian_id) != instance._linked:
+        households.add(student_household(old_student_id))
+    for household_id in households - {None}:
+        split_household(household_id)
+
+
+@receiver(post_delete, sender=StudentGuardian)
+def split_household_on_unlink(sender, instance, **kwargs):
+    household_id = student_household(instance.student_id)
+    if household_id:
+        # After commit, once a cascade has finished removing everything it will
+        transaction.on_commit(lambda: split_household(household_id))
+
+
+# ── Audit log ───────────────────────────────────────────────────────────────
+
+register_audit(Student, exclude=('photo_rendered',))
+register_audit(Guardian)
+# Medical details stay out of the log: only which fields changed is kept
+register_audit(MedicalRecord, redact=True)
@@ -5,9 +5,12 @@ from .views import (
     GuardianViewSet,
     StudentGuardianViewSet,
     MedicalRecordViewSet,
+    PromotionBatchViewSet,
 )
 
 router = DefaultRouter()
+# Before the student routes, whose {pk}/ would otherwise swallow promotions/
+router.register(r'promotions', PromotionBatchViewSet, basename='promotion')
 router.register(r'', StudentViewSet, basename='student')  # /api/students/
 router.register(r'guardians', GuardianViewSet, basename='guardian')
 router.register(r'student-guardians', StudentGuardianViewSet, basename='student-guardian')
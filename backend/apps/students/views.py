@@ -1,30 +1,196 @@
+from uuid import UUID
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from rest_framework import viewsets
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Student, Guardian, StudentGuardian, MedicalRecord
+from apps.school.models import School
+from apps.core.fieldsets import SparseFieldsetMixin
+from .exports import FORMATS, parse_columns, stream_export
+from .promotion import apply_promotion, plan_promotion, revert_promotion
+from .search import DEFAULT_LIMIT, search_students
+from .models import Student, Guardian, StudentGuardian, MedicalRecord, PromotionBatch
 from .serializers import (
     StudentSerializer, StudentCreateUpdateSerializer,
+    PromotionBatchSerializer, PromotionRunSerializer,
     GuardianSerializer,
     StudentGuardianSerializer, LinkExistingGuardianSerializer,
     MedicalRecordSerializer, MedicalRecordCreateUpdateSerializer
 )
 
-class StudentViewSet(viewsets.ModelViewSet):
+def school_from_request(request):
+    """The X-School-ID school, provided the user belongs to it."""
+    try:
+        school_id = UUID(request.headers.get('X-School-ID', ''))
+    except ValueError:
+        raise ValidationError({"detail": "X-School-ID header is required"})
+    schools = School.objects.all() if request.user.is_superuser else request.user.schools.all()
+    school = schools.filter(id=school_id).first()
+    if school is None:
+        raise PermissionDenied("You are not associated with this school.")
+    return school
+
+
+class StudentViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
+    """?fields= / ?exclude= trim list and retrieve responses and the columns fetched."""
     queryset = Student.objects.all()
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
-    filterset_fields = ['school', 'status', 'current_class', 'gender', 'nationality']
+    filterset_fields = ['school', 'status', 'current_class', 'gender', 'nationality', 'household_id']
 
     def get_queryset(self):
-        return self.queryset.filter(school=self.request.user.school)  # Tenancy filter (adjust if user has school)
+        # Tenancy: the X-School-ID school, else every school the user belongs to
+        user = self.request.user
+        if self.request.headers.get('X-School-ID'):
+            return self.queryset.filter(school=self.get_school())
+        if user.is_superuser:
+            return self.queryset
+        return self.queryset.filter(school__in=user.schools.all())
 
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
             return StudentCreateUpdateSerializer
         return StudentSerializer
 
+    def get_school(self):
+        return school_from_request(self.request)
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Typo-tolerant learner search in the X-School-ID school: ?q= matches
+        names, admission/UPI/NEMIS numbers and guardian names and phones.
+        Returns up to ?limit= (default 20) students, best match first.
+        """
+        school = self.get_school()
+        q = request.query_params.get('q', '').strip()
+        try:
+            limit = int(request.query_params.get('limit', DEFAULT_LIMIT))
+        except ValueError:
+            raise ValidationError({"limit": "Must be a number"})
+        if not q:
+            return Response({"query": q, "results": []})
+
+        ranked = search_students(school.id, q, limit)
+        students = Student.objects.select_related('current_class').only(
+            'id', 'admission_number', 'upi_number', 'first_name', 'middle_name', 'last_name',
+            'status', 'current_class__name',
+        ).in_bulk([student_id for student_id, _ in ranked])
+
+        results = []
+        for student_id, score in ranked:
+            student = students.get(student_id)
+            if student is None:
+                continue
+            results.append({
+                "id": str(student.id),
+                "admission_number": student.admission_number,
+                "upi_number": student.upi_number,
+                "full_name": student.full_name,
+                "current_class": student.current_class.name if student.current_class else None,
+                "status": student.status,
+                "score": round(score, 3),
+            })
+        return Response({"query": q, "results": results})
+
+    @action(detail=True, methods=['get'])
+    def household(self, request, pk=None):
+        """The student's family: siblings and guardians sharing its household_id."""
+        student = self.get_object()
+        siblings = (
+            Student.objects.filter(household_id=student.household_id).exclude(pk=student.pk)
+            .select_related('current_class')
+            .only('id', 'admission_number', 'first_name', 'middle_name', 'last_name', 'status',
+                  'current_class__name')
+        )
+        guardians = Guardian.objects.filter(household_id=student.household_id).only('id', 'full_name', 'phone')
+        return Response({
+            "household_id": str(student.household_id),
+            "siblings": [
+                {
+                    "id": str(sibling.id),
+                    "admission_number": sibling.admission_number,
+                    "full_name": sibling.full_name,
+                    "current_class": sibling.current_class.name if sibling.current_class else None,
+                    "status": sibling.status,
+                }
+                for sibling in siblings
+            ],
+            "guardians": [
+                {"id": guardian.id, "full_name": guardian.full_name, "phone": guardian.phone}
+                for guardian in guardians
+            ],
+        })
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Stream the X-School-ID school's students as CSV (default) or JSON lines.
+        ?output=csv|jsonl, ?columns=admission_number,first_name,... picks the
+        columns; the usual filters (status, current_class, gender, ...) apply.
+        """
+        school = self.get_school()
+        output = request.query_params.get('output', 'csv')
+        if output not in FORMATS:
+            raise ValidationError({"output": f"Choose one of: {', '.join(FORMATS)}"})
+        try:
+            columns = parse_columns(request.query_params.get('columns'))
+        except ValueError as e:
+            raise ValidationError({"columns": str(e)})
+
+        queryset = self.filter_queryset(self.get_queryset()).order_by('admission_number', 'id')
+        filename = f"students-{school.slug or school.id}-{timezone.localdate():%Y%m%d}.{output}"
+        response = StreamingHttpResponse(stream_export(queryset, columns, output), content_type=FORMATS[output])
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        # Don't let nginx buffer the whole file before sending the first byte
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+class PromotionBatchViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Year-end promotions of the X-School-ID school.
+
+    GET  promotions/preview/      what a promotion would do, per grade
+    POST promotions/              run it ({"label", "graduation_date", "dry_run"})
+    POST promotions/{id}/revert/  undo a run
+    """
+    serializer_class = PromotionBatchSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return PromotionBatch.objects.filter(school=school_from_request(self.request))
+
+    @action(detail=False, methods=['get'])
+    def preview(self, request):
+        return Response(plan_promotion(school_from_request(request)))
+
+    def create(self, request):
+        school = school_from_request(request)
+        serializer = PromotionRunSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        if data['dry_run']:
+            return Response(plan_promotion(school))
+        try:
+            batch = apply_promotion(school, data['label'], data.get('graduation_date'), request.user)
+        except ValueError as e:
+            raise ValidationError({"label": str(e)})
+        return Response(PromotionBatchSerializer(batch).data, status=201)
+
+    @action(detail=True, methods=['post'])
+    def revert(self, request, pk=None):
+        batch = self.get_object()
+        try:
+            restored = revert_promotion(batch, request.user)
+        except ValueError as e:
+            raise ValidationError({"detail": str(e)})
+        batch.refresh_from_db()
+        return Response({**PromotionBatchSerializer(batch).data, "restored": restored})
+
 class GuardianViewSet(viewsets.ModelViewSet):
     queryset = Guardian.objects.all()
     serializer_class = GuardianSerializer
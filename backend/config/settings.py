@@ -39,6 +39,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     'rest_framework',
     'corsheaders',
@@ -72,6 +73,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.core.audit.AuditMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -176,17 +178,41 @@ CORS_ALLOW_HEADERS = [
     'authorization',
     'content-type',
     'x-school-id',
+    'prefer',         # Prefer: respond-async on public submissions
+    'if-match',       # draft autosave / reload preconditions
+    'if-none-match',
 ]
 
+CORS_EXPOSE_HEADERS = ['etag']
+
 
 # At the bottom of settings.py
 
+# Accept-fast public submissions (apps/admissions/pipeline.py):
+# "thread" drains the queue from the web process after each submission,
+# "command" leaves it to `manage.py process_submissions` workers.
+ADMISSIONS_SUBMISSION_WORKER = os.getenv("ADMISSIONS_SUBMISSION_WORKER", "thread")
+ADMISSIONS_SUBMISSION_THREADS = 2
+
+# Threads building photo/logo renditions after upload (apps/core/images.py)
+IMAGE_RENDITION_WORKERS = 2
+
+# Audit log (apps/core/audit.py): "thread" writes captured changes from a
+# background flusher in batches, "request" writes them as each request ends
+AUDIT_LOG_WRITER = os.getenv("AUDIT_LOG_WRITER", "thread")
+AUDIT_FLUSH_INTERVAL = 1.0  # seconds
+AUDIT_BATCH_SIZE = 500
+AUDIT_BUFFER_LIMIT = 100000  # entries kept while writes fail; the oldest go first
+
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
 # Namecheap Private Email (recommended for custom domain like hello@getaxe.tech)
 
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# Override for local runs, e.g. EMAIL_BACKEND=django.core.mail.backends.filebased.EmailBackend
+# with EMAIL_FILE_PATH; the test runner swaps in locmem automatically
+EMAIL_BACKEND = os.getenv("EMAIL_BACKEND", 'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 EMAIL_HOST = 'mail.privateemail.com'           # ← this is the correct SMTP server
 EMAIL_PORT = 587                               # Preferred (STARTTLS)
 EMAIL_USE_TLS = True                           # Must be True for port 587
@@ -194,4 +220,11 @@ EMAIL_USE_TLS = True                           # Must be True for port 587
 # EMAIL_USE_SSL = True                         # Use this INSTEAD of EMAIL_USE_TLS if port 465
 EMAIL_HOST_USER = 'hello@getaxe.tech'          # Your full email address
 EMAIL_HOST_PASSWORD = 'your-private-email-password'  # The password you set for this mailbox
-DEFAULT_FROM_EMAIL = 'Admissions <hello@getaxe.tech>'  # Or whatever display name you want
\ No newline at end of file
+DEFAULT_FROM_EMAIL = 'Admissions <hello@getaxe.tech>'  # Or whatever display name you want
+EMAIL_TIMEOUT = 30
+
+# Admissions email outbox (apps/admissions/outbox.py): "thread" sends from the
+# web process after commit, "command" leaves it to `manage.py send_admission_emails`
+ADMISSIONS_EMAIL_WORKER = os.getenv("ADMISSIONS_EMAIL_WORKER", "thread")
+ADMISSIONS_DRAFT_EXPIRY_DAYS = 30
+FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
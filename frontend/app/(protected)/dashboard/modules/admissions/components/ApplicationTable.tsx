@@ -275,8 +275,8 @@
 
 "use client";
 
-import { useQuery, useQueryClient } from "@tanstack/react-query";
-import { useState } from "react";
+import { useInfiniteQuery, useQueryClient } from "@tanstack/react-query";
+import { useEffect, useState } from "react";
 import api from "@/utils/api";
 import Link from "next/link";
 import { useRouter } from "next/navigation";
@@ -321,6 +321,11 @@ interface Application {
   student?: { id: string; full_name: string };
 }
 
+interface ApplicationPage {
+  next: string | null;
+  results: Application[];
+}
+
 interface ApplicationTableProps {
   searchTerm?: string;
   applications?: Application[];
@@ -337,15 +342,36 @@ export default function ApplicationTable({
   const [enrollingId, setEnrollingId] = useState<string | null>(null);
   const [deletingId, setDeletingId] = useState<string | null>(null);
 
-  const { data: fetched = [], isLoading } = useQuery<Application[]>({
-    queryKey: ["applications"],
-    queryFn: async () => {
-      const res = await api.get("/admissions/applications/");
-      return res.data;
+  // Search and status filtering happen on the server, over every application
+  const [search, setSearch] = useState(searchTerm.trim());
+  useEffect(() => {
+    const timer = setTimeout(() => setSearch(searchTerm.trim()), 300);
+    return () => clearTimeout(timer);
+  }, [searchTerm]);
+  const status = statusFilter && statusFilter !== "ALL" ? statusFilter : undefined;
+
+  const {
+    data,
+    isLoading,
+    fetchNextPage,
+    hasNextPage,
+    isFetchingNextPage,
+  } = useInfiniteQuery<ApplicationPage>({
+    queryKey: ["applications", { search, status }],
+    queryFn: async ({ pageParam }) => {
+      const res = await api.get("/admissions/applications/", {
+        params: { search: search || undefined, status, cursor: pageParam || undefined },
+      });
+      // List is cursor-paginated: { next, results }
+      return Array.isArray(res.data) ? { next: null, results: res.data } : res.data;
     },
+    initialPageParam: null,
+    getNextPageParam: (lastPage) =>
+      lastPage.next ? new URL(lastPage.next).searchParams.get("cursor") : undefined,
     enabled: !providedApplications,
   });
 
+  const fetched = data?.pages.flatMap((page) => page.results) ?? [];
   const applications = providedApplications ?? fetched;
 
   const handleEnroll = async (id: string) => {
@@ -356,6 +382,7 @@ export default function ApplicationTable({
       router.push(`/dashboard/modules/students/${res.data?.id}`);
       // Optional: invalidate here too if needed
       queryClient.invalidateQueries({ queryKey: ["applications"] });
+      queryClient.invalidateQueries({ queryKey: ["applications-funnel"] });
     } catch (err: any) {
       toast.error(err.response?.data?.detail || "Enrollment failed");
     } finally {
@@ -380,7 +407,8 @@ export default function ApplicationTable({
     }
   };
 
-  const filtered = applications.filter((app) => {
+  // Only a caller-provided list is filtered here; fetched pages already are
+  const filtered = !providedApplications ? applications : applications.filter((app) => {
     const matchesStatus = statusFilter && statusFilter !== "ALL" ? app.status === statusFilter : true;
     const fullName = `${app.first_name} ${app.middle_name || ""} ${app.last_name}`.toLowerCase();
     const matchesSearch = searchTerm
@@ -530,6 +558,19 @@ export default function ApplicationTable({
           </div>
         ))}
       </div>
+
+      {hasNextPage && (
+        <div className="flex justify-center pt-4">
+          <Button
+            variant="outline"
+            onClick={() => fetchNextPage()}
+            disabled={isFetchingNextPage}
+            className="rounded-xl font-bold text-[10px] uppercase tracking-wider border-slate-200"
+          >
+            {isFetchingNextPage ? "Loading..." : "Load more"}
+          </Button>
+        </div>
+      )}
     </div>
   );
 }
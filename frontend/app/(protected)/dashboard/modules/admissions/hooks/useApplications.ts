@@ -9,8 +9,15 @@ export const useApplications = () => {
   useEffect(() => {
     const fetch = async () => {
       try {
-        const res = await axios.get('/api/admissions/applications/');
-        setApplications(res.data);
+        // The list is cursor-paginated ({ next, results }): follow `next` to the end
+        const all = [];
+        let url = '/api/admissions/applications/';
+        while (url) {
+          const res = await axios.get(url);
+          all.push(...(res.data.results ?? res.data));
+          url = res.data.next ?? null;
+        }
+        setApplications(all);
       } catch (error) {
         // Offline fallback: localStorage.getItem('applications')
       } finally {
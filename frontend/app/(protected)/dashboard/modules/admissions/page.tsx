@@ -43,6 +43,18 @@ const AdmissionsPage = () => {
       const res = await api.get('/admissions/applications/', {
         headers: { 'X-School-ID': currentSchool.id },
       });
+      return res.data.results ?? res.data;
+    },
+    enabled: !!currentSchool?.id && !schoolLoading,
+  });
+
+  // Server-maintained funnel counters: whole intake, not just the loaded page
+  const { data: funnel } = useQuery({
+    queryKey: ['applications-funnel', currentSchool?.id],
+    queryFn: async () => {
+      const res = await api.get('/admissions/applications/funnel/', {
+        headers: { 'X-School-ID': currentSchool!.id },
+      });
       return res.data;
     },
     enabled: !!currentSchool?.id && !schoolLoading,
@@ -50,22 +62,13 @@ const AdmissionsPage = () => {
 
   // Memoized stats to prevent re-calculation jumps
   const { counts, readyToEnrollCount } = useMemo(() => {
-    const statusCounts = applications.reduce(
-      (acc: Record<string, number>, app: any) => {
-        const status = app.status || 'UNKNOWN';
-        acc[status] = (acc[status] || 0) + 1;
-        acc.ALL = (acc.ALL || 0) + 1;
-        return acc;
-      },
-      { ALL: 0 } as Record<string, number>
-    );
-
-    const ready = applications.filter(
-      (app: any) => app.status === 'ACCEPTED' && (app.fee_payments?.length ?? 0) > 0 && !app.student
-    ).length;
+    const statusCounts: Record<string, number> = {
+      ...(funnel?.status ?? {}),
+      ALL: funnel?.total ?? 0,
+    };
 
-    return { counts: statusCounts, readyToEnrollCount: ready };
-  }, [applications]);
+    return { counts: statusCounts, readyToEnrollCount: funnel?.ready_to_enroll ?? 0 };
+  }, [funnel]);
 
   const statusTabs = [
     { key: 'ALL', label: 'All', icon: Users },
@@ -1,7 +1,7 @@
 "use client";
 
-import { useState } from "react";
-import { useParams, useRouter } from "next/navigation";
+import { useEffect, useRef, useState } from "react";
+import { useParams, useRouter, useSearchParams } from "next/navigation";
 import { useMutation, useQuery, useQueryClient } from "@tanstack/react-query";
 import { useForm, Controller } from "react-hook-form";
 import { zodResolver } from "@hookform/resolvers/zod";
@@ -87,11 +87,15 @@ export default function PublicNewApplicationPage() {
   const router = useRouter();
   const { schoolSlug } = useParams<{ schoolSlug: string }>();
   const queryClient = useQueryClient();
+  // Resume link from the "continue your application" email: /apply/<slug>?draft=<id>
+  const draftId = useSearchParams().get("draft");
 
   const [currentStep, setCurrentStep] = useState(0);
   const [documents, setDocuments] = useState<File[]>([]);
   const [isFinalSubmitted, setIsFinalSubmitted] = useState(false);
   const [savedAppId, setSavedAppId] = useState<string | null>(null);
+  // ETag of the last saved draft: sent as If-Match so a stale tab can't overwrite newer edits
+  const draftEtag = useRef<string | null>(null);
 
   const steps = ["Student", "Guardian", "Additional Info", "Documents"];
 
@@ -163,6 +167,31 @@ export default function PublicNewApplicationPage() {
 
   const { control, getValues, formState: { errors, isValid }, trigger } = form;
 
+  // ─── Resume a saved draft ──────────────────────────────────────────────────
+  const { data: draft } = useQuery({
+    queryKey: ["publicDraft", draftId],
+    queryFn: async () => {
+      const res = await publicApi.get(`/admissions/public/applications/${draftId}/`);
+      draftEtag.current = res.headers?.etag ?? null;
+      return res.data;
+    },
+    enabled: !!draftId && !savedAppId,
+    retry: false,
+    staleTime: Infinity,
+  });
+
+  useEffect(() => {
+    if (!draft) return;
+    const values = getValues();
+    const restored = Object.fromEntries(
+      Object.keys(values)
+        .filter((key) => key !== "photo")
+        .map((key) => [key, draft[key] ?? values[key as keyof FormValues]])
+    );
+    form.reset({ ...values, ...restored, class_applied: draft.class_applied?.id ?? "" });
+    setSavedAppId(draft.id);
+  }, [draft]);
+
   // ─── Save / Submit Mutation (public endpoints) ─────────────────────────────
   const saveMutation = useMutation({
     mutationFn: async ({ fd, id }: { fd: FormData; id?: string }) => {
@@ -172,11 +201,18 @@ export default function PublicNewApplicationPage() {
 
       let res;
       if (id) {
-        res = await publicApi.patch(`/admissions/public/applications/${id}/update/`, fd);
+        res = await publicApi.patch(`/admissions/public/applications/${id}/update/`, fd, {
+          params: { return: "minimal" },
+          headers: draftEtag.current ? { "If-Match": draftEtag.current } : {},
+        });
       } else {
-        res = await publicApi.post("/admissions/public/applications/submit/", fd);
+        // Accept-fast: server answers 202 with a receipt; documents are processed in the background
+        res = await publicApi.post("/admissions/public/applications/submit/", fd, {
+          headers: { Prefer: "respond-async" },
+        });
       }
 
+      draftEtag.current = res.headers?.etag ?? draftEtag.current;
       return res.data;
     },
     onSuccess: (response, { id }) => {